@@ -0,0 +1,275 @@
+"""
+API Server for CSR Dashboard
+Read-only JSON API over the shared data store, served outside Streamlit
+
+Usage:
+    python api_server.py --port 8600
+
+Endpoints (GET):
+    /api/health                          data version and sheet count
+    /api/programs                        program names, data keys and record counts
+    /api/kpis                            headline KPI values
+    /api/aggregates?grain=Monthly&programs=Subhangi&start=2024-04-01&end=2025-03-31&by=state,gender
+    /api/locations?path=Odisha/Angul     record counts below a location
+    /api/programs/<program>/rows?offset=0&limit=100&start=...&end=...
+
+Every response carries an ETag derived from the data version and the request,
+so clients polling with If-None-Match get an empty 304 until the data changes.
+Responses are gzip-compressed when the client accepts it.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pandas as pd
+
+from cubes import DIMENSIONS, GRAINS, get_geo_cube, get_time_cubes, program_label
+from data_store import default_paths, get_loader
+from instrumentation import configure_json_logging, log_event, metrics
+from kpis import PROGRAM_KEYS, kpi_summary
+from query_cache import cached_query
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+GZIP_MIN_BYTES = 512
+
+
+class ApiError(Exception):
+    """Error with an HTTP status for the client"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _param(query: Dict[str, List[str]], name: str, default: Optional[str] = None) -> Optional[str]:
+    values = query.get(name)
+    return values[0] if values else default
+
+
+def _date_param(query: Dict[str, List[str]], name: str) -> Optional[date]:
+    value = _param(query, name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be a date in YYYY-MM-DD format")
+
+
+def _int_param(query: Dict[str, List[str]], name: str, default: int, minimum: int, maximum: int) -> int:
+    value = _param(query, name)
+    if value is None:
+        return default
+    try:
+        return max(minimum, min(maximum, int(value)))
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be an integer")
+
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """DataFrame rows as JSON-safe dicts (ISO dates, null for NaN)"""
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+def _program_key(data_loader, name: str) -> str:
+    key = data_loader.resolve_program_key(PROGRAM_KEYS.get(name, name))
+    if key is None:
+        raise ApiError(404, f"Unknown program '{name}'")
+    return key
+
+
+def list_programs(data_loader, query) -> Dict[str, Any]:
+    programs = []
+    for name, program in PROGRAM_KEYS.items():
+        key = data_loader.resolve_program_key(program)
+        df = data_loader.get_data(key) if key else None
+        programs.append({"name": name, "key": key, "records": 0 if df is None else len(df)})
+    return {"programs": programs}
+
+
+def get_kpis(data_loader, query) -> Dict[str, Any]:
+    return kpi_summary(data_loader)
+
+
+def get_aggregates(data_loader, query) -> Dict[str, Any]:
+    grain = _param(query, "grain", "Monthly")
+    if grain not in GRAINS and grain not in GRAINS.values():
+        raise ApiError(400, f"'grain' must be one of {', '.join(GRAINS)}")
+    by = [d for d in (_param(query, "by", "program") or "").split(",") if d]
+    unknown = [d for d in by if d not in DIMENSIONS]
+    if unknown:
+        raise ApiError(400, f"Unknown dimension(s): {', '.join(unknown)}")
+    names = [p for p in (_param(query, "programs") or "").split(",") if p]
+    programs = [_program_key(data_loader, name) for name in names] or None
+
+    start, end = _date_param(query, "start"), _date_param(query, "end")
+
+    def rows():
+        result = get_time_cubes(data_loader).query(grain, programs, start, end, by=by)
+        result["period"] = result["period"].dt.strftime("%Y-%m-%d")
+        if "program" in result:
+            result["program"] = result["program"].astype(str).map(program_label)
+        return _records(result)
+
+    # Shared by every client asking the same question until the data changes
+    records = cached_query(data_loader, "api.aggregates", rows, grain=grain, by=by,
+                           programs=set(programs) if programs else None, start=start, end=end)
+    return {"grain": grain, "by": by, "rows": records}
+
+
+def get_locations(data_loader, query) -> Dict[str, Any]:
+    path = [part for part in (_param(query, "path") or "").split("/") if part]
+    cube = get_geo_cube(data_loader)
+    children = cube.children(*path)
+    return {
+        "path": path,
+        "records": cube.node_count(*path),
+        "children": [{"name": name, "records": int(count)} for name, count in children.items()],
+    }
+
+
+def get_program_rows(data_loader, query, program: str) -> Dict[str, Any]:
+    key = _program_key(data_loader, program)
+    start, end = _date_param(query, "start"), _date_param(query, "end")
+    if start or end:
+        df = data_loader.get_period_data(key, start, end)
+    else:
+        df = data_loader.get_data(key)
+    offset = _int_param(query, "offset", 0, 0, 10**9)
+    limit = _int_param(query, "limit", DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    total = 0 if df is None else len(df)
+    page = df.iloc[offset:offset + limit] if df is not None else pd.DataFrame()
+    return {
+        "program": program,
+        "key": key,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "rows": _records(page),
+    }
+
+
+ROUTES = {
+    "/api/programs": list_programs,
+    "/api/kpis": get_kpis,
+    "/api/aggregates": get_aggregates,
+    "/api/locations": get_locations,
+}
+
+
+def route(data_loader, path: str, query: Dict[str, List[str]]) -> Dict[str, Any]:
+    """Dispatch a request path to its handler"""
+    if path == "/api/health":
+        return {"status": "ok", "data_version": data_loader.data_version,
+                "sheets": len(data_loader.get_all_keys())}
+    if path in ROUTES:
+        return ROUTES[path](data_loader, query)
+    parts = path.split("/")
+    # /api/programs/<program>/rows
+    if len(parts) == 5 and parts[1:3] == ["api", "programs"] and parts[4] == "rows":
+        return get_program_rows(data_loader, query, unquote(parts[3]))
+    raise ApiError(404, f"No such endpoint: {path}")
+
+
+def make_etag(data_version: str, path: str, query: str) -> str:
+    """Strong ETag for one resource at one data version"""
+    digest = hashlib.sha1(f"{data_version}|{path}?{query}".encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """True when an If-None-Match header lists ``etag`` (or *)"""
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Serves the read-only JSON endpoints"""
+
+    server_version = "CSRDashboardAPI/1.0"
+    paths: Tuple[Optional[str], Optional[str]] = (None, None)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        data_loader = get_loader(*self.paths)
+        etag = make_etag(data_loader.data_version, url.path, url.query)
+
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            metrics.increment("api.not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            return
+
+        try:
+            body = route(data_loader, url.path, parse_qs(url.query))
+            status = 200
+        except ApiError as e:
+            body, status = {"error": str(e)}, e.status
+        except Exception as e:
+            log_event("api.error", path=url.path, error=str(e))
+            body, status = {"error": "Internal server error"}, 500
+
+        payload = json.dumps(body, default=str).encode("utf-8")
+        encoding = None
+        if len(payload) >= GZIP_MIN_BYTES and "gzip" in self.headers.get("Accept-Encoding", ""):
+            payload = gzip.compress(payload, compresslevel=6)
+            encoding = "gzip"
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Vary", "Accept-Encoding")
+        if status == 200:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        self.wfile.write(payload)
+        metrics.increment(f"api.status.{status}")
+
+    def log_message(self, format, *args):
+        log_event("api.request", client=self.client_address[0], request=format % args)
+
+
+def make_server(host: str, port: int, csr_mis_path: Optional[str] = None,
+                jspl_input_path: Optional[str] = None) -> ThreadingHTTPServer:
+    """HTTP server bound to ``host:port`` reading the given workbooks"""
+    handler = type("ConfiguredApiHandler", (ApiHandler,), {"paths": (csr_mis_path, jspl_input_path)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    default_csr, default_jspl = default_paths()
+    parser = argparse.ArgumentParser(description="Read-only JSON API for the CSR dashboard data")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8600, help="Port to listen on")
+    parser.add_argument("--csr-mis", default=default_csr, help="CSR MIS workbook or partition directory")
+    parser.add_argument("--jspl-input", default=default_jspl, help="JSPL CSR Data Input workbook")
+    args = parser.parse_args()
+
+    configure_json_logging()
+    # Load before accepting requests so the first client does not wait
+    get_loader(args.csr_mis, args.jspl_input)
+    server = make_server(args.host, args.port, args.csr_mis, args.jspl_input)
+    print(f"Serving CSR dashboard API on http://{args.host}:{args.port}/api/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
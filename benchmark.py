@@ -0,0 +1,294 @@
+"""
+Benchmark Suite for CSR Dashboard
+Times the loader, KPI calculation and headless page rendering on synthetic
+workbooks and compares the results against a JSON baseline
+
+Usage:
+    python benchmark.py --sizes 10k,100k          # compare against baseline
+    python benchmark.py --sizes 10k --update-baseline
+    python benchmark.py --sizes 10k --startup-budget 5   # cold-start budget
+"""
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from data_loader import DataLoader
+from synthetic_data import generate_dataset, parse_size
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+DEFAULT_BASELINE = "benchmark_baseline.json"
+PAGES = [
+    "Overview", "KPIs", "Framework", "Documents", "Budgets",
+    "Health & Nutrition", "Education", "Data Entry", "Reports",
+]
+# Seconds allowed for import + first Overview render (which includes the
+# load) per dataset size; other sizes are only compared with the baseline
+STARTUP_BUDGETS = {"10k": 15.0}
+PROGRAMS = ["JindalArogym", "Kishori Express", "Vatsalya", "Subhangi", "Swasti Express"]
+
+
+def measure(func: Callable, repeat: int = 1, memory: bool = True) -> Dict[str, Optional[float]]:
+    """Run ``func`` and return the median runtime and peak traced memory"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    peak_mb = None
+    if memory:
+        # Separate pass: tracemalloc slows allocation-heavy code down
+        tracemalloc.start()
+        try:
+            func()
+            peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "seconds": round(statistics.median(times), 4),
+        "peak_mb": round(peak_mb, 2) if peak_mb is not None else None,
+    }
+
+
+def ensure_dataset(data_dir: str, size: str) -> tuple:
+    """Generate the workbooks for ``size`` unless they already exist"""
+    out_dir = os.path.join(data_dir, size)
+    csr_path = os.path.join(out_dir, "CSR MIS.xlsx")
+    jspl_path = os.path.join(out_dir, "JSPL CSR Data Input.xlsx")
+    if not (os.path.exists(csr_path) and os.path.exists(jspl_path)):
+        print(f"  Generating {size} dataset in {out_dir} ...")
+        generate_dataset(out_dir, parse_size(size))
+    return csr_path, jspl_path
+
+
+def bench_loader(csr_path: str, jspl_path: str, repeat: int, memory: bool) -> Dict[str, dict]:
+    """Benchmark cold load (Excel), warm load (published shared store) and loader queries"""
+    results = {}
+    results["cold_load"] = measure(lambda: DataLoader(csr_path, jspl_path), 1, memory)
+
+    loader = DataLoader(csr_path, jspl_path)
+    if importlib.util.find_spec("pyarrow") is not None:
+        # Warm path: workers attach the sheets a publisher has already parsed
+        from shared_store import SharedDataLoader, publish
+        with tempfile.TemporaryDirectory(prefix="csr_bench_store_") as store_dir:
+            publish(loader, store_dir)
+            results["warm_load"] = measure(lambda: SharedDataLoader(store_dir), repeat, memory)
+    else:
+        print("  Skipping warm_load: the shared store needs pyarrow")
+
+    def program_lookups():
+        for program in PROGRAMS:
+            loader.get_program_data(program)
+
+    results["get_program_data"] = measure(program_lookups, repeat, memory)
+
+    from kpis import calculate_kpis
+    results["calculate_kpis"] = measure(lambda: calculate_kpis(loader), repeat, memory)
+    return results
+
+
+# Runs in a fresh interpreter so nothing is already imported or cached
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2]))
+imported = time.perf_counter()
+at.run()
+rendered = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - start,
+    "total_s": rendered - start,
+    "error": str(at.exception[0].value) if at.exception else None,
+    "views": sorted(name for name in sys.modules if name.startswith("views.")),
+}))
+"""
+
+
+def bench_startup(csr_path: str, jspl_path: str, timeout: int) -> Dict[str, dict]:
+    """Time a cold start: imports plus the first Overview render in a new process"""
+    env = dict(os.environ, CSR_MIS_PATH=csr_path, JSPL_INPUT_PATH=jspl_path)
+    proc = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT, APP_PATH, str(timeout)],
+        capture_output=True, text=True, env=env, timeout=timeout,
+    )
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(f"Startup run failed: {proc.stderr.strip()[-500:]}")
+    run = json.loads(lines[-1])
+    if run["error"]:
+        raise RuntimeError(f"App failed on first run: {run['error']}")
+    return {
+        "startup_import": {"seconds": round(run["import_s"], 4), "peak_mb": None},
+        "startup_first_render": {"seconds": round(run["total_s"], 4), "peak_mb": None, "views": run["views"]},
+    }
+
+
+def check_startup(results: Dict[str, dict], budget: Optional[float] = None) -> List[str]:
+    """
+    Startup cases over the absolute budget (``budget`` for every size, else
+    STARTUP_BUDGETS), or that imported more than the Overview view
+    """
+    problems = []
+    for size, cases in results.items():
+        startup = cases.get("startup_first_render")
+        if not startup:
+            continue
+        limit = budget or STARTUP_BUDGETS.get(size)
+        if limit and startup["seconds"] > limit:
+            problems.append(f"{size}/startup_first_render: {startup['seconds']:.2f}s over the {limit:.2f}s budget")
+        extra = [name for name in startup["views"] if name != "views.overview"]
+        if extra:
+            problems.append(f"{size}/startup_first_render: imported other pages at start-up: {', '.join(extra)}")
+    return problems
+
+
+def bench_pages(csr_path: str, jspl_path: str, repeat: int, memory: bool, timeout: int) -> Dict[str, dict]:
+    """Benchmark a headless render of every page through Streamlit's AppTest"""
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["CSR_MIS_PATH"] = csr_path
+    os.environ["JSPL_INPUT_PATH"] = jspl_path
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+
+    results = {"page_first_run": measure(at.run, 1, False)}
+    if at.exception:
+        raise RuntimeError(f"App failed on first run: {at.exception[0].value}")
+
+    for page in PAGES:
+        def render(page=page):
+            at.sidebar.radio[0].set_value(page)
+            at.run()
+
+        results[f"page_{page}"] = measure(render, repeat, memory)
+        if at.exception:
+            raise RuntimeError(f"Page '{page}' raised: {at.exception[0].value}")
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float, min_seconds: float) -> List[str]:
+    """Return a description of every case that regressed against the baseline"""
+    regressions = []
+    for size, cases in results.items():
+        for case, current in cases.items():
+            previous = baseline.get(size, {}).get(case)
+            if not previous:
+                continue
+            base_s, cur_s = previous.get("seconds"), current.get("seconds")
+            if base_s is not None and cur_s is not None:
+                if cur_s > base_s * (1 + tolerance) and cur_s - base_s > min_seconds:
+                    regressions.append(f"{size}/{case}: {cur_s:.4f}s vs baseline {base_s:.4f}s")
+            base_mb, cur_mb = previous.get("peak_mb"), current.get("peak_mb")
+            if base_mb is not None and cur_mb is not None:
+                if cur_mb > base_mb * (1 + tolerance) and cur_mb - base_mb > 1:
+                    regressions.append(f"{size}/{case}: {cur_mb:.1f} MB vs baseline {base_mb:.1f} MB")
+    return regressions
+
+
+def print_table(results: Dict[str, dict], baseline: Dict[str, dict]):
+    """Print results side by side with the baseline"""
+    rows = []
+    for size, cases in results.items():
+        for case, current in cases.items():
+            previous = baseline.get(size, {}).get(case, {})
+            rows.append({
+                "size": size,
+                "case": case,
+                "seconds": current.get("seconds"),
+                "baseline_s": previous.get("seconds"),
+                "peak_mb": current.get("peak_mb"),
+                "baseline_mb": previous.get("peak_mb"),
+            })
+    if rows:
+        print(pd.DataFrame(rows).to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run CSR dashboard benchmarks")
+    parser.add_argument("--sizes", default="10k,100k,1M", help="Comma-separated dataset sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (median is reported)")
+    parser.add_argument("--data-dir", default="bench_data", help="Where synthetic workbooks are cached")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="Write results to the baseline file")
+    parser.add_argument("--output", default=None, help="Also write this run's results to a JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="Ignore slowdowns smaller than this")
+    parser.add_argument("--skip-pages", action="store_true", help="Skip headless page rendering")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--timeout", type=int, default=600, help="AppTest timeout per run in seconds")
+    parser.add_argument("--startup-budget", type=float, default=float(os.environ.get("CSR_STARTUP_BUDGET_S", 0) or 0),
+                        help="Fail if import + first Overview render takes longer (seconds, for every size; "
+                             "default: STARTUP_BUDGETS)")
+    args = parser.parse_args()
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    memory = not args.no_memory
+
+    baseline_doc = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline_doc = json.load(f)
+    baseline = baseline_doc.get("results", {})
+
+    results: Dict[str, dict] = {}
+    for size in sizes:
+        print(f"Benchmarking {size} rows ...")
+        csr_path, jspl_path = ensure_dataset(args.data_dir, size)
+        results[size] = bench_startup(csr_path, jspl_path, args.timeout)
+        results[size].update(bench_loader(csr_path, jspl_path, args.repeat, memory))
+        if not args.skip_pages:
+            results[size].update(bench_pages(csr_path, jspl_path, args.repeat, memory, args.timeout))
+
+    print()
+    print_table(results, baseline)
+
+    document = {
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+
+    if args.update_baseline:
+        merged = dict(baseline)
+        merged.update(results)
+        document["results"] = merged
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    regressions = check_startup(results, args.startup_budget)
+    regressions += compare(results, baseline, args.tolerance, args.min_seconds)
+    if regressions:
+        print("\n❌ Regressions against baseline:")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+    print("\n✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""
+Change Detection Module for CSR Dashboard
+Per-row hashes keyed on each sheet's record code, compared against the
+snapshot of the previous upload to list added, edited and removed rows
+
+Snapshots are kept in the cache directory (one compressed .npz per data
+version, the newest few retained), so the comparison survives restarts and
+only the hashes, never the rows, are stored.
+"""
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from data_loader import find_date_column
+from entity_resolution import CACHE_DIR
+
+SNAPSHOT_DIR = "snapshots"
+HISTORY_FILE = "history.json"
+KEEP_SNAPSHOTS = 5
+
+# Unique record identifiers, then codes that repeat per visit
+RECORD_ID_SUFFIXES = ("_pk_id", "record_id")
+CODE_COLUMNS = ["beneficiary_code", "beneriries_code", "beneficiaries_code"]
+# Share of distinct values a code column needs to count as an identifier
+MIN_CODE_DISTINCT = 0.5
+# Fields that identify a row when no code does (edits elsewhere show as "edited")
+IDENTITY_COLUMNS = ["name", "beneficiary_name", "fathers_name", "father_name", "gender", "village"]
+
+CHANGE_COLUMNS = ["sheet", "key", "change", "row", "columns"]
+
+_MIX = np.uint64(0x100000001B3)
+
+
+def _hash_values(values: pd.Series) -> np.ndarray:
+    try:
+        return pd.util.hash_pandas_object(values, index=False).to_numpy()
+    except TypeError:
+        # Mixed-type object columns hash by their text
+        return pd.util.hash_pandas_object(values.astype("string"), index=False).to_numpy()
+
+
+def _numbered(keys: pd.Series) -> pd.Series:
+    """Make repeated keys unique by their order of appearance"""
+    occurrence = keys.groupby(keys, sort=False).cumcount().astype("string")
+    return keys + "#" + occurrence
+
+
+def row_keys(df: pd.DataFrame) -> pd.Series:
+    """
+    Stable key per row: a unique record ID column when the sheet has one,
+    else a beneficiary code column that actually tells rows apart, else a
+    hash of the identifying fields (name, father, gender, village, activity
+    date), else the row position. Repeated keys are numbered in order.
+    """
+    for col in df.columns:
+        if str(col).lower().endswith(RECORD_ID_SUFFIXES):
+            values = df[col]
+            if values.notna().all() and values.is_unique:
+                return "id:" + values.astype("string")
+    lookup = {str(col).lower(): col for col in df.columns}
+    for name in CODE_COLUMNS:
+        codes = df[lookup[name]].astype("string").str.strip() if name in lookup else None
+        if codes is not None and codes.notna().any() and codes.nunique() >= MIN_CODE_DISTINCT * codes.notna().sum():
+            return _numbered("code:" + codes.fillna(""))
+    identity = [lookup[name] for name in IDENTITY_COLUMNS if name in lookup and df[lookup[name]].notna().any()]
+    date_col = find_date_column(df)
+    if date_col is not None:
+        identity.append(date_col)
+    if identity:
+        hashes = pd.util.hash_pandas_object(df[identity].astype("string"), index=False)
+        return _numbered("rec:" + hashes.map("{:016x}".format).astype("string"))
+    return "row:" + pd.Series(np.arange(len(df)), index=df.index).astype("string")
+
+
+def combine_hashes(column_hashes: np.ndarray) -> np.ndarray:
+    """One 64-bit hash per row from its column hashes"""
+    combined = np.zeros(len(column_hashes), dtype=np.uint64)
+    for i in range(column_hashes.shape[1]):
+        combined = combined * _MIX + column_hashes[:, i].astype(np.uint64)
+    return combined
+
+
+class SheetSnapshot:
+    """Row keys, row hashes and per-column hashes of one sheet"""
+
+    def __init__(self, keys: np.ndarray, row_hashes: np.ndarray, columns: List[str], column_hashes: np.ndarray):
+        self.keys = keys
+        self.row_hashes = row_hashes
+        self.columns = columns
+        self.column_hashes = column_hashes
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "SheetSnapshot":
+        columns = [str(col) for col in df.columns]
+        column_hashes = np.empty((len(df), len(columns)), dtype=np.uint32)
+        for i, col in enumerate(df.columns):
+            # 32 bits per cell are enough to tell which columns changed
+            column_hashes[:, i] = _hash_values(df[col]).astype(np.uint32)
+        return cls(row_keys(df).to_numpy(dtype=str), combine_hashes(column_hashes), columns, column_hashes)
+
+
+class ChangeSet:
+    """Rows added, edited and removed between two data versions"""
+
+    def __init__(self, version: str, base_version: Optional[str], base_time: Optional[float],
+                 changes: pd.DataFrame, schema: Dict[str, Dict[str, List[str]]], rows: Dict[str, int]):
+        self.version = version
+        self.base_version = base_version
+        self.base_time = base_time
+        self.changes = changes
+        self.schema = schema
+        self.rows = rows
+
+    @property
+    def has_baseline(self) -> bool:
+        return self.base_version is not None
+
+    @property
+    def is_empty(self) -> bool:
+        return self.changes.empty and not any(self.schema.values())
+
+    def summary(self) -> pd.DataFrame:
+        """Added / edited / removed / unchanged row counts per sheet"""
+        counts = self.changes.groupby(["sheet", "change"]).size().unstack(fill_value=0) \
+            if not self.changes.empty else pd.DataFrame()
+        summary = counts.reindex(index=list(self.rows), columns=["added", "edited", "removed"], fill_value=0)
+        summary["unchanged"] = pd.Series(self.rows) - summary["added"] - summary["edited"]
+        summary.index.name = "sheet"
+        summary.columns.name = None
+        return summary[(summary[["added", "edited", "removed"]].sum(axis=1) > 0)
+                       | summary.index.isin([s for s, cols in self.schema.items() if cols])].reset_index()
+
+    def for_sheet(self, sheet: str, change: Optional[str] = None) -> pd.DataFrame:
+        """Changed rows of one sheet, optionally of one kind"""
+        rows = self.changes[self.changes["sheet"] == sheet]
+        if change is not None:
+            rows = rows[rows["change"] == change]
+        return rows.drop(columns=["sheet"]).reset_index(drop=True)
+
+
+def diff_sheets(sheet: str, old: Optional[SheetSnapshot], new: Optional[SheetSnapshot]) -> pd.DataFrame:
+    """Changed rows between two snapshots of one sheet"""
+    if new is None and old is None:
+        return pd.DataFrame(columns=CHANGE_COLUMNS)
+    if old is None:
+        return pd.DataFrame({"sheet": sheet, "key": new.keys, "change": "added",
+                             "row": np.arange(len(new.keys)), "columns": ""})
+    if new is None:
+        return pd.DataFrame({"sheet": sheet, "key": old.keys, "change": "removed", "row": -1, "columns": ""})
+
+    old_pos = pd.Index(old.keys).get_indexer(new.keys)
+    matched = old_pos >= 0
+    removed = ~pd.Index(old.keys).isin(new.keys)
+
+    # Rows are compared on the columns both versions share; added or
+    # dropped columns are reported as schema changes, not as edits
+    old_columns = {col: i for i, col in enumerate(old.columns)}
+    shared = [(old_columns[col], j, col) for j, col in enumerate(new.columns) if col in old_columns]
+    if old.columns == new.columns:
+        old_hashes, new_hashes = old.row_hashes, new.row_hashes
+    else:
+        old_hashes = combine_hashes(old.column_hashes[:, [i for i, _, _ in shared]])
+        new_hashes = combine_hashes(new.column_hashes[:, [j for _, j, _ in shared]])
+    edited = matched.copy()
+    edited[matched] = old_hashes[old_pos[matched]] != new_hashes[matched]
+
+    # Which columns differ in each edited row
+    new_rows, old_rows = np.flatnonzero(edited), old_pos[edited]
+    labels = np.full(len(new_rows), "", dtype=object)
+    for i, j, col in shared:
+        differs = new.column_hashes[new_rows, j] != old.column_hashes[old_rows, i]
+        labels[differs] = labels[differs] + ", " + col
+    labels = np.array([label[2:] for label in labels], dtype=object)
+
+    added = np.flatnonzero(~matched)
+    return pd.concat([
+        pd.DataFrame({"sheet": sheet, "key": new.keys[added], "change": "added", "row": added, "columns": ""}),
+        pd.DataFrame({"sheet": sheet, "key": new.keys[new_rows], "change": "edited", "row": new_rows, "columns": labels}),
+        pd.DataFrame({"sheet": sheet, "key": old.keys[removed], "change": "removed", "row": -1, "columns": ""}),
+    ], ignore_index=True)
+
+
+def snapshot_dir(cache_dir: Optional[str] = None) -> str:
+    return os.path.join(cache_dir or CACHE_DIR, SNAPSHOT_DIR)
+
+
+def take_snapshot(data_loader) -> Dict[str, SheetSnapshot]:
+    """Hash every program sheet"""
+    snapshots = {}
+    for key in data_loader.get_all_keys():
+        if "master" in key.lower():
+            continue
+        df = data_loader.get_data(key)
+        if df is not None:
+            snapshots[key] = SheetSnapshot.from_frame(df)
+    return snapshots
+
+
+def save_snapshot(directory: str, version: str, snapshots: Dict[str, SheetSnapshot]):
+    """Write one version's hashes and record it in the history"""
+    try:
+        os.makedirs(directory, exist_ok=True)
+        arrays, sheets = {}, {}
+        for i, (key, snap) in enumerate(snapshots.items()):
+            sheets[key] = snap.columns
+            arrays[f"keys_{i}"] = snap.keys
+            arrays[f"rows_{i}"] = snap.row_hashes
+            arrays[f"cols_{i}"] = snap.column_hashes
+        arrays["sheets"] = np.array(json.dumps(sheets))
+        tmp_path = os.path.join(directory, f"{version}.{os.getpid()}.tmp.npz")
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, os.path.join(directory, f"{version}.npz"))
+
+        history = [entry for entry in load_history(directory) if entry["version"] != version]
+        history.append({"version": version, "created": time.time()})
+        for entry in history[:-KEEP_SNAPSHOTS]:
+            try:
+                os.remove(os.path.join(directory, f"{entry['version']}.npz"))
+            except OSError:
+                pass
+        tmp_history = os.path.join(directory, f"{HISTORY_FILE}.{os.getpid()}.tmp")
+        with open(tmp_history, "w", encoding="utf-8") as f:
+            json.dump(history[-KEEP_SNAPSHOTS:], f, indent=2)
+        os.replace(tmp_history, os.path.join(directory, HISTORY_FILE))
+    except OSError as e:
+        print(f"Warning: Could not save row snapshot {version}: {str(e)}")
+
+
+def load_history(directory: str) -> List[dict]:
+    """Snapshot versions, oldest first"""
+    try:
+        with open(os.path.join(directory, HISTORY_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def load_snapshot(directory: str, version: str) -> Optional[Dict[str, SheetSnapshot]]:
+    """Hashes saved for one version (None when missing or unreadable)"""
+    try:
+        with np.load(os.path.join(directory, f"{version}.npz")) as saved:
+            sheets = json.loads(str(saved["sheets"]))
+            return {
+                key: SheetSnapshot(saved[f"keys_{i}"], saved[f"rows_{i}"], columns, saved[f"cols_{i}"])
+                for i, (key, columns) in enumerate(sheets.items())
+            }
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Warning: Could not read row snapshot {version}: {str(e)}")
+        return None
+
+
+def build_changeset(data_loader, cache_dir: Optional[str] = None) -> ChangeSet:
+    """Compare the loaded data with the previous upload's snapshot"""
+    directory = snapshot_dir(cache_dir)
+    version = data_loader.data_version
+    current = take_snapshot(data_loader)
+
+    # The previous upload is the snapshot taken before this version's
+    history = load_history(directory)
+    versions = [entry["version"] for entry in history]
+    if version in versions:
+        previous = history[:versions.index(version)]
+    else:
+        previous = history
+        save_snapshot(directory, version, current)
+
+    base = load_snapshot(directory, previous[-1]["version"]) if previous else None
+    if base is None:
+        empty = pd.DataFrame(columns=CHANGE_COLUMNS)
+        return ChangeSet(version, None, None, empty, {}, {key: len(s.keys) for key, s in current.items()})
+
+    frames, schema = [], {}
+    for sheet in list(current) + [key for key in base if key not in current]:
+        old, new = base.get(sheet), current.get(sheet)
+        frames.append(diff_sheets(sheet, old, new))
+        if old is not None and new is not None:
+            schema[sheet] = {
+                "added_columns": [col for col in new.columns if col not in old.columns],
+                "removed_columns": [col for col in old.columns if col not in new.columns],
+            }
+            schema[sheet] = {kind: cols for kind, cols in schema[sheet].items() if cols}
+    changes = pd.concat(frames, ignore_index=True)
+    rows = {key: len(s.keys) for key, s in current.items()}
+    rows.update({key: 0 for key in base if key not in current})
+    return ChangeSet(version, previous[-1]["version"], previous[-1]["created"], changes, schema, rows)
+
+
+def get_changeset(data_loader) -> ChangeSet:
+    """Changes since the previous upload, for the loader's current data version"""
+    return data_loader.get_derived("changeset", build_changeset)
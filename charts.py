@@ -0,0 +1,182 @@
+"""
+Charts Module for CSR Dashboard
+Plotly figure builders; plotly is imported on first use so it stays off
+the start-up path of pages without charts
+"""
+from instrumentation import timed
+
+
+@timed("chart.donut")
+def create_donut_chart(labels, values, title, colors=None):
+    """Create a donut chart"""
+    import plotly.express as px
+    import plotly.graph_objects as go
+    
+    if colors is None:
+        colors = px.colors.qualitative.Set3
+    
+    fig = go.Figure(data=[go.Pie(
+        labels=labels,
+        values=values,
+        hole=0.5,
+        marker=dict(colors=colors),
+        textinfo='label+percent',
+        textposition='outside'
+    )])
+    
+    fig.update_layout(
+        title=title,
+        showlegend=True,
+        height=400,
+        margin=dict(l=20, r=20, t=40, b=20),
+        font=dict(size=12)
+    )
+    
+    return fig
+
+
+@timed("chart.bar")
+def create_bar_chart(df, x_col, y_col, title, color="#667eea"):
+    """Create a bar chart"""
+    import plotly.express as px
+    
+    fig = px.bar(
+        df,
+        x=x_col,
+        y=y_col,
+        title=title,
+        color_discrete_sequence=[color],
+        text=y_col
+    )
+    
+    fig.update_layout(
+        height=400,
+        margin=dict(l=20, r=20, t=40, b=20),
+        font=dict(size=12),
+        showlegend=False
+    )
+    
+    fig.update_traces(texttemplate='%{text}', textposition='outside')
+    
+    return fig
+
+
+@timed("chart.stacked_bar")
+def create_stacked_bar_chart(df, x_col, y_col, color_col, title, colors=None):
+    """Create a stacked bar chart"""
+    import plotly.express as px
+    
+    if colors is None:
+        colors = ["#ff6b6b", "#4ecdc4", "#45b7d1", "#f9ca24"]
+    
+    fig = px.bar(
+        df,
+        x=x_col,
+        y=y_col,
+        color=color_col,
+        title=title,
+        color_discrete_sequence=colors,
+        text=y_col
+    )
+    
+    fig.update_layout(
+        height=400,
+        margin=dict(l=20, r=20, t=40, b=20),
+        font=dict(size=12),
+        barmode='stack'
+    )
+    
+    return fig
+
+
+@timed("chart.waterfall")
+def create_waterfall_chart(categories, values, title):
+    """Create a waterfall chart"""
+    import plotly.graph_objects as go
+    
+    fig = go.Figure()
+    
+    # Calculate cumulative values
+    cumulative = [0]
+    for i, val in enumerate(values[:-1]):
+        cumulative.append(cumulative[-1] + val)
+    
+    # Add bars
+    for i, (cat, val, cum) in enumerate(zip(categories, values, cumulative)):
+        if i == len(categories) - 1:  # Total bar
+            fig.add_trace(go.Bar(
+                name=categories[i],
+                x=[categories[i]],
+                y=[values[i]],
+                marker_color='#95a5a6',
+                text=[f"{values[i]:.2f}"],
+                textposition='outside'
+            ))
+        else:
+            fig.add_trace(go.Bar(
+                name=categories[i],
+                x=[categories[i]],
+                y=[values[i]],
+                base=[cum],
+                marker_color='#10b981',
+                text=[f"{values[i]:.2f}"],
+                textposition='outside'
+            ))
+    
+    fig.update_layout(
+        title=title,
+        height=400,
+        margin=dict(l=20, r=20, t=40, b=20),
+        font=dict(size=12),
+        showlegend=False,
+        barmode='relative'
+    )
+    
+    return fig
+
+
+@timed("chart.sunburst")
+def create_sunburst_chart(labels, parents, values, title, ids=None):
+    """Create a sunburst/nested donut chart"""
+    import plotly.graph_objects as go
+    
+    fig = go.Figure(go.Sunburst(
+        ids=ids,
+        labels=labels,
+        parents=parents,
+        values=values,
+        branchvalues="total",
+        hovertemplate='<b>%{label}</b><br>Value: %{value}<extra></extra>',
+    ))
+    
+    fig.update_layout(
+        title=title,
+        height=500,
+        margin=dict(l=20, r=20, t=40, b=20),
+        font=dict(size=12)
+    )
+    
+    return fig
+
+
+@timed("chart.line")
+def create_line_chart(df, x_col, y_col, color_col, title):
+    """Create a line chart"""
+    import plotly.express as px
+    
+    fig = px.line(
+        df,
+        x=x_col,
+        y=y_col,
+        color=color_col,
+        title=title,
+        markers=True
+    )
+    
+    fig.update_layout(
+        height=400,
+        margin=dict(l=20, r=20, t=40, b=20),
+        font=dict(size=12)
+    )
+    
+    return fig
@@ -0,0 +1,237 @@
+"""
+Compaction Module for CSR Dashboard
+Appends pending Data Entry submissions (entry_store.py) to the JSPL input
+workbook in one streaming pass, swaps the file atomically and advances the
+watermark
+
+The workbook is copied row by row from a read-only reader into a write-only
+writer, with each sheet's new entries appended after its last row; the new
+file is then renamed over the old one, so the dashboard only ever sees the
+previous or the complete new workbook. The last entry id written is stored
+both in the entry store and in the workbook (custom property
+csr_entry_watermark), so a batch interrupted between the swap and the
+bookkeeping is recognised instead of appended twice. Cell styles, column
+widths and data validations are not carried over.
+
+Usage:
+    python compaction.py                     # write one batch
+    python compaction.py --every 900         # every 15 minutes
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.packaging.custom import IntProperty
+
+from entry_store import ENTRY_STORE, Entry, EntryStore
+from instrumentation import log_event, metrics, timer
+
+WATERMARK_PROPERTY = "csr_entry_watermark"
+# Written into the record id column of appended rows
+RECORD_ID_PREFIX = "DE-"
+
+
+def _normalise(name) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+
+def sheet_for_program(program: str, sheet_names: List[str]) -> Optional[str]:
+    """The workbook sheet holding ``program`` (e.g. 'HIV/AIDS' -> 'HIV_AIDS')"""
+    wanted = _normalise(program)
+    for sheet in sheet_names:
+        if _normalise(sheet) == wanted:
+            return sheet
+    # Longest sheet name that starts the program name ('Mobile Medical Van/ Emergency Care')
+    matches = [sheet for sheet in sheet_names if _normalise(sheet) and wanted.startswith(_normalise(sheet))]
+    return max(matches, key=len) if matches else None
+
+
+def new_sheet_name(program: str, sheet_names: List[str]) -> str:
+    """Valid, unused sheet name for a program the workbook has no sheet for"""
+    base = re.sub(r"[\[\]:*?/\\]+", "_", program).strip()[:31] or "Entries"
+    name, suffix = base, 1
+    while name in sheet_names:
+        suffix += 1
+        name = f"{base[:28]}_{suffix}"
+    return name
+
+
+def workbook_watermark(path: str) -> int:
+    """Last entry id recorded inside the workbook (0 when never compacted)"""
+    workbook = load_workbook(path, read_only=True)
+    try:
+        for prop in workbook.custom_doc_props.props:
+            if prop.name == WATERMARK_PROPERTY:
+                return int(prop.value)
+        return 0
+    finally:
+        workbook.close()
+
+
+def _cell_value(column: str, value):
+    # Dates travel through the entry store as ISO strings
+    if isinstance(value, str) and "date" in column.lower():
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+def entry_row(entry: Entry, header: List, sheet: str) -> List:
+    """
+    Values of one entry in the order of a sheet's header row. An empty
+    record id or vertical name is filled in from the entry id and sheet.
+    """
+    record = {_normalise(key): (key, value) for key, value in entry.record.items()}
+    defaults = {"recordid": f"{RECORD_ID_PREFIX}{entry.id}", "verticalname": sheet}
+    row = []
+    for column in header:
+        key, value = record.get(_normalise(column), (str(column), None))
+        if value in (None, ""):
+            value = defaults.get(_normalise(column), value)
+        row.append(_cell_value(key, value))
+    return row
+
+
+def _write_batch(source_path: str, target_path: str, entries: List[Entry], watermark: int) -> Dict[str, int]:
+    """Stream ``source_path`` into ``target_path`` with ``entries`` appended"""
+    source = load_workbook(source_path, read_only=True)
+    target = Workbook(write_only=True)
+    sheet_names = list(source.sheetnames)
+    per_sheet: Dict[str, List[Entry]] = {}
+    for entry in entries:
+        sheet = sheet_for_program(entry.program, sheet_names)
+        if sheet is None:
+            sheet = new_sheet_name(entry.program, sheet_names + list(per_sheet))
+        per_sheet.setdefault(sheet, []).append(entry)
+
+    try:
+        for name in sheet_names:
+            reader, writer = source[name], target.create_sheet(name)
+            header, blank_rows = None, 0
+            for row in reader.iter_rows(values_only=True):
+                if all(value is None for value in row):
+                    # Trailing blank rows are dropped so entries follow the data
+                    blank_rows += 1
+                    continue
+                for _ in range(blank_rows):
+                    writer.append([])
+                blank_rows = 0
+                header = header or list(row)
+                writer.append(row)
+            for entry in per_sheet.get(name, []):
+                if header is None:
+                    header = list(entry.record)
+                    writer.append(header)
+                writer.append(entry_row(entry, header, name))
+
+        for name in [name for name in per_sheet if name not in sheet_names]:
+            writer = target.create_sheet(name)
+            header = list(per_sheet[name][0].record)
+            writer.append(header)
+            for entry in per_sheet[name]:
+                writer.append(entry_row(entry, header, name))
+
+        target.custom_doc_props.append(IntProperty(name=WATERMARK_PROPERTY, value=watermark))
+        target.save(target_path)
+    finally:
+        source.close()
+    return {name: len(batch) for name, batch in per_sheet.items()}
+
+
+def _replace_atomically(tmp_path: str, path: str):
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    if hasattr(os, "O_DIRECTORY"):
+        # Persist the rename itself
+        directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+def compact(store: EntryStore, workbook_path: str) -> Optional[dict]:
+    """
+    Append every pending entry to ``workbook_path`` in one pass. Returns a
+    summary of the batch, or None when there was nothing to write.
+    """
+    start = time.perf_counter()
+    watermark = store.watermark()
+    written = workbook_watermark(workbook_path)
+    if written > watermark:
+        # The last run swapped the workbook but stopped before recording it
+        pending = [entry for entry in store.pending(watermark) if entry.id <= written]
+        if pending:
+            store.record_batch(workbook_path, pending[0].id, written, len(pending), 0.0)
+        log_event("compaction.recovered", workbook=workbook_path, watermark=written)
+        watermark = written
+
+    entries = store.pending(watermark)
+    if not entries:
+        return None
+
+    last_id = entries[-1].id
+    tmp_path = os.path.join(
+        os.path.dirname(os.path.abspath(workbook_path)),
+        f".{os.path.basename(workbook_path)}.{os.getpid()}.tmp",
+    )
+    try:
+        with timer("compaction.batch", entries=len(entries)):
+            sheets = _write_batch(workbook_path, tmp_path, entries, last_id)
+            _replace_atomically(tmp_path, workbook_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    seconds = time.perf_counter() - start
+    store.record_batch(workbook_path, entries[0].id, last_id, len(entries), seconds)
+    metrics.increment("compaction.entries", len(entries))
+    log_event("compaction.batch", workbook=workbook_path, entries=len(entries), watermark=last_id, seconds=seconds)
+    return {"entries": len(entries), "sheets": sheets, "watermark": last_id, "seconds": seconds}
+
+
+def run_once(store: EntryStore, workbook_path: str) -> Optional[dict]:
+    """One compaction that reports instead of raising (for schedulers)"""
+    try:
+        summary = compact(store, workbook_path)
+    except PermissionError as e:
+        # Typically the workbook is open in Excel on Windows; entries stay pending
+        print(f"Warning: Could not replace {workbook_path}, retrying next run: {str(e)}")
+        return None
+    except Exception as e:
+        print(f"Warning: Compaction failed: {str(e)}")
+        return None
+    if summary is None:
+        print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] No pending entries")
+    else:
+        sheets = ", ".join(f"{name}: {count}" for name, count in summary["sheets"].items())
+        print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Wrote {summary['entries']} entries ({sheets}) "
+              f"in {summary['seconds']:.2f}s, watermark {summary['watermark']}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append pending data entries to the JSPL input workbook")
+    parser.add_argument("--workbook", default=os.environ.get("JSPL_INPUT_PATH", "JSPL CSR Data Input.xlsx"))
+    parser.add_argument("--store", default=ENTRY_STORE, help="Entry store (SQLite file)")
+    parser.add_argument("--every", type=float, default=0, help="Repeat every N seconds")
+    args = parser.parse_args()
+
+    store = EntryStore(args.store)
+    while True:
+        run_once(store, args.workbook)
+        if not args.every:
+            return 0
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Components Module for CSR Dashboard
+Shared Streamlit widgets (KPI cards, progress bars) used by the page views
+"""
+import streamlit as st
+
+
+def render_kpi_card(title, value, subtitle="", color="#667eea"):
+    """Render a KPI card"""
+    st.markdown(f"""
+    <div class="kpi-card" style="border-left-color: {color};">
+        <div class="kpi-label">{title}</div>
+        <div class="kpi-value">{value}</div>
+        {f'<div style="color: #666; font-size: 0.9rem;">{subtitle}</div>' if subtitle else ''}
+    </div>
+    """, unsafe_allow_html=True)
+
+
+def beneficiary_subtitle(sketch):
+    """Card subtitle stating whether a distinct count is exact or estimated"""
+    if sketch.is_exact:
+        return "Distinct individuals"
+    return f"Distinct individuals (±{sketch.relative_error:.1%} estimate)"
+
+
+def render_progress_bar(current, target, label):
+    """Render a progress bar with status"""
+    if target == 0:
+        percentage = 0
+    else:
+        percentage = min((current / target) * 100, 100)
+    
+    # Determine status
+    if percentage >= 90:
+        status = "On track"
+        status_class = "status-on-track"
+        bar_color = "#10b981"
+    elif percentage >= 50:
+        status = "On track"
+        status_class = "status-on-track"
+        bar_color = "#10b981"
+    else:
+        status = "At risk"
+        status_class = "status-at-risk"
+        bar_color = "#f59e0b"
+    
+    st.markdown(f"""
+    <div style="margin: 1rem 0;">
+        <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 0.5rem;">
+            <span style="font-weight: 600;">{label}</span>
+            <span class="{status_class}">{status}</span>
+        </div>
+        <div style="background: #f0f0f0; border-radius: 10px; height: 30px; position: relative; overflow: hidden;">
+            <div style="background: {bar_color}; height: 100%; width: {percentage}%; transition: width 0.3s ease; display: flex; align-items: center; justify-content: flex-end; padding-right: 10px;">
+                <span style="color: white; font-weight: 600; font-size: 0.85rem;">{current}/{target}</span>
+            </div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
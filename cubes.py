@@ -0,0 +1,288 @@
+"""
+Time-Series Cubes for CSR Dashboard
+Daily, weekly and monthly row counts and measure sums per program, state and
+gender, built once per data version so trend charts and date-range filters
+never scan the raw registers. Also holds the State → District → Block →
+Village roll-up used by the location sunburst.
+"""
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from data_loader import find_date_column
+from master_data import (
+    LEVELS, UNSPECIFIED, fill_unspecified, location_columns, location_frame,
+    master_id_map, normalise_gender,
+)
+
+GRAINS = {"Daily": "D", "Weekly": "W", "Monthly": "M"}
+DIMENSIONS = ["program", "state", "gender"]
+
+
+def _measure_columns(df: pd.DataFrame) -> List[str]:
+    """Numeric columns worth summing: totals and beneficiary counts"""
+    measures = []
+    for col in df.columns:
+        name = str(col).lower()
+        if ("total" in name or "beneficiar" in name or "screened" in name) and not name.endswith("_id"):
+            if pd.api.types.is_numeric_dtype(df[col]):
+                measures.append(col)
+    return measures
+
+
+def activity_dates(df: pd.DataFrame) -> Optional[pd.Series]:
+    """The sheet's date column as datetime64, parsing text dates once"""
+    date_col = find_date_column(df)
+    if date_col is not None:
+        return df[date_col]
+    for col in df.columns:
+        name = str(col).lower()
+        if "date" in name and "birth" not in name:
+            parsed = pd.to_datetime(df[col], errors="coerce")
+            if parsed.notna().any():
+                return parsed
+    return None
+
+
+def program_label(key: str) -> str:
+    """Display name for a data key"""
+    for prefix in ("CSR_MIS_", "JSPL_"):
+        if key.startswith(prefix):
+            return key[len(prefix):].replace("_", " ")
+    return key
+
+
+class TimeCubes:
+    """Pre-aggregated counts and sums at daily, weekly and monthly grain"""
+
+    def __init__(self, daily: pd.DataFrame, measures: List[str]):
+        self.measures = measures
+        self.cubes: Dict[str, pd.DataFrame] = {"D": daily}
+        for freq in ("W", "M"):
+            rolled = daily.assign(period=daily["period"].dt.to_period(freq).dt.start_time)
+            self.cubes[freq] = (
+                rolled.groupby(["period"] + DIMENSIONS, observed=True, sort=True)[["count"] + measures]
+                .sum()
+                .reset_index()
+            )
+
+    @property
+    def programs(self) -> List[str]:
+        """Data keys present in the cubes"""
+        return sorted(self.cubes["D"]["program"].unique().tolist())
+
+    def query(self, grain: str = "M", programs: Optional[List[str]] = None, start: Optional[date] = None,
+              end: Optional[date] = None, by: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Counts and sums per period (and optional ``by`` dimensions) for the
+        given program keys and date range.
+        """
+        freq = GRAINS.get(grain, grain)
+        # Weeks and months cut by the range are rolled up from the days inside it
+        clipped = freq != "D" and (start is not None or end is not None)
+        cube = self.cubes["D" if clipped else freq]
+        mask = pd.Series(True, index=cube.index)
+        if programs is not None:
+            mask &= cube["program"].isin(programs)
+        if start is not None:
+            mask &= cube["period"] >= pd.Timestamp(start)
+        if end is not None:
+            mask &= cube["period"] <= pd.Timestamp(end)
+        cube = cube[mask]
+        if clipped:
+            cube = cube.assign(period=cube["period"].dt.to_period(freq).dt.start_time)
+        keys = ["period"] + list(by or [])
+        return (
+            cube
+            .groupby(keys, observed=True, sort=True)[["count"] + self.measures]
+            .sum()
+            .reset_index()
+        )
+
+    def totals(self, programs: Optional[List[str]] = None, start: Optional[date] = None,
+               end: Optional[date] = None) -> pd.DataFrame:
+        """Row counts and sums per program over a date range (from the daily cube)"""
+        result = self.query("D", programs, start, end, by=["program"])
+        return result.groupby("program", observed=True)[["count"] + self.measures].sum()
+
+
+def build_time_cubes(data_loader) -> TimeCubes:
+    """Aggregate every dated program sheet into the daily cube"""
+    state_ids = master_id_map(data_loader.get_data("CSR_MIS_State Master"))
+    frames = []
+    measures: List[str] = []
+
+    for key in data_loader.get_all_keys():
+        if "master" in key.lower():
+            continue
+        df = data_loader.get_data(key)
+        if df is None or df.empty:
+            continue
+        dates = activity_dates(df)
+        if dates is None or dates.notna().sum() == 0:
+            continue
+
+        sheet_measures = _measure_columns(df)
+        places = location_frame(df, state_ids)
+        gender_cols = [col for col in df.columns if "gender" in str(col).lower()]
+        facts = pd.DataFrame({
+            "period": dates.dt.normalize(),
+            "program": key,
+            "state": places["State"] if places is not None else pd.NA,
+            "gender": normalise_gender(df[gender_cols[0]]) if gender_cols else pd.NA,
+            "count": 1,
+        })
+        for col in sheet_measures:
+            facts[col] = df[col].fillna(0)
+            if col not in measures:
+                measures.append(col)
+        facts = facts.dropna(subset=["period"])
+        facts[["state", "gender"]] = facts[["state", "gender"]].fillna("Unknown")
+        frames.append(
+            facts.groupby(["period"] + DIMENSIONS, sort=False)[["count"] + sheet_measures].sum().reset_index()
+        )
+
+    if frames:
+        daily = pd.concat(frames, ignore_index=True)
+        for col in measures:
+            daily[col] = daily[col].fillna(0)
+    else:
+        daily = pd.DataFrame({"period": pd.Series(dtype="datetime64[ns]"), "program": [], "state": [],
+                              "gender": [], "count": pd.Series(dtype="int64")})
+    for col in DIMENSIONS:
+        daily[col] = daily[col].astype("category")
+    return TimeCubes(daily, measures)
+
+
+def get_time_cubes(data_loader) -> TimeCubes:
+    """Time cubes for the loader's current data version"""
+    return data_loader.get_derived("time_cubes", build_time_cubes)
+
+
+# Per-sheet geographic roll-ups keyed by sheet, reused while the sheet's
+# location columns are unchanged
+_SHEET_ROLLUPS: Dict[str, Tuple[int, pd.DataFrame]] = {}
+
+
+def _location_fingerprint(df: pd.DataFrame, state_ids: Dict[int, str]) -> Optional[int]:
+    """Hash of the columns a sheet's roll-up depends on"""
+    columns = [col for col in location_columns(df).values() if col is not None]
+    if not columns:
+        return None
+    hashed = pd.util.hash_pandas_object(df[columns].astype("string"), index=False)
+    return hash((tuple(columns), int(hashed.sum()), len(df), tuple(sorted(state_ids.items()))))
+
+
+def _sheet_rollup(df: pd.DataFrame, state_ids: Dict[int, str]) -> Optional[pd.DataFrame]:
+    """Record counts per full location path for one sheet"""
+    places = location_frame(df, state_ids)
+    if places is None:
+        return None
+    places = fill_unspecified(places)
+    has_place = places[LEVELS[1:]].notna().any(axis=1)
+    places.loc[has_place & places["State"].isna(), "State"] = UNSPECIFIED
+    places = places.dropna(subset=["State"])
+    return places.groupby(LEVELS, dropna=False, sort=False).size().rename("count").reset_index()
+
+
+class GeoCube:
+    """
+    Record counts at every level of the location hierarchy. Only the leaf
+    paths are stored; each level is aggregated the first time it is asked for.
+    """
+
+    def __init__(self, leaves: pd.DataFrame):
+        self.leaves = leaves
+        self._levels: Dict[int, pd.Series] = {}
+
+    def _level(self, depth: int) -> pd.Series:
+        """Counts per path of length ``depth + 1``, indexed by that path"""
+        if depth not in self._levels:
+            columns = LEVELS[:depth + 1]
+            level = self.leaves.dropna(subset=[columns[-1]])
+            self._levels[depth] = level.groupby(columns, sort=True)["count"].sum()
+        return self._levels[depth]
+
+    def total(self) -> int:
+        """Records with any known location"""
+        return int(self.leaves["count"].sum())
+
+    def children(self, *path: str) -> pd.Series:
+        """Counts of the places directly below ``path`` (no path gives the states)"""
+        depth = len(path)
+        if depth >= len(LEVELS):
+            return pd.Series(dtype="int64")
+        level = self._level(depth)
+        if not path:
+            return level
+        try:
+            return level.loc[tuple(path)] if depth > 1 else level.loc[path[0]]
+        except KeyError:
+            return pd.Series(dtype="int64")
+
+    def node_count(self, *path: str) -> int:
+        """Records at or below ``path``"""
+        if not path:
+            return self.total()
+        counts = self.children(*path[:-1])
+        return int(counts.get(path[-1], 0))
+
+    def sunburst(self, *path: str, depth: int = 2) -> pd.DataFrame:
+        """
+        ids/labels/parents/values for a sunburst rooted at ``path`` showing
+        ``depth`` levels below it.
+        """
+        root_id = "/".join(path) or "All"
+        rows = [{"id": root_id, "label": path[-1] if path else "All Locations", "parent": "",
+                 "value": self.node_count(*path)}]
+        frontier = [(tuple(path), root_id)]
+        for _ in range(depth):
+            next_frontier = []
+            for node, node_id in frontier:
+                for name, value in self.children(*node).items():
+                    child_id = f"{node_id}/{name}"
+                    rows.append({"id": child_id, "label": name, "parent": node_id, "value": int(value)})
+                    next_frontier.append((node + (name,), child_id))
+            frontier = next_frontier
+        return pd.DataFrame(rows)
+
+
+def build_geo_cube(data_loader) -> GeoCube:
+    """Roll every program sheet up the location hierarchy"""
+    state_ids = master_id_map(data_loader.get_data("CSR_MIS_State Master"))
+    frames = []
+    for key in data_loader.get_all_keys():
+        if "master" in key.lower():
+            continue
+        df = data_loader.get_data(key)
+        if df is None or df.empty:
+            continue
+        fingerprint = _location_fingerprint(df, state_ids)
+        if fingerprint is None:
+            continue
+        cached = _SHEET_ROLLUPS.get(key)
+        if cached is not None and cached[0] == fingerprint:
+            rollup = cached[1]
+        else:
+            rollup = _sheet_rollup(df, state_ids)
+            _SHEET_ROLLUPS[key] = (fingerprint, rollup)
+        if rollup is not None and not rollup.empty:
+            frames.append(rollup)
+
+    if frames:
+        leaves = (
+            pd.concat(frames, ignore_index=True)
+            .groupby(LEVELS, dropna=False, sort=False)["count"]
+            .sum()
+            .reset_index()
+        )
+    else:
+        leaves = pd.DataFrame({level: pd.Series(dtype="string") for level in LEVELS}).assign(
+            count=pd.Series(dtype="int64"))
+    return GeoCube(leaves)
+
+
+def get_geo_cube(data_loader) -> GeoCube:
+    """Location roll-up for the loader's current data version"""
+    return data_loader.get_derived("geo_cube", build_geo_cube)
@@ -3,66 +3,484 @@ Data Loader Module for CSR Dashboard
 Loads and processes data from Excel files
 """
 import pandas as pd
+import hashlib
 import os
-from typing import Dict, List, Optional
+import threading
+import time
+from datetime import date
+from typing import Any, Callable, Dict, List, Mapping, MutableMapping, Optional, Tuple, Union
+
+from instrumentation import dataframe_memory, log_event, metrics, timer
+from partitions import Partition, discover_partitions, prune
+from sheet_store import SheetStore, budget_from_env
+
+# Rows searched for a header embedded below the first sheet row
+HEADER_SEARCH_ROWS = 5
+
+# Row filter: {column: value or list of values} or a function returning a mask
+Predicate = Union[Mapping[str, Any], Callable[[pd.DataFrame], pd.Series]]
+
+def _is_unnamed(column) -> bool:
+    return str(column).startswith("Unnamed:")
+
+def _promote_header_row(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Use an embedded header row when the sheet's first row is blank.
+
+    Several CSR MIS sheets leave row 1 empty, keep the real (machine) column
+    names in row 2 and follow them with a human-readable label row. Those
+    sheets load with "Unnamed: n" columns; this moves the embedded header into
+    place and drops the label row.
+    """
+    if df.empty or sum(_is_unnamed(col) for col in df.columns) * 2 <= len(df.columns):
+        return df
+    
+    header_pos = None
+    for pos in range(min(HEADER_SEARCH_ROWS, len(df))):
+        values = df.iloc[pos].dropna()
+        if len(values) and all(isinstance(value, str) for value in values):
+            header_pos = pos
+            break
+    if header_pos is None:
+        return df
+    
+    header = df.iloc[header_pos]
+    columns, seen = [], set()
+    for original, value in zip(df.columns, header):
+        name = value.strip() if isinstance(value, str) and value.strip() else str(original)
+        base, suffix = name, 1
+        while name in seen:
+            name = f"{base}.{suffix}"
+            suffix += 1
+        seen.add(name)
+        columns.append(name)
+    
+    body = df.iloc[header_pos + 1:]
+    if len(body) and _is_label_row(body.iloc[0], columns):
+        body = body.iloc[1:]
+    body = body.reset_index(drop=True)
+    body.columns = columns
+    return body.infer_objects()
+
+def _is_label_row(row: pd.Series, columns: List[str]) -> bool:
+    """True when a row just repeats the column names in human-readable form"""
+    matches = 0
+    for column, value in zip(columns, row):
+        if isinstance(value, str):
+            label = value.strip().lower().replace(" ", "_")
+            if label and label == column.lower():
+                matches += 1
+    return matches >= 2
+
+def find_date_column(df: pd.DataFrame) -> Optional[str]:
+    """The sheet's activity date column: a datetime column, preferring names containing 'date'"""
+    datetime_cols = [col for col in df.columns if pd.api.types.is_datetime64_any_dtype(df[col])]
+    for col in datetime_cols:
+        if "date" in str(col).lower() and "birth" not in str(col).lower():
+            return col
+    return datetime_cols[0] if datetime_cols else None
+
+def filter_by_date(df: pd.DataFrame, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+    """Rows whose date column falls within [start, end]; unchanged when no date column exists"""
+    date_col = find_date_column(df)
+    if date_col is None or (start is None and end is None):
+        return df
+    dates = df[date_col]
+    mask = dates.notna()
+    if start is not None:
+        mask &= dates >= pd.Timestamp(start)
+    if end is not None:
+        mask &= dates < pd.Timestamp(end) + pd.Timedelta(days=1)
+    return df[mask]
+
+def apply_predicate(df: pd.DataFrame, predicate: Optional[Predicate]) -> pd.DataFrame:
+    """Rows of ``df`` matching a row predicate"""
+    if predicate is None:
+        return df
+    if callable(predicate):
+        return df[predicate(df)]
+    mask = pd.Series(True, index=df.index)
+    for column, value in predicate.items():
+        if column not in df.columns:
+            return df.iloc[0:0]
+        if isinstance(value, (list, tuple, set, frozenset)):
+            mask &= df[column].isin(list(value))
+        else:
+            mask &= df[column] == value
+    return df[mask]
+
+class LoadProgress:
+    """Per-sheet progress of a load, safe to read while a background load runs"""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.error: Optional[str] = None
+        self.total = 0
+        self.current: Optional[str] = None
+        # {"sheet", "rows", "seconds"} per parsed sheet, in load order
+        self.sheets: List[Dict[str, Any]] = []
+        self.ready: set = set()
+        self._changed = threading.Condition()
+    
+    @property
+    def done(self) -> bool:
+        return self.finished is not None
+    
+    def expect(self, sheet_count: int):
+        """Add sheets of a newly opened workbook to the total"""
+        with self._changed:
+            self.total += sheet_count
+    
+    def sheet_started(self, sheet: str):
+        with self._changed:
+            self.current = sheet
+            self._changed.notify_all()
+    
+    def sheet_done(self, sheet: str, rows: int = 0, seconds: float = 0.0):
+        with self._changed:
+            self.sheets.append({"sheet": sheet, "rows": rows, "seconds": seconds})
+            self.current = None
+            self._changed.notify_all()
+    
+    def mark_ready(self, *keys: str):
+        """Keys that can now be read from the loader"""
+        with self._changed:
+            self.ready.update(keys)
+            self._changed.notify_all()
+    
+    def finish(self, error: Optional[str] = None):
+        with self._changed:
+            self.error = error
+            self.current = None
+            self.finished = time.perf_counter()
+            self._changed.notify_all()
+    
+    def is_ready(self, keys: Optional[List[str]] = None) -> bool:
+        """True when ``keys`` (every sheet when None) can be read"""
+        return self.done or (keys is not None and all(key in self.ready for key in keys))
+    
+    def wait(self, keys: Optional[List[str]] = None, timeout: Optional[float] = None) -> bool:
+        """Block until is_ready(keys) or ``timeout`` seconds pass"""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.is_ready(keys), timeout)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Consistent copy of the progress for display"""
+        with self._changed:
+            processed = len(self.sheets)
+            end = self.finished if self.finished is not None else time.perf_counter()
+            return {
+                "total": self.total,
+                "processed": processed,
+                "fraction": 1.0 if self.done else min(processed / self.total, 1.0) if self.total else 0.0,
+                "current": self.current,
+                "elapsed": end - self.started,
+                "sheets": list(self.sheets),
+                "done": self.done,
+                "error": self.error,
+            }
 
 class DataLoader:
-    def __init__(self, csr_mis_path: str, jspl_input_path: str):
+    def __init__(self, csr_mis_path: str, jspl_input_path: str,
+                 period: Optional[Tuple[Optional[date], Optional[date]]] = None,
+                 memory_budget: Optional[int] = None, background: bool = False):
+        """
+        ``csr_mis_path`` is either a single workbook or a directory of
+        period-partitioned workbooks (see partitions.py). With a directory,
+        ``period`` limits the partitions loaded up front; other periods are
+        read on demand by get_period_data().
+        
+        ``memory_budget`` (bytes, default CSR_MEMORY_BUDGET_MB) caps the
+        sheets kept in memory; least recently used sheets are spilled and
+        reloaded on access (see sheet_store.py).
+        
+        With ``background`` the workbooks are read in a separate thread and
+        the constructor returns at once; each sheet becomes readable as soon
+        as it is parsed (see ``progress`` and ``loading``).
+        """
         self.csr_mis_path = csr_mis_path
         self.jspl_input_path = jspl_input_path
-        self.data: Dict[str, pd.DataFrame] = {}
-        self.load_all_data()
+        self.period = period
+        self.data: SheetStore = SheetStore(memory_budget if memory_budget is not None else budget_from_env())
+        self.data_version = ""
+        self.partitions: List[Partition] = []
+        self.loaded_partitions: List[Partition] = []
+        # key -> {partition path: (first row, end row)} within self.data[key]
+        self.partition_index: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self._partition_frames: Dict[str, Dict[str, pd.DataFrame]] = {}
+        self._derived: Dict[Tuple[str, str], Any] = {}
+        self._derived_lock = threading.Lock()
+        self._building: Dict[str, threading.Lock] = {}
+        self.progress = LoadProgress()
+        if background:
+            threading.Thread(target=self._load_in_background, name="csr-data-loader", daemon=True).start()
+        else:
+            self.load_all_data()
+    
+    @property
+    def loading(self) -> bool:
+        """True while a background load is still reading sheets"""
+        return not self.progress.done
+    
+    def _load_in_background(self):
+        try:
+            self.load_all_data()
+        except Exception as e:
+            print(f"Warning: Background load failed: {str(e)}")
     
     def load_all_data(self):
         """Load all sheets from both Excel files"""
         try:
-            # Load CSR MIS.xlsx
-            if not os.path.exists(self.csr_mis_path):
-                raise FileNotFoundError(f"CSR MIS file not found: {self.csr_mis_path}")
-            
-            csr_mis = pd.ExcelFile(self.csr_mis_path)
-            for sheet_name in csr_mis.sheet_names:
-                try:
-                    df = pd.read_excel(self.csr_mis_path, sheet_name=sheet_name)
-                    # Skip empty sheets
-                    if df.empty:
-                        continue
-                    # Clean column names
-                    df.columns = df.columns.str.strip()
-                    self.data[f"CSR_MIS_{sheet_name}"] = df
-                except Exception as e:
-                    print(f"Warning: Error loading sheet '{sheet_name}' from CSR MIS: {e}")
-            
-            # Load JSPL CSR Data Input.xlsx
-            if not os.path.exists(self.jspl_input_path):
-                raise FileNotFoundError(f"JSPL Input file not found: {self.jspl_input_path}")
-            
-            jspl_input = pd.ExcelFile(self.jspl_input_path)
-            for sheet_name in jspl_input.sheet_names:
-                try:
-                    df = pd.read_excel(self.jspl_input_path, sheet_name=sheet_name)
-                    # Skip empty sheets
-                    if df.empty:
-                        continue
-                    # Clean column names
-                    df.columns = df.columns.str.strip()
-                    self.data[f"JSPL_{sheet_name}"] = df
-                except Exception as e:
-                    print(f"Warning: Error loading sheet '{sheet_name}' from JSPL Input: {e}")
+            with timer("loader.load_all_data"):
+                if not os.path.exists(self.csr_mis_path):
+                    raise FileNotFoundError(f"CSR MIS file not found: {self.csr_mis_path}")
+                if not os.path.exists(self.jspl_input_path):
+                    raise FileNotFoundError(f"JSPL Input file not found: {self.jspl_input_path}")
+                # Open both workbooks first so progress knows the sheet total
+                jspl_workbook = self._open_workbook(self.jspl_input_path)
+                
+                # Load CSR MIS.xlsx (or a directory of period partitions)
+                if os.path.isdir(self.csr_mis_path):
+                    self._load_partitions()
+                else:
+                    csr_workbook = self._open_workbook(self.csr_mis_path)
+                    self._load_workbook(csr_workbook, "CSR_MIS_", "CSR MIS", into=self.data)
+                
+                # Load JSPL CSR Data Input.xlsx
+                self._load_workbook(jspl_workbook, "JSPL_", "JSPL Input", into=self.data)
+                
+                self.data_version = self.compute_data_version()
         
         except Exception as e:
+            self.progress.finish(str(e))
             raise Exception(f"Error loading Excel files: {e}")
+        self.progress.finish()
+    
+    def _open_workbook(self, path: str) -> pd.ExcelFile:
+        workbook = pd.ExcelFile(path)
+        self.progress.expect(len(workbook.sheet_names))
+        return workbook
+    
+    def _load_workbook(self, workbook: Union[str, pd.ExcelFile], prefix: str, label: str, partition: str = "",
+                       into: Optional[MutableMapping[str, pd.DataFrame]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Load every non-empty sheet of one workbook under the given key prefix.
+        With ``into`` each sheet is stored there as soon as it is parsed.
+        """
+        frames = {}
+        if not isinstance(workbook, pd.ExcelFile):
+            workbook = self._open_workbook(workbook)
+        for sheet_name in workbook.sheet_names:
+            key = f"{prefix}{sheet_name}"
+            name = f"{key} [{partition}]" if partition else key
+            start = time.perf_counter()
+            rows = 0
+            self.progress.sheet_started(name)
+            try:
+                df = workbook.parse(sheet_name)
+                # Clean column names
+                df = _promote_header_row(df)
+                df.columns = df.columns.astype(str).str.strip()
+                # Skip empty sheets
+                if df.empty:
+                    metrics.increment("loader.empty_sheets")
+                    continue
+                frames[key] = df
+                rows = len(df)
+                if into is not None:
+                    into[key] = df
+                metrics.record_sheet(
+                    name,
+                    time.perf_counter() - start,
+                    len(df),
+                    len(df.columns),
+                    dataframe_memory(df),
+                )
+            except Exception as e:
+                metrics.increment("loader.sheet_errors")
+                log_event("sheet_load_error", sheet=key, error=str(e))
+                print(f"Warning: Error loading sheet '{sheet_name}' from {label}: {e}")
+            finally:
+                self.progress.sheet_done(name, rows, time.perf_counter() - start)
+                if into is not None:
+                    self.progress.mark_ready(key)
+        return frames
+    
+    def _load_partitions(self):
+        """Load the partitions overlapping self.period into one dataset per sheet"""
+        self.partitions = discover_partitions(self.csr_mis_path)
+        if not self.partitions:
+            raise FileNotFoundError(f"No dated CSR MIS workbooks found in: {self.csr_mis_path}")
+        start, end = self.period or (None, None)
+        self.loaded_partitions = prune(self.partitions, start, end)
+        
+        per_key: Dict[str, List[Tuple[Partition, pd.DataFrame]]] = {}
+        for partition in self.loaded_partitions:
+            frames = self._load_workbook(partition.path, "CSR_MIS_", f"CSR MIS {partition.label}", partition.label)
+            metrics.increment("loader.partitions_read")
+            for key, df in frames.items():
+                per_key.setdefault(key, []).append((partition, df))
+        
+        for key, parts in per_key.items():
+            # Master sheets repeat in every partition; keep the latest copy
+            if "master" in key.lower():
+                self.data[key] = parts[-1][1]
+                continue
+            ranges, row = {}, 0
+            for partition, df in parts:
+                ranges[partition.path] = (row, row + len(df))
+                row += len(df)
+            self.partition_index[key] = ranges
+            self.data[key] = pd.concat([df for _, df in parts], ignore_index=True) if len(parts) > 1 else parts[0][1]
+        self.progress.mark_ready(*per_key)
+    
+    def _partition_frame(self, partition: Partition, key: str) -> Optional[pd.DataFrame]:
+        """One sheet of one partition, reading the workbook only if it is not loaded yet"""
+        rows = self.partition_index.get(key, {}).get(partition.path)
+        if rows is not None:
+            return self.data[key].iloc[rows[0]:rows[1]]
+        if partition in self.loaded_partitions:
+            return None
+        
+        frames = self._partition_frames.get(partition.path)
+        if frames is None:
+            frames = self._load_workbook(partition.path, "CSR_MIS_", f"CSR MIS {partition.label}", partition.label)
+            self._partition_frames[partition.path] = frames
+            metrics.increment("loader.partitions_read")
+        return frames.get(key)
+    
+    def get_period_data(self, key: str, start: Optional[date] = None, end: Optional[date] = None) -> Optional[pd.DataFrame]:
+        """
+        Rows of one sheet within [start, end]. For partitioned data only the
+        partitions whose period overlaps the range are read.
+        """
+        if self.partitions and key.startswith("CSR_MIS_") and "master" not in key.lower():
+            selected = prune(self.partitions, start, end)
+            metrics.increment("loader.partitions_pruned", len(self.partitions) - len(selected))
+            frames = [self._partition_frame(partition, key) for partition in selected]
+            frames = [df for df in frames if df is not None]
+            if not frames:
+                return None
+            df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        else:
+            df = self.data.get(key)
+            if df is None:
+                return None
+        return filter_by_date(df, start, end)
+    
+    def get_program_data_for_period(self, program_name: str, start: Optional[date] = None,
+                                    end: Optional[date] = None) -> Optional[pd.DataFrame]:
+        """Get a program's rows within [start, end]"""
+        key = self.resolve_program_key(program_name)
+        if key is None:
+            return None
+        return self.get_period_data(key, start, end)
     
-    def get_data(self, key: str) -> Optional[pd.DataFrame]:
-        """Get data by key"""
-        return self.data.get(key)
+    def is_period_loaded(self, start: Optional[date] = None, end: Optional[date] = None) -> bool:
+        """True when every partition overlapping [start, end] is part of self.data"""
+        return all(p in self.loaded_partitions for p in prune(self.partitions, start, end))
+    
+    def get_date_range(self) -> Tuple[Optional[date], Optional[date]]:
+        """First and last activity date available"""
+        if self.partitions:
+            return self.partitions[0].start, self.partitions[-1].end
+        return self.get_derived("date_range", _date_range)
+    
+    def source_files(self) -> List[str]:
+        """All workbooks this loader reads from"""
+        csr_files = [p.path for p in self.partitions] if self.partitions else [self.csr_mis_path]
+        return csr_files + [self.jspl_input_path]
+    
+    def compute_data_version(self) -> str:
+        """Fingerprint of the source files (path, size and modification time)"""
+        digest = hashlib.sha1()
+        for path in self.source_files():
+            stat = os.stat(path)
+            digest.update(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()[:16]
+    
+    def get_derived(self, name: str, builder: Callable[["DataLoader"], Any]) -> Any:
+        """
+        Return an artefact derived from the loaded data, building it at most
+        once per data version. Nothing is cached while a background load is
+        still reading sheets, as the artefact would cover only some of them.
+        """
+        if self.loading:
+            metrics.record_cache(f"derived.{name}", False)
+            return builder(self)
+        cache_key = (name, self.data_version)
+        with self._derived_lock:
+            found = cache_key in self._derived
+            value = self._derived.get(cache_key)
+            build_lock = self._building.setdefault(name, threading.Lock())
+        if not found:
+            # Sessions and API threads asking at once build it only once
+            with build_lock:
+                with self._derived_lock:
+                    found = cache_key in self._derived
+                    value = self._derived.get(cache_key)
+                if not found:
+                    with timer(f"derived.{name}.build"):
+                        value = builder(self)
+                    with self._derived_lock:
+                        # Drop artefacts built for an older data version
+                        for key in [key for key in self._derived if key[0] == name]:
+                            del self._derived[key]
+                        self._derived[cache_key] = value
+        metrics.record_cache(f"derived.{name}", found)
+        return value
+    
+    def get_data(self, key: str, columns: Optional[List[str]] = None,
+                 predicate: Optional[Predicate] = None) -> Optional[pd.DataFrame]:
+        """
+        Get data by key. ``columns`` keeps only those columns (names the sheet
+        lacks are ignored) and ``predicate`` filters rows; spilled sheets then
+        read just the needed columns.
+        """
+        if columns is None and predicate is None:
+            return self.data.get(key)
+        if key not in self.data:
+            return None
+        
+        sheet_columns = self.get_columns(key)
+        wanted = [col for col in dict.fromkeys(columns) if col in sheet_columns] if columns is not None else sheet_columns
+        needed = list(wanted)
+        if predicate is not None and not callable(predicate):
+            needed += [col for col in predicate if col in sheet_columns and col not in needed]
+        if callable(predicate) or len(needed) == len(sheet_columns):
+            df = self.data[key]
+        elif isinstance(self.data, SheetStore):
+            df = self.data.project(key, needed)
+        else:
+            df = self.data[key][needed]
+        metrics.increment("loader.projected_columns", len(sheet_columns) - len(wanted))
+        return apply_predicate(df, predicate)[wanted]
+    
+    def get_columns(self, key: str) -> List[str]:
+        """Column names of a sheet without loading a spilled sheet"""
+        if isinstance(self.data, SheetStore):
+            return self.data.columns(key)
+        return list(self.data[key].columns)
+    
+    def get_row_count(self, key: str) -> int:
+        """Number of rows of a sheet without loading a spilled sheet"""
+        if isinstance(self.data, SheetStore):
+            return self.data.row_count(key)
+        return len(self.data[key])
     
     def get_all_keys(self) -> List[str]:
         """Get all data keys"""
         return list(self.data.keys())
     
-    def get_program_data(self, program_name: str) -> Optional[pd.DataFrame]:
-        """Get data for a specific program"""
+    def memory_stats(self) -> Dict[str, Any]:
+        """Sheet store budget, residency and eviction statistics"""
+        if isinstance(self.data, SheetStore):
+            return self.data.stats()
+        return {"budget_bytes": None, "resident_sheets": len(self.data), "spilled_sheets": 0}
+    
+    def resolve_program_key(self, program_name: str) -> Optional[str]:
+        """Find the data key holding a program's sheet"""
         # Try different naming conventions
         possible_keys = [
             f"CSR_MIS_{program_name}",
@@ -73,19 +491,42 @@ class DataLoader:
         
         for key in possible_keys:
             if key in self.data:
-                return self.data[key]
+                return key
         
         # Try partial match
         for key in self.data.keys():
             if program_name.lower() in key.lower():
-                return self.data[key]
+                return key
         
         return None
     
+    def get_program_data(self, program_name: str, columns: Optional[List[str]] = None,
+                         predicate: Optional[Predicate] = None) -> Optional[pd.DataFrame]:
+        """Get data for a specific program (see get_data for ``columns``/``predicate``)"""
+        key = self.resolve_program_key(program_name)
+        metrics.record_cache("loader.program_lookup", key is not None)
+        return self.get_data(key, columns, predicate) if key is not None else None
+    
     def get_master_data(self) -> Dict[str, pd.DataFrame]:
         """Get all master data sheets"""
         masters = {}
-        for key, df in self.data.items():
+        for key in self.data.keys():
             if 'Master' in key or 'master' in key:
-                masters[key] = df
+                masters[key] = self.data[key]
         return masters
+
+def _date_range(data_loader: DataLoader) -> Tuple[Optional[date], Optional[date]]:
+    """Earliest and latest activity date across all sheets"""
+    first, last = None, None
+    for key in data_loader.get_all_keys():
+        df = data_loader.get_data(key)
+        date_col = find_date_column(df) if df is not None else None
+        if date_col is None:
+            continue
+        dates = df[date_col].dropna()
+        if dates.empty:
+            continue
+        low, high = dates.min().date(), dates.max().date()
+        first = low if first is None else min(first, low)
+        last = high if last is None else max(last, high)
+    return first, last
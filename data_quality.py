@@ -0,0 +1,212 @@
+"""
+Data Quality Module for CSR Dashboard
+Rule-based validation of every sheet, run once per data version, with the
+violations kept in an indexed results table for the Data Quality page
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cubes import activity_dates
+from master_data import GENDER_VALUES, location_columns, master_id_map, master_values
+
+# Plausible ranges for numeric fields (lower-case column names)
+RANGES = {
+    "age": (0, 110),
+    "haemoglobin": (3, 20),
+    "hemoglobin": (3, 20),
+    "hb": (3, 20),
+    "weight": (0.5, 200),
+    "height": (30, 230),
+}
+REQUIRED_COLUMNS = ["name", "beneficiary_name", "gender"]
+# Record identifiers that must be unique within a sheet
+CODE_SUFFIXES = ("_pk_id", "record_id")
+EARLIEST_DATE = pd.Timestamp("2000-01-01")
+
+RESULT_COLUMNS = ["sheet", "rule", "severity", "column", "row", "value", "message"]
+
+# A check returns (column, violating-row mask, message) triples
+Finding = Tuple[str, pd.Series, str]
+
+
+class Rule:
+    """One named validation check"""
+
+    def __init__(self, name: str, severity: str, description: str,
+                 check: Callable[[pd.DataFrame, dict], List[Finding]]):
+        self.name = name
+        self.severity = severity
+        self.description = description
+        self.check = check
+
+
+def _columns(df: pd.DataFrame, names) -> List[str]:
+    return [col for col in df.columns if str(col).lower() in names]
+
+
+def _blank(values: pd.Series) -> pd.Series:
+    text = values.astype("string").str.strip()
+    return text.isna() | (text == "")
+
+
+def check_required(df: pd.DataFrame, context: dict) -> List[Finding]:
+    findings = []
+    for col in _columns(df, REQUIRED_COLUMNS):
+        blank = _blank(df[col])
+        # A column no row fills is not used by this programme
+        if not blank.all():
+            findings.append((col, blank, f"{col} is empty"))
+    dates = context["dates"]
+    if dates is not None:
+        findings.append((context["date_column"], dates.isna(), "Activity date is empty or not a date"))
+    return findings
+
+
+def check_ranges(df: pd.DataFrame, context: dict) -> List[Finding]:
+    findings = []
+    for col in _columns(df, RANGES):
+        low, high = RANGES[str(col).lower()]
+        values = pd.to_numeric(df[col], errors="coerce")
+        present = ~_blank(df[col])
+        findings.append((col, present & values.isna(), f"{col} is not a number"))
+        findings.append((col, (values < low) | (values > high), f"{col} outside {low}–{high}"))
+    return findings
+
+
+def check_allowed_values(df: pd.DataFrame, context: dict) -> List[Finding]:
+    findings = []
+    for col in [c for c in df.columns if "gender" in str(c).lower()]:
+        text = df[col].astype("string").str.strip().str.lower()
+        findings.append((col, text.notna() & (text != "") & ~text.isin(list(GENDER_VALUES)),
+                         f"{col} is not a recognised gender"))
+
+    places = location_columns(df)
+    states = context["states"]
+    if places["State"] is not None and states:
+        text = df[places["State"]].astype("string").str.strip().str.lower()
+        findings.append((places["State"], text.notna() & (text != "") & ~text.isin(states),
+                         "State is not in the State Master"))
+    elif places["state_id"] is not None and context["state_ids"]:
+        ids = pd.to_numeric(df[places["state_id"]], errors="coerce")
+        findings.append((places["state_id"], ids.notna() & ~ids.isin(list(context["state_ids"])),
+                         "State id is not in the State Master"))
+    return findings
+
+
+def check_duplicate_codes(df: pd.DataFrame, context: dict) -> List[Finding]:
+    findings = []
+    for col in [c for c in df.columns if str(c).lower().endswith(CODE_SUFFIXES)]:
+        values = df[col]
+        findings.append((col, values.notna() & values.duplicated(keep=False), f"{col} is not unique"))
+    return findings
+
+
+def check_dates(df: pd.DataFrame, context: dict) -> List[Finding]:
+    findings = []
+    dates, today = context["dates"], context["today"]
+    if dates is not None:
+        findings.append((context["date_column"], (dates > today) | (dates < EARLIEST_DATE),
+                         f"Activity date before {EARLIEST_DATE.year} or in the future"))
+    for col in [c for c in df.columns if "birth" in str(c).lower() or str(c).lower() == "dob"]:
+        born = pd.to_datetime(df[col], errors="coerce")
+        limit = dates.fillna(today) if dates is not None else today
+        findings.append((col, born > limit, "Date of birth after the activity date"))
+    return findings
+
+
+RULES = [
+    Rule("required", "error", "Required fields are filled in", check_required),
+    Rule("range", "error", "Numbers are numeric and within plausible ranges", check_ranges),
+    Rule("allowed_values", "warning", "Gender and State match the master lists", check_allowed_values),
+    Rule("duplicate_code", "error", "Record identifiers are unique", check_duplicate_codes),
+    Rule("date", "error", "Dates are plausible", check_dates),
+]
+
+
+class QualityReport:
+    """Violations indexed by (sheet, rule) plus per-sheet row counts"""
+
+    def __init__(self, violations: pd.DataFrame, rows_checked: Dict[str, int]):
+        self.violations = violations.set_index(["sheet", "rule"]).sort_index()
+        self.rows_checked = rows_checked
+
+    @property
+    def total(self) -> int:
+        return len(self.violations)
+
+    def summary(self) -> pd.DataFrame:
+        """Violation and affected-row counts per sheet and rule"""
+        if self.violations.empty:
+            return pd.DataFrame(columns=["sheet", "rule", "severity", "violations", "rows"])
+        grouped = self.violations.groupby(level=["sheet", "rule"])
+        summary = pd.DataFrame({
+            "severity": grouped["severity"].first(),
+            "violations": grouped.size(),
+            "rows": grouped["row"].nunique(),
+        }).reset_index()
+        return summary.sort_values(["violations", "sheet"], ascending=[False, True], ignore_index=True)
+
+    def for_sheet(self, sheet: str, rule: Optional[str] = None) -> pd.DataFrame:
+        """Violations of one sheet, optionally for one rule"""
+        try:
+            found = self.violations.loc[[(sheet, rule) if rule else sheet]]
+        except KeyError:
+            return pd.DataFrame(columns=RESULT_COLUMNS[1:])
+        return found.reset_index(level="sheet", drop=True).reset_index()
+
+    def flagged_rows(self, sheet: str) -> np.ndarray:
+        """Row labels of a sheet with at least one violation"""
+        rows = self.for_sheet(sheet)["row"]
+        return np.unique(rows.to_numpy())
+
+
+def _sheet_violations(key: str, df: pd.DataFrame, context: dict) -> List[pd.DataFrame]:
+    frames = []
+    for rule in RULES:
+        for column, mask, message in rule.check(df, context):
+            mask = mask.fillna(False).astype(bool)
+            if not mask.any():
+                continue
+            hits = df.index[mask.to_numpy()]
+            frames.append(pd.DataFrame({
+                "sheet": key,
+                "rule": rule.name,
+                "severity": rule.severity,
+                "column": column,
+                "row": hits,
+                "value": df.loc[hits, column].astype("string").to_numpy(),
+                "message": message,
+            }))
+    return frames
+
+
+def build_quality_report(data_loader) -> QualityReport:
+    """Run every rule over every program sheet"""
+    state_master = data_loader.get_data("CSR_MIS_State Master")
+    context = {
+        "states": {state.lower() for state in master_values(state_master)},
+        "state_ids": master_id_map(state_master),
+        "today": pd.Timestamp(datetime.now().date()) + pd.Timedelta(days=1),
+    }
+    frames, rows_checked = [], {}
+    for key in data_loader.get_all_keys():
+        if "master" in key.lower():
+            continue
+        df = data_loader.get_data(key)
+        if df is None or df.empty:
+            continue
+        dates = activity_dates(df)
+        context.update(dates=dates, date_column=dates.name if dates is not None else None)
+        rows_checked[key] = len(df)
+        frames.extend(_sheet_violations(key, df, context))
+
+    violations = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=RESULT_COLUMNS)
+    return QualityReport(violations, rows_checked)
+
+
+def get_quality_report(data_loader) -> QualityReport:
+    """Quality report for the loader's current data version"""
+    return data_loader.get_derived("quality_report", build_quality_report)
@@ -0,0 +1,116 @@
+"""
+Data Store Module for CSR Dashboard
+One DataLoader per set of source files (or per shared store), shared by every
+Streamlit session and the JSON API in the same process, reloaded when the
+data changes
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from data_loader import DataLoader
+from instrumentation import log_event, metrics
+
+# Seconds between checks of the source files' size/mtime
+REFRESH_INTERVAL = float(os.environ.get("CSR_REFRESH_SECONDS", "30"))
+
+_lock = threading.Lock()
+_loaders: Dict[Tuple[str, str], DataLoader] = {}
+_last_checked: Dict[Tuple[str, str], float] = {}
+# Background reloads still reading; the previous loader is served meanwhile
+_pending: Dict[Tuple[str, str], DataLoader] = {}
+
+
+def default_paths() -> Tuple[str, str]:
+    """Source workbooks from CSR_MIS_PATH / JSPL_INPUT_PATH (or the defaults)"""
+    return (
+        os.environ.get("CSR_MIS_PATH", "CSR MIS.xlsx"),
+        os.environ.get("JSPL_INPUT_PATH", "JSPL CSR Data Input.xlsx"),
+    )
+
+
+def snapshot_when_loaded(loader: DataLoader):
+    """
+    Save the row hashes of a newly loaded version once its sheets are read,
+    so What Changed compares consecutive uploads even when nobody opened
+    the page in between
+    """
+    from change_detection import get_changeset
+    loader.progress.wait()
+    if loader.progress.error is not None:
+        return
+    try:
+        get_changeset(loader)
+    except Exception as e:
+        print(f"Warning: Could not snapshot data version {loader.data_version}: {str(e)}")
+
+
+def _open_loader(key: Tuple[str, str], background: bool = False) -> DataLoader:
+    if key[0] == "shared":
+        # The publisher snapshots each version it publishes
+        from shared_store import SharedDataLoader
+        return SharedDataLoader(key[1])
+    loader = DataLoader(*key, background=background)
+    threading.Thread(target=snapshot_when_loaded, args=(loader,), name="csr-snapshot", daemon=True).start()
+    return loader
+
+
+def get_loader(csr_mis_path: Optional[str] = None, jspl_input_path: Optional[str] = None,
+               background: bool = False) -> DataLoader:
+    """
+    The shared loader for these files. The first caller loads them; later
+    callers get the same instance until the files' data version changes.
+    
+    With ``background`` the loader is returned while its sheets are still
+    being read (see DataLoader.loading), and a reload after the files change
+    happens in the background while the previous data keeps being served.
+    
+    With CSR_SHARED_STORE set the sheets are attached from that published
+    store (see shared_store.py) instead of being read from Excel.
+    """
+    shared_store = os.environ.get("CSR_SHARED_STORE")
+    if shared_store:
+        key = ("shared", os.path.abspath(shared_store))
+    else:
+        default_csr, default_jspl = default_paths()
+        key = (os.path.abspath(csr_mis_path or default_csr), os.path.abspath(jspl_input_path or default_jspl))
+
+    with _lock:
+        loader = _loaders.get(key)
+        now = time.monotonic()
+        pending = _pending.get(key)
+        if pending is not None and not pending.loading:
+            del _pending[key]
+            if pending.progress.error is None:
+                loader = _loaders[key] = pending
+                log_event("store.swapped", csr_mis_path=key[0], version=loader.data_version)
+        
+        if (loader is not None and key not in _pending and not loader.loading
+                and now - _last_checked.get(key, 0) >= REFRESH_INTERVAL):
+            _last_checked[key] = now
+            try:
+                changed = loader.compute_data_version() != loader.data_version
+            except OSError:
+                changed = False
+            if changed:
+                log_event("store.reload", csr_mis_path=key[0], old_version=loader.data_version)
+                if background and loader.progress.error is None:
+                    _pending[key] = _open_loader(key, background=True)
+                else:
+                    loader = None
+
+        metrics.record_cache("store.loader", loader is not None)
+        if loader is None:
+            loader = _open_loader(key, background)
+            _loaders[key] = loader
+            _last_checked[key] = now
+        return loader
+
+
+def clear():
+    """Forget every shared loader (the next get_loader reloads)"""
+    with _lock:
+        _loaders.clear()
+        _last_checked.clear()
+        _pending.clear()
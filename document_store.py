@@ -0,0 +1,308 @@
+"""
+Document Store Module for CSR Dashboard
+Content-addressed storage for uploaded CSR documents (MoUs, photos, reports)
+with an SQLite metadata index and lazily generated thumbnails
+
+Every file is streamed in chunks to a temporary file while its SHA-256 is
+computed, then renamed to objects/<ab>/<sha256>; a file uploaded twice is
+stored once. Metadata (name, category, program, document date) lives in
+index.sqlite3 with an index on (category, program, doc_date), so a category
+page is one indexed query however many files are stored. Thumbnails and
+previews of images are generated on first view (Pillow, optional) and cached
+under thumbs/.
+
+Usage:
+    python document_store.py --import scans/ --category "Program Reports" --program Vatsalya
+"""
+import argparse
+import hashlib
+import mimetypes
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from instrumentation import log_event, metrics, timer
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DOCUMENT_STORE = os.environ.get("CSR_DOCUMENT_STORE", "csr_documents")
+
+CATEGORIES = [
+    "Policy Documents",
+    "Annual Reports",
+    "Program Reports",
+    "Compliance Documents",
+    "Impact Assessments",
+    "MoUs",
+    "Photos",
+]
+CHUNK_SIZE = 1024 * 1024
+THUMBNAIL_SIZE = 160
+PREVIEW_SIZE = 1024
+TEXT_PREVIEW_CHARS = 4000
+TEXT_TYPES = ("text/", "application/json", "application/xml")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sha256 TEXT NOT NULL,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    program TEXT NOT NULL DEFAULT '',
+    doc_date TEXT,
+    size INTEGER NOT NULL,
+    mime TEXT NOT NULL,
+    uploaded REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_listing ON documents (category, program, doc_date);
+CREATE INDEX IF NOT EXISTS documents_sha256 ON documents (sha256);
+"""
+
+
+@dataclass(frozen=True)
+class Document:
+    """Metadata of one stored document"""
+    id: int
+    sha256: str
+    name: str
+    category: str
+    program: str
+    doc_date: Optional[str]
+    size: int
+    mime: str
+    uploaded: float
+
+    @property
+    def is_image(self) -> bool:
+        return self.mime.startswith("image/")
+
+    @property
+    def is_text(self) -> bool:
+        return self.mime.startswith(TEXT_TYPES)
+
+
+def guess_mime(name: str) -> str:
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+def _read_chunks(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _listing_filters(category: str, program: Optional[str], start: Optional[date],
+                     end: Optional[date]) -> Tuple[str, list]:
+    clauses, params = ["category = ?"], [category]
+    if program:
+        clauses.append("program = ?")
+        params.append(program)
+    if start is not None:
+        clauses.append("doc_date >= ?")
+        params.append(start.isoformat())
+    if end is not None:
+        clauses.append("doc_date <= ?")
+        params.append(end.isoformat())
+    return " AND ".join(clauses), params
+
+
+class DocumentStore:
+    """Blobs on disk keyed by SHA-256 plus their metadata index"""
+
+    def __init__(self, root: str = DOCUMENT_STORE):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.thumbs_dir = os.path.join(root, "thumbs")
+        self.index_path = os.path.join(root, "index.sqlite3")
+        for directory in (self.objects_dir, self.thumbs_dir):
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection that commits on success and is always closed"""
+        conn = sqlite3.connect(self.index_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+    def _store_blob(self, stream: BinaryIO) -> Tuple[str, int, bool]:
+        """Stream into objects/; returns (sha256, size, newly stored)"""
+        digest, size = hashlib.sha256(), 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.objects_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in _read_chunks(stream):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            sha256 = digest.hexdigest()
+            path = self.blob_path(sha256)
+            if os.path.exists(path):
+                return sha256, size, False
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+            return sha256, size, True
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def add(self, stream: BinaryIO, name: str, category: str, program: str = "",
+            doc_date: Optional[date] = None, mime: Optional[str] = None) -> Tuple[Document, bool]:
+        """
+        Store a file read from ``stream``. Returns the document and whether it
+        is new; the same content filed again under the same category and
+        program returns the existing document.
+        """
+        with timer("documents.add", category=category):
+            sha256, size, new_blob = self._store_blob(stream)
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT * FROM documents WHERE sha256 = ? AND category = ? AND program = ?",
+                    (sha256, category, program),
+                ).fetchone()
+                if row is not None:
+                    metrics.increment("documents.duplicates")
+                    return Document(*row), False
+                values = (sha256, name, category, program, doc_date.isoformat() if doc_date else None,
+                          size, mime or guess_mime(name), time.time())
+                cursor = conn.execute(
+                    "INSERT INTO documents (sha256, name, category, program, doc_date, size, mime, uploaded) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    values,
+                )
+                document = Document(int(cursor.lastrowid), *values)
+        metrics.increment("documents.added")
+        if not new_blob:
+            metrics.increment("documents.deduplicated_bytes", size)
+        log_event("documents.added", id=document.id, category=category, size=size, deduplicated=not new_blob)
+        return document, True
+
+    def get(self, doc_id: int) -> Optional[Document]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM documents WHERE id = ?", (doc_id,)).fetchone()
+        return Document(*row) if row is not None else None
+
+    def list(self, category: str, program: Optional[str] = None, start: Optional[date] = None,
+             end: Optional[date] = None, limit: int = 50, offset: int = 0) -> List[Document]:
+        """One page of a category, newest document date first"""
+        where, params = _listing_filters(category, program, start, end)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM documents WHERE {where} "
+                "ORDER BY doc_date IS NULL, doc_date DESC, id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return [Document(*row) for row in rows]
+
+    def count(self, category: str, program: Optional[str] = None, start: Optional[date] = None,
+              end: Optional[date] = None) -> int:
+        where, params = _listing_filters(category, program, start, end)
+        with self._connect() as conn:
+            return int(conn.execute(f"SELECT COUNT(*) FROM documents WHERE {where}", params).fetchone()[0])
+
+    def category_counts(self) -> Dict[str, int]:
+        """Number of documents per category"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT category, COUNT(*) FROM documents GROUP BY category").fetchall()
+        return dict(rows)
+
+    def programs(self, category: str) -> List[str]:
+        """Programs with documents in a category"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT program FROM documents WHERE category = ? AND program != '' ORDER BY program",
+                (category,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def read(self, document: Document) -> bytes:
+        with open(self.blob_path(document.sha256), "rb") as f:
+            return f.read()
+
+    def thumbnail(self, document: Document, size: int = THUMBNAIL_SIZE) -> Optional[str]:
+        """
+        Path of a cached PNG of an image document scaled to fit ``size``
+        pixels, generated on first request. None for other files or when
+        Pillow is not installed.
+        """
+        if not document.is_image or Image is None:
+            return None
+        path = os.path.join(self.thumbs_dir, f"{document.sha256}_{size}.png")
+        if os.path.exists(path):
+            metrics.record_cache("documents.thumbnail", True)
+            return path
+        metrics.record_cache("documents.thumbnail", False)
+        try:
+            with timer("documents.thumbnail", size=size):
+                with Image.open(self.blob_path(document.sha256)) as image:
+                    image.thumbnail((size, size))
+                    if image.mode not in ("RGB", "RGBA", "L"):
+                        image = image.convert("RGBA")
+                    fd, tmp_path = tempfile.mkstemp(dir=self.thumbs_dir, suffix=".tmp")
+                    with os.fdopen(fd, "wb") as f:
+                        image.save(f, format="PNG")
+                    os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Warning: Could not create a thumbnail for {document.name}: {str(e)}")
+            return None
+        return path
+
+    def preview(self, document: Document) -> Optional[str]:
+        """Larger cached rendering of an image document"""
+        return self.thumbnail(document, PREVIEW_SIZE)
+
+    def text_preview(self, document: Document, chars: int = TEXT_PREVIEW_CHARS) -> Optional[str]:
+        """Start of a text document"""
+        if not document.is_text:
+            return None
+        with open(self.blob_path(document.sha256), "rb") as f:
+            return f.read(chars * 4).decode("utf-8", errors="replace")[:chars]
+
+
+def import_directory(store: DocumentStore, directory: str, category: str, program: str = "") -> Dict[str, int]:
+    """Add every file below ``directory``"""
+    counts = {"added": 0, "duplicates": 0}
+    for folder, _, names in os.walk(directory):
+        for name in sorted(names):
+            with open(os.path.join(folder, name), "rb") as f:
+                _, added = store.add(f, name, category, program)
+            counts["added" if added else "duplicates"] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import files into the CSR document store")
+    parser.add_argument("--import", dest="directory", required=True, help="Directory to import")
+    parser.add_argument("--category", required=True, choices=CATEGORIES)
+    parser.add_argument("--program", default="")
+    parser.add_argument("--store", default=DOCUMENT_STORE, help="Document store directory")
+    args = parser.parse_args()
+
+    counts = import_directory(DocumentStore(args.store), args.directory, args.category, args.program)
+    print(f"Added {counts['added']} documents, skipped {counts['duplicates']} duplicates")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
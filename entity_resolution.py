@@ -0,0 +1,375 @@
+"""
+Entity Resolution Module for CSR Dashboard
+Links the same beneficiary across program registers despite spelling
+differences and keeps a persistent record → beneficiary ID mapping
+
+Records are only compared inside blocks that share a phonetic name key and a
+birth-year band (once with the village, once without it), so the work grows
+with block sizes instead of quadratically with the registers. Rows already in
+the mapping keep their ID; only new rows are scored on each run.
+"""
+import os
+import re
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from cubes import activity_dates
+from master_data import normalise_gender
+
+CACHE_DIR = os.environ.get("CSR_CACHE_DIR", ".csr_cache")
+MAPPING_FILE = "beneficiary_ids.csv"
+
+NAME_COLUMNS = ["name", "beneficiary_name"]
+FATHER_COLUMNS = ["fathers_name", "father_name"]
+PLACE_COLUMNS = ["village", "location", "gram_panchayat"]
+ID_COLUMNS = ["adhar_number", "aadhar_number", "aadhaar_number"]
+AGE_COLUMNS = ["age"]
+DOB_COLUMNS = ["date_of_birth", "dob"]
+
+BIRTH_BAND_YEARS = 5
+MATCH_THRESHOLD = 0.8
+MAX_BLOCK_SIZE = 500
+# Candidate pairs scored at a time
+PAIR_BATCH = 2_000_000
+
+_TITLES = re.compile(r"\b(mr|mrs|ms|miss|smt|shri|sri|kumari|km|dr)\b\.?")
+_NON_LETTERS = re.compile(r"[^a-z ]+")
+_PHONETIC_SUBS = [
+    ("ph", "f"), ("bh", "b"), ("dh", "d"), ("th", "t"), ("kh", "k"), ("gh", "g"),
+    ("sh", "s"), ("ch", "c"), ("ck", "k"), ("w", "v"), ("z", "j"), ("q", "k"), ("x", "ks"),
+]
+_SOUNDEX = {c: d for d, letters in {
+    "1": "bfpv", "2": "cgjkqsxz", "3": "dt", "4": "l", "5": "mn", "6": "r",
+}.items() for c in letters}
+
+
+def normalise_name(values: pd.Series) -> pd.Series:
+    """Lower-case, drop titles and punctuation, collapse whitespace"""
+    text = values.astype("string").str.lower()
+    text = text.str.replace(_TITLES, " ", regex=True).str.replace(_NON_LETTERS, " ", regex=True)
+    text = text.str.replace(r"\s+", " ", regex=True).str.strip()
+    return text.where(text != "")
+
+
+def phonetic_key(token: str) -> str:
+    """Soundex-style code tuned for transliterated Indian names (Seeta = Sita)"""
+    if not token:
+        return ""
+    for old, new in _PHONETIC_SUBS:
+        token = token.replace(old, new)
+    code = token[0]
+    previous = _SOUNDEX.get(token[0], "")
+    for char in token[1:]:
+        digit = _SOUNDEX.get(char, "")
+        if digit and digit != previous:
+            code += digit
+        previous = digit
+    return (code + "000")[:4]
+
+
+def bigram_bits(name: str) -> int:
+    """64-bit set of the name's character bigrams"""
+    padded = f" {name} "
+    bits = 0
+    for a, b in zip(padded, padded[1:]):
+        bits |= 1 << ((ord(a) * 31 + ord(b)) % 64)
+    return bits
+
+
+def _first_column(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
+    lookup = {str(col).lower(): col for col in df.columns}
+    for name in candidates:
+        if name in lookup and df[lookup[name]].notna().any():
+            return lookup[name]
+    return None
+
+
+def _optional(df: pd.DataFrame, candidates: List[str]) -> pd.Series:
+    column = _first_column(df, candidates)
+    if column is None:
+        return pd.Series(pd.NA, index=df.index, dtype="string")
+    return normalise_name(df[column])
+
+
+def sheet_records(key: str, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """Identity fields of every named row in one program sheet"""
+    name_col = _first_column(df, NAME_COLUMNS)
+    if name_col is None:
+        return None
+
+    records = pd.DataFrame({
+        "sheet": key,
+        "row": df.index,
+        "name": normalise_name(df[name_col]).to_numpy(),
+        "father": _optional(df, FATHER_COLUMNS).to_numpy(),
+        "village": _optional(df, PLACE_COLUMNS).to_numpy(),
+    })
+    gender_col = _first_column(df, ["gender"])
+    records["gender"] = (normalise_gender(df[gender_col]) if gender_col else
+                         pd.Series(pd.NA, index=df.index, dtype="string")).to_numpy()
+
+    id_col = _first_column(df, ID_COLUMNS)
+    if id_col is not None:
+        digits = df[id_col].astype("string").str.replace(r"\D", "", regex=True)
+        records["aadhaar"] = digits.where(digits.str.len() >= 8).to_numpy()
+    else:
+        records["aadhaar"] = pd.Series(pd.NA, index=records.index, dtype="string")
+
+    # Birth year: date of birth, else activity year minus age
+    dob_col = _first_column(df, DOB_COLUMNS)
+    dob = pd.to_datetime(df[dob_col], errors="coerce") if dob_col else pd.Series(pd.NaT, index=df.index)
+    age_col = _first_column(df, AGE_COLUMNS)
+    age = pd.to_numeric(df[age_col], errors="coerce") if age_col else pd.Series(np.nan, index=df.index)
+    dates = activity_dates(df)
+    seen_year = dates.dt.year if dates is not None else pd.Series(pd.Timestamp.now().year, index=df.index)
+    birth_year = dob.dt.year.fillna(seen_year - age)
+    records["dob"] = dob.dt.strftime("%Y-%m-%d").astype("string").to_numpy()
+    records["birth_year"] = birth_year.to_numpy(dtype="float64")
+
+    records = records.dropna(subset=["name"])
+    identity = records[["sheet", "name", "father", "village", "gender", "aadhaar", "dob", "birth_year"]]
+    records["record_key"] = (
+        pd.util.hash_pandas_object(identity.astype("string"), index=False).to_numpy().astype("uint64")
+    )
+    records["record_key"] = records["record_key"].map("{:016x}".format)
+    return records
+
+
+def _block_pairs(records: pd.DataFrame, columns: List[str], is_new: np.ndarray) -> Iterator[pd.DataFrame]:
+    """
+    Candidate (a, b) record pairs sharing a block, at least one side new, in
+    batches of whole blocks of about PAIR_BATCH pairs each
+    """
+    keyed = records.dropna(subset=columns)[columns + ["band", "band_edge"]]
+    keyed = keyed.assign(rid=keyed.index)
+    # A record near a band edge also joins the neighbouring band
+    near = keyed[keyed["band_edge"] != 0]
+    keyed = pd.concat([keyed, near.assign(band=near["band"] + near["band_edge"])], ignore_index=True)
+    block = columns + ["band"]
+    keyed["block"] = keyed.groupby(block, sort=False).ngroup()
+    keyed["new"] = is_new[keyed["rid"].to_numpy()]
+    grouped = keyed.groupby("block")
+    sizes = grouped["rid"].transform("size")
+    has_new = grouped["new"].transform("any")
+    keyed = keyed[(sizes > 1) & (sizes <= MAX_BLOCK_SIZE) & has_new][["block", "rid"]]
+    # Large registers have too many pairs to hold at once
+    block_sizes = keyed.groupby("block", sort=True).size()
+    batches = pd.Series(np.cumsum(block_sizes.to_numpy(dtype=np.int64) ** 2) // PAIR_BATCH, index=block_sizes.index)
+    keyed = keyed.assign(batch=keyed["block"].map(batches))
+    for _, batch in keyed.groupby("batch", sort=False):
+        batch = batch[["block", "rid"]]
+        pairs = batch.merge(batch, on="block", suffixes=("_a", "_b"))[["rid_a", "rid_b"]]
+        pairs = pairs[pairs["rid_a"] < pairs["rid_b"]]
+        yield pairs[is_new[pairs["rid_a"].to_numpy()] | is_new[pairs["rid_b"].to_numpy()]]
+
+
+def _popcount_swar(bits: np.ndarray) -> np.ndarray:
+    """Set bits per uint64 for numpy < 2.0, which has no bitwise_count"""
+    bits = bits - ((bits >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    bits = (bits & np.uint64(0x3333333333333333)) + ((bits >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    bits = (bits + (bits >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (bits * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+_popcount = getattr(np, "bitwise_count", _popcount_swar)
+
+
+def score_pairs(records: pd.DataFrame, pairs: pd.DataFrame) -> np.ndarray:
+    """Similarity in [0, 1] for each candidate pair (vectorised)"""
+    a, b = pairs["rid_a"].to_numpy(), pairs["rid_b"].to_numpy()
+    name_bits = records["name_bits"].to_numpy(dtype=np.uint64)
+    name_sim = (_popcount(name_bits[a] & name_bits[b]) /
+                np.maximum(_popcount(name_bits[a] | name_bits[b]), 1))
+
+    father_bits = records["father_bits"].to_numpy(dtype=np.uint64)
+    has_father = (father_bits[a] != 0) & (father_bits[b] != 0)
+    father_sim = (_popcount(father_bits[a] & father_bits[b]) /
+                  np.maximum(_popcount(father_bits[a] | father_bits[b]), 1))
+    score = np.where(has_father, 0.7 * name_sim + 0.3 * father_sim, name_sim)
+
+    dob = records["dob"].fillna("").to_numpy(dtype=str)
+    both_dob = (dob[a] != "") & (dob[b] != "")
+    score = np.where(both_dob & (dob[a] == dob[b]), score + 0.2, score)
+    score = np.where(both_dob & (dob[a] != dob[b]), score - 0.3, score)
+
+    village = records["village"].fillna("").to_numpy(dtype=str)
+    both_village = (village[a] != "") & (village[b] != "")
+    score = np.where(both_village & (village[a] != village[b]), score - 0.2, score)
+
+    # Hard constraints: recorded gender and birth year must agree
+    gender = records["gender"].fillna("").to_numpy(dtype=str)
+    gender_clash = (gender[a] != "") & (gender[b] != "") & (gender[a] != gender[b])
+    year = records["birth_year"].to_numpy(dtype="float64")
+    year_clash = np.abs(year[a] - year[b]) > 2
+    score = np.where(gender_clash | year_clash, 0.0, score)
+    return np.clip(score, 0.0, 1.0)
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = np.arange(size)
+
+    def find(self, item: int) -> int:
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+class EntityIndex:
+    """Beneficiary IDs for every named row of every program sheet"""
+
+    def __init__(self, row_ids: Dict[str, pd.Series], mapping: Dict[str, str], new_records: int):
+        self.row_ids = row_ids
+        self.mapping = mapping
+        self.new_records = new_records
+
+    def ids_for(self, key: str) -> Optional[pd.Series]:
+        """Beneficiary ID per row of sheet ``key`` (indexed like the sheet)"""
+        return self.row_ids.get(key)
+
+    def unique_count(self, keys: Optional[List[str]] = None) -> int:
+        """Distinct beneficiaries in the given sheets (all when None)"""
+        series = [ids for key, ids in self.row_ids.items() if keys is None or key in keys]
+        return int(pd.concat(series).nunique()) if series else 0
+
+    def program_reach(self) -> pd.Series:
+        """Number of beneficiaries enrolled in 1, 2, 3... programs"""
+        if not self.row_ids:
+            return pd.Series(dtype="int64")
+        enrolments = pd.concat(
+            [pd.DataFrame({"id": ids.to_numpy(), "sheet": key}) for key, ids in self.row_ids.items()]
+        ).drop_duplicates()
+        return enrolments.groupby("id").size().value_counts().sort_index()
+
+
+def mapping_path(cache_dir: Optional[str] = None) -> str:
+    """Where the record → beneficiary ID mapping is stored"""
+    return os.path.join(cache_dir or CACHE_DIR, MAPPING_FILE)
+
+
+def load_mapping(path: str) -> Dict[str, str]:
+    """Read a saved mapping (empty if missing or unreadable)"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        saved = pd.read_csv(path, dtype=str)
+        return dict(zip(saved["record_key"], saved["beneficiary_id"]))
+    except Exception as e:
+        print(f"Warning: Could not read beneficiary mapping {path}: {str(e)}")
+        return {}
+
+
+def save_mapping(path: str, mapping: Dict[str, str]):
+    """Write the mapping atomically"""
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        pd.DataFrame({"record_key": list(mapping), "beneficiary_id": list(mapping.values())}).to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Warning: Could not save beneficiary mapping {path}: {str(e)}")
+
+
+def resolve_records(records: pd.DataFrame, mapping: Dict[str, str]) -> Dict[str, str]:
+    """
+    Assign a beneficiary ID to every record key, keeping existing IDs and
+    scoring only pairs that involve a record not yet in ``mapping``.
+    """
+    records = records.drop_duplicates("record_key").reset_index(drop=True)
+    is_new = ~records["record_key"].isin(mapping).to_numpy()
+    if not is_new.any():
+        return mapping
+
+    unique_names = pd.unique(pd.concat([records["name"], records["father"]]).dropna())
+    bits = {name: bigram_bits(name) for name in unique_names}
+    records["name_bits"] = records["name"].map(bits).astype("uint64")
+    records["father_bits"] = records["father"].map(bits).fillna(0).astype("uint64")
+    tokens = records["name"].str.split(" ")
+    records["first_key"] = tokens.str[0].map(phonetic_key)
+    records["last_key"] = tokens.str[-1].map(phonetic_key)
+    records["band"] = (records["birth_year"] // BIRTH_BAND_YEARS).fillna(-1)
+    offset = records["birth_year"] % BIRTH_BAND_YEARS
+    records["band_edge"] = np.where(offset == 0, -1, np.where(offset == BIRTH_BAND_YEARS - 1, 1, 0))
+
+    uf = _UnionFind(len(records))
+    for columns in (["village", "first_key"], ["first_key", "last_key"]):
+        for pairs in _block_pairs(records, columns, is_new):
+            # Pairs found by both blockings are just unioned twice
+            matched = pairs[score_pairs(records, pairs) >= MATCH_THRESHOLD] if len(pairs) else pairs
+            for a, b in zip(matched["rid_a"], matched["rid_b"]):
+                uf.union(a, b)
+    # Same Aadhaar number is always the same person
+    with_id = records.dropna(subset=["aadhaar"])
+    for _, group in with_id.groupby("aadhaar"):
+        first = group.index[0]
+        for other in group.index[1:]:
+            uf.union(first, other)
+    # Records that already share an ID stay together
+    known = records.loc[~is_new, "record_key"].map(mapping)
+    for _, group in known.groupby(known):
+        first = group.index[0]
+        for other in group.index[1:]:
+            uf.union(first, other)
+
+    roots = np.array([uf.find(i) for i in range(len(records))])
+    components = pd.DataFrame({"root": roots, "old": records["record_key"].map(mapping)})
+    # A component keeps its lowest existing ID; new components get fresh IDs
+    component_ids = components.groupby("root")["old"].min().astype(object)
+    fresh = component_ids.index[component_ids.isna()]
+    next_number = max((int(v.split("-")[1]) for v in mapping.values()), default=0) + 1
+    component_ids[fresh] = [f"BEN-{n:07d}" for n in range(next_number, next_number + len(fresh))]
+    components["new"] = components["root"].map(component_ids)
+
+    result = dict(mapping)
+    result.update(zip(records["record_key"], components["new"]))
+    # Components that merged two existing IDs relabel every record of the old ID
+    merged = components.dropna(subset=["old"])
+    relabel = dict(zip(merged["old"], merged["new"]))
+    relabel = {old: new for old, new in relabel.items() if old != new}
+    if relabel:
+        result = {key: relabel.get(value, value) for key, value in result.items()}
+    return result
+
+
+def build_entity_index(data_loader, cache_dir: Optional[str] = None) -> EntityIndex:
+    """Resolve beneficiaries across all program sheets and persist the mapping"""
+    frames = []
+    for key in data_loader.get_all_keys():
+        if "master" in key.lower():
+            continue
+        df = data_loader.get_data(key)
+        if df is None or df.empty:
+            continue
+        records = sheet_records(key, df)
+        if records is not None and not records.empty:
+            frames.append(records)
+    if not frames:
+        return EntityIndex({}, {}, 0)
+
+    records = pd.concat(frames, ignore_index=True)
+    path = mapping_path(cache_dir)
+    mapping = load_mapping(path)
+    new_records = int((~records["record_key"].drop_duplicates().isin(mapping)).sum())
+    if new_records:
+        mapping = resolve_records(records, mapping)
+        save_mapping(path, mapping)
+
+    row_ids = {}
+    for key, group in records.groupby("sheet", sort=False):
+        row_ids[key] = pd.Series(group["record_key"].map(mapping).to_numpy(), index=group["row"].to_numpy())
+    return EntityIndex(row_ids, mapping, new_records)
+
+
+def get_entity_index(data_loader) -> EntityIndex:
+    """Entity index for the loader's current data version"""
+    return data_loader.get_derived("entity_index", build_entity_index)
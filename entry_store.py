@@ -0,0 +1,124 @@
+"""
+Entry Store Module for CSR Dashboard
+Durable queue of Data Entry submissions. Each submission is committed to
+SQLite straight away; compaction.py later appends the pending ones to the
+JSPL input workbook in batches and records how far it got (the watermark).
+"""
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+ENTRY_STORE = os.environ.get("CSR_ENTRY_STORE", "csr_entries.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    program TEXT NOT NULL,
+    record TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    workbook TEXT NOT NULL,
+    first_entry INTEGER NOT NULL,
+    last_entry INTEGER NOT NULL,
+    entries INTEGER NOT NULL,
+    finished REAL NOT NULL,
+    seconds REAL NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class Entry:
+    """One submitted record waiting for (or past) compaction"""
+    id: int
+    program: str
+    record: Dict[str, Any]
+    created: float
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        # numpy scalars from Streamlit widgets
+        return value.item()
+    raise TypeError(f"Cannot store {type(value).__name__} in an entry")
+
+
+class EntryStore:
+    """SQLite-backed list of entries plus the compaction batches applied so far"""
+
+    def __init__(self, path: str = ENTRY_STORE):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection that commits on success and is always closed"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            # Readers (the dashboard) never block the compaction job or vice versa
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, program: str, record: Dict[str, Any]) -> int:
+        """Queue one record for ``program``; returns its entry id"""
+        payload = json.dumps(record, default=_json_value)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO entries (program, record, created) VALUES (?, ?, ?)",
+                (program, payload, time.time()),
+            )
+            return int(cursor.lastrowid)
+
+    def watermark(self) -> int:
+        """Id of the last entry already written to the workbook (0 if none)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT MAX(last_entry) FROM batches").fetchone()
+        return int(row[0] or 0)
+
+    def pending(self, after: Optional[int] = None) -> List[Entry]:
+        """Entries past the watermark (or past ``after``), oldest first"""
+        after = self.watermark() if after is None else after
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, program, record, created FROM entries WHERE id > ? ORDER BY id", (after,)
+            ).fetchall()
+        return [Entry(row[0], row[1], json.loads(row[2]), row[3]) for row in rows]
+
+    def pending_count(self) -> int:
+        """Number of entries not yet written to the workbook"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM entries WHERE id > (SELECT COALESCE(MAX(last_entry), 0) FROM batches)"
+            ).fetchone()
+        return int(row[0])
+
+    def record_batch(self, workbook: str, first_entry: int, last_entry: int, entries: int, seconds: float):
+        """Advance the watermark to ``last_entry``"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO batches (workbook, first_entry, last_entry, entries, finished, seconds) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(workbook), first_entry, last_entry, entries, time.time(), seconds),
+            )
+
+    def last_batch(self) -> Optional[Dict[str, Any]]:
+        """The most recent compaction batch, if any"""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM batches ORDER BY id DESC LIMIT 1").fetchone()
+        return dict(row) if row is not None else None
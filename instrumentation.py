@@ -0,0 +1,178 @@
+"""
+Instrumentation Module for CSR Dashboard
+Lightweight timers, counters, cache statistics and structured JSON logs
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+logger = logging.getLogger("csr_dashboard.metrics")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+
+class JsonFormatter(logging.Formatter):
+    """Format log records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+        }
+        fields = getattr(record, "fields", None)
+        if isinstance(fields, dict):
+            payload.update(fields)
+        else:
+            payload["message"] = record.getMessage()
+        return json.dumps(payload, default=str)
+
+
+def configure_json_logging(target: Optional[str] = None) -> bool:
+    """
+    Attach a JSON log handler.
+
+    ``target`` is "stderr", "stdout" or a file path; when omitted the
+    CSR_METRICS_LOG environment variable is used. Returns False when
+    structured logging stays disabled.
+    """
+    target = target or os.environ.get("CSR_METRICS_LOG")
+    if not target:
+        return False
+    for handler in logger.handlers:
+        if getattr(handler, "csr_target", None) == target:
+            return True
+
+    if target == "stderr":
+        handler = logging.StreamHandler(sys.stderr)
+    elif target == "stdout":
+        handler = logging.StreamHandler(sys.stdout)
+    else:
+        handler = logging.FileHandler(target, encoding="utf-8")
+    handler.csr_target = target
+    handler.setFormatter(JsonFormatter())
+    logger.addHandler(handler)
+    return True
+
+
+def log_event(event: str, **fields: Any):
+    """Emit a structured event if JSON logging is configured"""
+    if logger.handlers:
+        logger.info(event, extra={"fields": {"event": event, **fields}})
+
+
+class Metrics:
+    """Process-wide registry of timings, counters, cache and sheet statistics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear all collected statistics"""
+        with self._lock:
+            self.timings: Dict[str, Dict[str, float]] = {}
+            self.counters: Dict[str, int] = {}
+            self.cache: Dict[str, Dict[str, int]] = {}
+            self.sheets: Dict[str, Dict[str, Any]] = {}
+
+    def record_timing(self, name: str, seconds: float, **fields: Any):
+        """Add one timed call to the named timer"""
+        with self._lock:
+            stats = self.timings.setdefault(
+                name, {"count": 0, "total_s": 0.0, "max_s": 0.0, "last_s": 0.0}
+            )
+            stats["count"] += 1
+            stats["total_s"] += seconds
+            stats["max_s"] = max(stats["max_s"], seconds)
+            stats["last_s"] = seconds
+        log_event("timing", name=name, seconds=round(seconds, 6), **fields)
+
+    def increment(self, name: str, value: int = 1):
+        """Increase a counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_cache(self, name: str, hit: bool):
+        """Count a cache hit or miss for the named cache"""
+        with self._lock:
+            stats = self.cache.setdefault(name, {"hits": 0, "misses": 0})
+            stats["hits" if hit else "misses"] += 1
+
+    def record_sheet(self, key: str, seconds: float, rows: int, columns: int, memory_bytes: int):
+        """Store load statistics for one sheet"""
+        with self._lock:
+            self.sheets[key] = {
+                "seconds": seconds,
+                "rows": rows,
+                "columns": columns,
+                "memory_bytes": memory_bytes,
+            }
+        log_event(
+            "sheet_loaded",
+            sheet=key,
+            seconds=round(seconds, 6),
+            rows=rows,
+            columns=columns,
+            memory_bytes=memory_bytes,
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a copy of all statistics"""
+        with self._lock:
+            cache = {}
+            for name, stats in self.cache.items():
+                lookups = stats["hits"] + stats["misses"]
+                cache[name] = {
+                    **stats,
+                    "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+                }
+            return {
+                "timings": {k: dict(v) for k, v in self.timings.items()},
+                "counters": dict(self.counters),
+                "cache": cache,
+                "sheets": {k: dict(v) for k, v in self.sheets.items()},
+            }
+
+
+metrics = Metrics()
+
+
+@contextmanager
+def timer(name: str, **fields: Any):
+    """Time the enclosed block and record it under ``name``"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.record_timing(name, time.perf_counter() - start, **fields)
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """Decorator that records the runtime of every call"""
+
+    def decorator(func: Callable) -> Callable:
+        timer_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(timer_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def dataframe_memory(df: pd.DataFrame) -> int:
+    """Deep memory usage of a DataFrame in bytes"""
+    return int(df.memory_usage(deep=True).sum())
@@ -0,0 +1,304 @@
+"""
+Load Test Harness for CSR Dashboard
+Drives simulated browser sessions through navigation scripts against a
+running app.py and reports rerun latency, throughput and server memory
+
+Usage:
+    streamlit run app.py --server.headless true &
+    python load_test.py --sessions 40 --server-pid <PID>
+
+    # or let the harness start (and stop) its own server
+    python load_test.py --launch --sessions 40
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.Radio_pb2 import Radio
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+# Each step is (widget type, widget label, option to select)
+SCRIPTS: Dict[str, List[Tuple[str, str, str]]] = {
+    "review": [
+        ("radio", "Navigation", "Overview"),
+        ("radio", "Navigation", "Health & Nutrition"),
+        ("selectbox", "Select Program", "Kishori Express"),
+        ("selectbox", "Select Program", "Subhangi"),
+        ("radio", "Navigation", "Reports"),
+    ],
+    "overview": [
+        ("radio", "Navigation", "Overview"),
+        ("radio", "Navigation", "KPIs"),
+        ("radio", "Navigation", "Overview"),
+    ],
+}
+
+# Newer Streamlit releases store radio/selectbox values as the option text,
+# older ones as the option index
+STRING_CHOICES = "raw_value" in Radio.DESCRIPTOR.fields_by_name
+
+
+@dataclass
+class SessionResult:
+    """Latencies recorded by one simulated session"""
+    latencies: Dict[str, List[float]] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+
+    def add(self, step: str, seconds: float):
+        self.latencies.setdefault(step, []).append(seconds)
+
+
+class SimulatedSession:
+    """One browser session speaking Streamlit's websocket protocol"""
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+        self.widgets: Dict[Tuple[str, str], object] = {}
+        self.states: Dict[str, WidgetState] = {}
+
+    async def rerun(self, ws) -> float:
+        """Request a rerun with the current widget states and wait for it to finish"""
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+
+        start = time.perf_counter()
+        await ws.send(msg.SerializeToString())
+        while True:
+            raw = await asyncio.wait_for(ws.recv(), self.timeout)
+            forward = ForwardMsg()
+            forward.ParseFromString(raw)
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type in ("radio", "selectbox"):
+                    widget = getattr(element, element_type)
+                    self.widgets[(element_type, widget.label)] = widget
+            elif kind == "script_finished":
+                return time.perf_counter() - start
+
+    def select(self, widget_type: str, label: str, option: str):
+        """Set a radio/selectbox value for the next rerun"""
+        widget = self.widgets.get((widget_type, label))
+        if widget is None:
+            raise LookupError(f"{widget_type} '{label}' is not on the current page")
+        options = list(widget.options)
+        if option not in options:
+            raise LookupError(f"'{option}' is not an option of '{label}'")
+
+        state = WidgetState(id=widget.id)
+        if STRING_CHOICES:
+            state.string_value = option
+        else:
+            state.int_value = options.index(option)
+        self.states[widget.id] = state
+
+    async def run(self, script: List[Tuple[str, str, str]], iterations: int, think_time: float) -> SessionResult:
+        """Open the app and walk through ``script`` ``iterations`` times"""
+        result = SessionResult()
+        try:
+            async with websockets.connect(self.url, max_size=None, open_timeout=self.timeout) as ws:
+                result.add("initial load", await self.rerun(ws))
+                for _ in range(iterations):
+                    for widget_type, label, option in script:
+                        await asyncio.sleep(random.uniform(0.5, 1.5) * think_time)
+                        self.select(widget_type, label, option)
+                        result.add(f"{label} → {option}", await self.rerun(ws))
+        except Exception as e:
+            result.errors.append(f"{type(e).__name__}: {e}")
+        return result
+
+
+def read_rss(pid: Optional[int]) -> Optional[int]:
+    """Resident set size of ``pid`` in bytes"""
+    if pid is None:
+        return None
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean/max in milliseconds"""
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1),
+    }
+
+
+async def sample_rss(pid: Optional[int], samples: List[int], interval: float = 0.5):
+    """Record server RSS until cancelled"""
+    while True:
+        rss = read_rss(pid)
+        if rss is not None:
+            samples.append(rss)
+        await asyncio.sleep(interval)
+
+
+async def run_load_test(args, pid: Optional[int]) -> dict:
+    """Start the sessions, wait for them to finish and build the report"""
+    url = args.url.rstrip("/").replace("http://", "ws://").replace("https://", "wss://") + "/_stcore/stream"
+    script = SCRIPTS[args.script]
+    rss_before = read_rss(pid)
+    rss_samples: List[int] = []
+    sampler = asyncio.create_task(sample_rss(pid, rss_samples))
+
+    async def start_session(index: int) -> SessionResult:
+        await asyncio.sleep(args.ramp * index / max(1, args.sessions))
+        session = SimulatedSession(url, args.timeout)
+        return await session.run(script, args.iterations, args.think_time)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(start_session(i) for i in range(args.sessions)))
+    wall = time.perf_counter() - start
+    sampler.cancel()
+
+    # Let the server settle so per-session memory is not just transient garbage
+    await asyncio.sleep(1)
+    rss_after = read_rss(pid)
+
+    per_step: Dict[str, List[float]] = {}
+    errors = []
+    for result in results:
+        errors.extend(result.errors)
+        for step, values in result.latencies.items():
+            per_step.setdefault(step, []).extend(values)
+    all_latencies = [value for values in per_step.values() for value in values]
+
+    report = {
+        "url": args.url,
+        "script": args.script,
+        "sessions": args.sessions,
+        "iterations": args.iterations,
+        "wall_seconds": round(wall, 2),
+        "reruns": len(all_latencies),
+        "throughput_reruns_per_s": round(len(all_latencies) / wall, 2) if wall else 0.0,
+        "failed_sessions": sum(1 for result in results if result.errors),
+        "errors": errors[:20],
+        "latency": summarize(all_latencies) if all_latencies else {},
+        "latency_by_step": {step: summarize(values) for step, values in per_step.items()},
+    }
+    if rss_before is not None and rss_after is not None:
+        report["server_rss"] = {
+            "before_mb": round(rss_before / 2**20, 1),
+            "after_mb": round(rss_after / 2**20, 1),
+            "peak_mb": round(max(rss_samples + [rss_after]) / 2**20, 1),
+            "growth_per_session_mb": round((rss_after - rss_before) / 2**20 / args.sessions, 2),
+        }
+    return report
+
+
+def launch_server(port: int) -> subprocess.Popen:
+    """Start app.py headless and wait until it accepts connections"""
+    import urllib.request
+
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", app_path,
+         "--server.headless", "true", "--server.port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError(f"Streamlit did not start on port {port}")
+
+
+def print_report(report: dict):
+    """Human-readable summary"""
+    print(f"\nSessions: {report['sessions']}  Reruns: {report['reruns']}  "
+          f"Wall: {report['wall_seconds']}s  Throughput: {report['throughput_reruns_per_s']} reruns/s")
+    if report["latency"]:
+        lat = report["latency"]
+        print(f"Rerun latency: p50 {lat['p50_ms']} ms | p95 {lat['p95_ms']} ms | p99 {lat['p99_ms']} ms | max {lat['max_ms']} ms")
+    print("\nPer step:")
+    for step, lat in report["latency_by_step"].items():
+        print(f"  {step:<40} p50 {lat['p50_ms']:>8} ms  p95 {lat['p95_ms']:>8} ms  p99 {lat['p99_ms']:>8} ms")
+    if "server_rss" in report:
+        rss = report["server_rss"]
+        print(f"\nServer RSS: {rss['before_mb']} MB → {rss['after_mb']} MB (peak {rss['peak_mb']} MB, "
+              f"{rss['growth_per_session_mb']} MB per session)")
+    if report["failed_sessions"]:
+        print(f"\n⚠️  {report['failed_sessions']} session(s) failed, e.g. {report['errors'][0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the CSR dashboard")
+    parser.add_argument("--url", default="http://localhost:8501", help="Base URL of the running app")
+    parser.add_argument("--sessions", type=int, default=40, help="Number of simulated sessions")
+    parser.add_argument("--iterations", type=int, default=1, help="Times each session repeats the script")
+    parser.add_argument("--script", choices=sorted(SCRIPTS), default="review", help="Navigation script")
+    parser.add_argument("--ramp", type=float, default=10.0, help="Seconds over which sessions are started")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Average pause between steps in seconds")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for one rerun")
+    parser.add_argument("--server-pid", type=int, default=None, help="PID of the Streamlit server for RSS")
+    parser.add_argument("--launch", action="store_true", help="Start app.py on --port for the duration of the test")
+    parser.add_argument("--port", type=int, default=8599, help="Port used with --launch")
+    parser.add_argument("--output", default=None, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    proc = None
+    pid = args.server_pid
+    if args.launch:
+        proc = launch_server(args.port)
+        pid = proc.pid
+        args.url = f"http://localhost:{args.port}"
+
+    try:
+        report = asyncio.run(run_load_test(args, pid))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["failed_sessions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
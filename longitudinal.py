@@ -0,0 +1,144 @@
+"""
+Longitudinal Module for CSR Dashboard
+Sorted (beneficiary, visit date) index over screening rows for baseline →
+follow-up deltas, as-of lookups and cohort averages without self-joins
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from cubes import activity_dates
+from entity_resolution import get_entity_index
+
+# Measurement columns (lower case) tracked over time
+MEASURES = {
+    "haemoglobin": ["haemoglobin", "hemoglobin", "hb"],
+    "weight": ["weight"],
+    "height": ["height"],
+}
+
+
+class MeasureSeries:
+    """One measure's readings sorted by beneficiary code, then visit date"""
+
+    def __init__(self, codes: np.ndarray, days: np.ndarray, values: np.ndarray, programs: np.ndarray):
+        self.codes = codes
+        self.days = days
+        self.values = values
+        self.programs = programs
+        # Composite key keeps lexicographic (code, day) order in one int64
+        self.span = int(days.max() - days.min() + 2) if len(days) else 1
+        self.day0 = int(days.min()) if len(days) else 0
+        self.keys = codes * self.span + (days - self.day0)
+        boundaries = np.flatnonzero(np.diff(codes)) + 1 if len(codes) else np.empty(0, dtype=np.int64)
+        self.starts = np.concatenate(([0], boundaries)) if len(codes) else boundaries
+        self.ends = np.concatenate((boundaries, [len(codes)])) if len(codes) else boundaries
+
+    def first_last(self) -> pd.DataFrame:
+        """Baseline and latest reading per beneficiary (one linear pass)"""
+        first, last = self.starts, self.ends - 1
+        return pd.DataFrame({
+            "code": self.codes[first],
+            "visits": self.ends - self.starts,
+            "baseline_day": self.days[first],
+            "latest_day": self.days[last],
+            "baseline": self.values[first],
+            "latest": self.values[last],
+        })
+
+    def asof(self, codes: np.ndarray, days: np.ndarray) -> np.ndarray:
+        """Latest reading on or before each (code, day); NaN when none"""
+        # Days outside the recorded range are clipped so the offset stays
+        # inside this code's key range instead of reaching a neighbour's
+        offsets = np.clip(np.asarray(days, dtype=np.int64) - self.day0, -1, self.span - 1)
+        query = np.asarray(codes, dtype=np.int64) * self.span + offsets
+        pos = np.searchsorted(self.keys, query, side="right") - 1
+        found = (pos >= 0) & (self.codes[np.maximum(pos, 0)] == codes)
+        return np.where(found, self.values[np.maximum(pos, 0)], np.nan)
+
+
+class LongitudinalIndex:
+    """Per-measure sorted readings keyed by resolved beneficiary ID"""
+
+    def __init__(self, beneficiaries: np.ndarray, series: Dict[str, MeasureSeries]):
+        self.beneficiaries = beneficiaries
+        self.series = series
+
+    @property
+    def measures(self) -> List[str]:
+        """Measures with at least one reading"""
+        return [name for name, s in self.series.items() if len(s.codes)]
+
+    def deltas(self, measure: str, programs: Optional[List[str]] = None, min_days: int = 1) -> pd.DataFrame:
+        """
+        Baseline, latest and change per beneficiary with readings at least
+        ``min_days`` apart.
+        """
+        series = self.series.get(measure)
+        if series is None or not len(series.codes):
+            return pd.DataFrame(columns=["beneficiary_id", "visits", "baseline", "latest", "change", "days"])
+        if programs is not None:
+            keep = np.isin(series.programs, programs)
+            series = MeasureSeries(series.codes[keep], series.days[keep], series.values[keep], series.programs[keep])
+        result = series.first_last()
+        result["days"] = result["latest_day"] - result["baseline_day"]
+        result = result[result["days"] >= min_days].copy()
+        result["change"] = result["latest"] - result["baseline"]
+        result.insert(0, "beneficiary_id", self.beneficiaries[result["code"].to_numpy()])
+        return result[["beneficiary_id", "visits", "baseline", "latest", "change", "days"]].reset_index(drop=True)
+
+    def cohort_summary(self, measure: str, programs: Optional[List[str]] = None) -> Dict[str, float]:
+        """Cohort size and average baseline, latest and change"""
+        deltas = self.deltas(measure, programs)
+        if deltas.empty:
+            return {"cohort": 0}
+        return {
+            "cohort": len(deltas),
+            "baseline": float(deltas["baseline"].mean()),
+            "latest": float(deltas["latest"].mean()),
+            "change": float(deltas["change"].mean()),
+            "improved_share": float((deltas["change"] > 0).mean()),
+        }
+
+
+def build_longitudinal_index(data_loader) -> LongitudinalIndex:
+    """Collect every dated reading under its resolved beneficiary ID"""
+    entities = get_entity_index(data_loader)
+    frames = []
+    for key in data_loader.get_all_keys():
+        ids = entities.ids_for(key)
+        if ids is None:
+            continue
+        df = data_loader.get_data(key)
+        dates = activity_dates(df)
+        if dates is None:
+            continue
+        lookup = {str(col).lower(): col for col in df.columns}
+        readings = pd.DataFrame({"beneficiary_id": ids.reindex(df.index), "date": dates, "program": key})
+        for measure, candidates in MEASURES.items():
+            column = next((lookup[c] for c in candidates if c in lookup), None)
+            readings[measure] = pd.to_numeric(df[column], errors="coerce") if column is not None else np.nan
+        frames.append(readings.dropna(subset=["beneficiary_id", "date"]))
+
+    if not frames:
+        return LongitudinalIndex(np.empty(0, dtype=object), {})
+
+    readings = pd.concat(frames, ignore_index=True)
+    codes, beneficiaries = pd.factorize(readings["beneficiary_id"], sort=True)
+    days = (readings["date"].dt.normalize() - pd.Timestamp(0)).dt.days.to_numpy(dtype=np.int64)
+    programs = readings["program"].to_numpy(dtype=object)
+    # One sort for all measures; each measure keeps its non-null rows
+    order = np.lexsort((days, codes))
+    series = {}
+    for measure in MEASURES:
+        values = readings[measure].to_numpy(dtype="float64")[order]
+        valid = ~np.isnan(values)
+        series[measure] = MeasureSeries(codes[order][valid].astype(np.int64), days[order][valid],
+                                        values[valid], programs[order][valid])
+    return LongitudinalIndex(np.asarray(beneficiaries, dtype=object), series)
+
+
+def get_longitudinal_index(data_loader) -> LongitudinalIndex:
+    """Longitudinal index for the loader's current data version"""
+    return data_loader.get_derived("longitudinal_index", build_longitudinal_index)
@@ -0,0 +1,197 @@
+"""
+Master Data Service for CSR Dashboard
+Builds master lookup lists and the State → District → Block → Village
+hierarchy once per data version
+"""
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+LEVELS = ["State", "District", "Block", "Village"]
+UNSPECIFIED = "Unspecified"
+
+# Column names (lower case) that hold each hierarchy level in program sheets
+LEVEL_COLUMNS = {
+    "State": ["state", "state_name"],
+    "District": ["district"],
+    "Block": ["block"],
+    "Village": ["village", "location", "gram_panchayat"],
+}
+STATE_ID_COLUMNS = ["state_fk_id"]
+
+
+GENDER_VALUES = {
+    "m": "Male", "male": "Male", "boy": "Male",
+    "f": "Female", "female": "Female", "girl": "Female",
+    "o": "Other", "other": "Other", "transgender": "Other",
+}
+
+
+def normalise_gender(values: pd.Series) -> pd.Series:
+    """Map the mixed M/Male/F/Female spellings to Male/Female/Other (else <NA>)"""
+    text = values.astype("string").str.strip().str.lower()
+    return text.map(GENDER_VALUES, na_action="ignore").astype("string")
+
+
+def master_values(df: Optional[pd.DataFrame]) -> List[str]:
+    """
+    Distinct values of a master sheet's value column.
+
+    The value column is the one holding the most text. When it has no real
+    header its first entry is the sheet's own label (e.g. "Locations") and is
+    skipped.
+    """
+    if df is None or df.empty:
+        return []
+    counts = {col: df[col].map(lambda v: isinstance(v, str)).sum() for col in df.columns}
+    column = max(counts, key=counts.get)
+    if counts[column] == 0:
+        return []
+    values = df[column].dropna()
+    values = values[values.map(lambda v: isinstance(v, str))].str.strip()
+    if str(column).startswith("Unnamed:") and len(values):
+        values = values.iloc[1:]
+    return [value for value in pd.unique(values) if value]
+
+
+def master_id_map(df: Optional[pd.DataFrame]) -> Dict[int, str]:
+    """Map the numeric id column of a master sheet to its value column"""
+    if df is None or df.empty:
+        return {}
+    values = master_values(df)
+    names = set(values)
+    name_col = None
+    for col in df.columns:
+        if df[col].isin(names).any():
+            name_col = col
+            break
+    id_col = None
+    for col in df.columns:
+        if col != name_col and pd.api.types.is_numeric_dtype(df[col]) and df[col].notna().any():
+            id_col = col
+            break
+    if name_col is None or id_col is None:
+        return {}
+    pairs = df[[id_col, name_col]].dropna()
+    pairs = pairs[pairs[name_col].isin(names)]
+    return {int(i): str(n).strip() for i, n in zip(pairs[id_col], pairs[name_col])}
+
+
+def _find_column(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
+    """First candidate column (case-insensitive) that holds any data"""
+    lookup = {str(col).lower(): col for col in df.columns}
+    for name in candidates:
+        if name in lookup and df[lookup[name]].notna().any():
+            return lookup[name]
+    return None
+
+
+def _normalise(values: pd.Series) -> pd.Series:
+    """Trim and title-case place names so 'ANGUL' and 'Angul' collapse"""
+    text = values.astype("string").str.strip()
+    return text.where(text != "").str.title()
+
+
+def location_columns(df: pd.DataFrame) -> Dict[str, Optional[str]]:
+    """Source column for each hierarchy level (plus the state id) in one sheet"""
+    columns = {level: _find_column(df, names) for level, names in LEVEL_COLUMNS.items()}
+    columns["state_id"] = _find_column(df, STATE_ID_COLUMNS)
+    return columns
+
+
+def location_frame(df: pd.DataFrame, state_ids: Dict[int, str]) -> Optional[pd.DataFrame]:
+    """Extract normalised State/District/Block/Village columns from one sheet"""
+    columns = location_columns(df)
+    if columns["District"] is None and columns["Village"] is None:
+        return None
+
+    out = pd.DataFrame(index=df.index)
+    if columns["State"] is not None:
+        out["State"] = _normalise(df[columns["State"]])
+    else:
+        state_id = columns["state_id"]
+        if state_id is not None:
+            ids = pd.to_numeric(df[state_id], errors="coerce")
+            out["State"] = ids.map(state_ids).astype("string")
+        else:
+            out["State"] = pd.Series(pd.NA, index=df.index, dtype="string")
+    for level in LEVELS[1:]:
+        column = columns[level]
+        out[level] = _normalise(df[column]) if column is not None else pd.Series(pd.NA, index=df.index, dtype="string")
+    return out
+
+
+def fill_unspecified(places: pd.DataFrame) -> pd.DataFrame:
+    """Keep deeper levels reachable when an intermediate level is blank"""
+    places = places.copy()
+    for depth in range(len(LEVELS) - 2, 0, -1):
+        deeper = places[LEVELS[depth + 1:]].notna().any(axis=1)
+        places.loc[deeper & places[LEVELS[depth]].isna(), LEVELS[depth]] = UNSPECIFIED
+    return places
+
+
+class MasterDataIndex:
+    """Master lookup lists and a precomputed parent → children index"""
+
+    def __init__(self, states: List[str], locations: List[str], sdgs: List[str], children: Dict[Tuple[str, ...], List[str]]):
+        self.states = states
+        self.locations = locations
+        self.sdgs = sdgs
+        self._children = children
+
+    def children(self, *path: str) -> List[str]:
+        """
+        Child names below ``path``: no arguments gives the states, one state
+        gives its districts, and so on down to villages.
+        """
+        return self._children.get(tuple(path), [])
+
+    def size(self) -> Dict[str, int]:
+        """Number of distinct names at each level"""
+        counts = {level: 0 for level in LEVELS}
+        for path, names in self._children.items():
+            counts[LEVELS[len(path)]] += len(names)
+        return counts
+
+
+def build_master_index(data_loader) -> MasterDataIndex:
+    """Build the index from the master sheets and every program sheet"""
+    state_master = data_loader.get_data("CSR_MIS_State Master")
+    states = master_values(state_master)
+    state_ids = master_id_map(state_master)
+    locations = master_values(data_loader.get_data("CSR_MIS_Location Master"))
+    sdgs = master_values(data_loader.get_data("CSR_MIS_SDG Master"))
+
+    frames = []
+    for key in data_loader.get_all_keys():
+        if "master" in key.lower():
+            continue
+        df = data_loader.get_data(key)
+        if df is None or df.empty:
+            continue
+        frame = location_frame(df, state_ids)
+        if frame is not None:
+            frames.append(frame.drop_duplicates())
+
+    children: Dict[Tuple[str, ...], List[str]] = {}
+    if frames:
+        places = pd.concat(frames, ignore_index=True).drop_duplicates()
+        places = fill_unspecified(places.dropna(subset=["State"]))
+        for depth in range(1, len(LEVELS)):
+            parents, child = LEVELS[:depth], LEVELS[depth]
+            level = places.dropna(subset=[child])[parents + [child]].drop_duplicates()
+            for path, group in level.groupby(parents, sort=False):
+                path = path if isinstance(path, tuple) else (path,)
+                children[tuple(path)] = sorted(group[child].tolist())
+        known_states = set(places["State"].dropna())
+    else:
+        known_states = set()
+
+    # States with data first, then the rest of the State Master
+    children[()] = sorted(known_states) + [s for s in states if s not in known_states]
+    return MasterDataIndex(states, locations, sdgs, children)
+
+
+def get_master_index(data_loader) -> MasterDataIndex:
+    """Master data index for the loader's current data version"""
+    return data_loader.get_derived("master_index", build_master_index)
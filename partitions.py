@@ -0,0 +1,99 @@
+"""
+Partition Module for CSR Dashboard
+Discovers period-partitioned CSR MIS workbooks and prunes them by date range
+
+A partition directory holds one workbook per period. The period is read from
+the file name:
+    CSR MIS 2024-07.xlsx        month (also 2024_07, 202407)
+    CSR MIS 2024-Q3.xlsx        calendar quarter
+    CSR MIS FY2024-25 Q1.xlsx   financial-year quarter (Q1 = Apr-Jun)
+    CSR MIS FY2024-25.xlsx      financial year (Apr-Mar)
+"""
+import os
+import re
+from calendar import monthrange
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Optional, Tuple
+
+_FY_QUARTER = re.compile(r"FY\s*'?(\d{2,4})(?:\s*[-_/]\s*(\d{2,4}))?\s*[-_ ]*Q([1-4])", re.IGNORECASE)
+_FY_YEAR = re.compile(r"FY\s*'?(\d{2,4})(?:\s*[-_/]\s*(\d{2,4}))?", re.IGNORECASE)
+_QUARTER = re.compile(r"(?<!\d)(\d{4})\s*[-_ ]\s*Q([1-4])", re.IGNORECASE)
+_MONTH = re.compile(r"(?<!\d)(\d{4})\s*[-_]?\s*(0[1-9]|1[0-2])(?!\d)")
+
+
+@dataclass(frozen=True)
+class Partition:
+    """One workbook covering a closed date range"""
+    path: str
+    label: str
+    start: date
+    end: date
+
+    def overlaps(self, start: Optional[date], end: Optional[date]) -> bool:
+        """True when the partition shares at least one day with [start, end]"""
+        return (start is None or self.end >= start) and (end is None or self.start <= end)
+
+
+def _full_year(value: str) -> int:
+    year = int(value)
+    return year + 2000 if year < 100 else year
+
+
+def _month_end(year: int, month: int) -> date:
+    return date(year, month, monthrange(year, month)[1])
+
+
+def parse_period(filename: str) -> Optional[Tuple[date, date, str]]:
+    """Return (start, end, label) for a partition file name, or None"""
+    name = os.path.splitext(os.path.basename(filename))[0]
+
+    match = _FY_QUARTER.search(name)
+    if match:
+        fy_start = _full_year(match.group(1))
+        quarter = int(match.group(3))
+        month = 4 + 3 * (quarter - 1)
+        year = fy_start if month <= 12 else fy_start + 1
+        if month > 12:
+            month -= 12
+        return date(year, month, 1), _month_end(year, month + 2), f"FY{fy_start}-{(fy_start + 1) % 100:02d} Q{quarter}"
+
+    match = _FY_YEAR.search(name)
+    if match:
+        fy_start = _full_year(match.group(1))
+        return date(fy_start, 4, 1), date(fy_start + 1, 3, 31), f"FY{fy_start}-{(fy_start + 1) % 100:02d}"
+
+    match = _QUARTER.search(name)
+    if match:
+        year, quarter = int(match.group(1)), int(match.group(2))
+        month = 1 + 3 * (quarter - 1)
+        return date(year, month, 1), _month_end(year, month + 2), f"{year}-Q{quarter}"
+
+    match = _MONTH.search(name)
+    if match:
+        year, month = int(match.group(1)), int(match.group(2))
+        return date(year, month, 1), _month_end(year, month), f"{year}-{month:02d}"
+
+    return None
+
+
+def discover_partitions(directory: str) -> List[Partition]:
+    """List the dated workbooks in ``directory`` ordered by period start"""
+    partitions = []
+    for entry in sorted(os.listdir(directory)):
+        # Skip Excel lock files and anything that is not a workbook
+        if entry.startswith("~$") or not entry.lower().endswith((".xlsx", ".xlsm", ".xls")):
+            continue
+        period = parse_period(entry)
+        if period is None:
+            print(f"Warning: Skipping '{entry}' - no period found in file name")
+            continue
+        start, end, label = period
+        partitions.append(Partition(os.path.join(directory, entry), label, start, end))
+    partitions.sort(key=lambda p: (p.start, p.end, p.path))
+    return partitions
+
+
+def prune(partitions: List[Partition], start: Optional[date] = None, end: Optional[date] = None) -> List[Partition]:
+    """Partitions that overlap [start, end]"""
+    return [p for p in partitions if p.overlaps(start, end)]
@@ -0,0 +1,173 @@
+"""
+Query Cache Module for CSR Dashboard
+Process-wide cache of report and filter results shared by every session and
+the JSON API, keyed by the normalised query and the data version
+
+Keys are normalised so the same question asked in a different way (programs
+picked in another order) finds the same entry; pass unordered selections
+such as program sets as sets. Entries expire after a TTL and the least
+recently used ones are evicted once the cache is over its memory cap.
+Concurrent requests for the same missing key compute it once. Cached values
+are shared: treat them as read-only.
+"""
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+from instrumentation import dataframe_memory, log_event, metrics
+
+DEFAULT_MAX_MB = float(os.environ.get("CSR_QUERY_CACHE_MB", "64"))
+DEFAULT_TTL = float(os.environ.get("CSR_QUERY_CACHE_TTL", "600"))
+
+
+def normalise(value: Any) -> Hashable:
+    """Hashable form of a query parameter, independent of ordering"""
+    if isinstance(value, (set, frozenset)):
+        # Program sets: the order they were picked in does not matter
+        return tuple(sorted((normalise(item) for item in value), key=str))
+    if isinstance(value, (list, tuple)):
+        return tuple(normalise(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), normalise(item)) for key, item in value.items()))
+    if isinstance(value, (date, datetime, pd.Timestamp)):
+        return value.isoformat()
+    return value
+
+
+def query_key(name: str, data_version: str, **params: Any) -> Tuple:
+    """Cache key of a named query with its parameters"""
+    return (name, data_version) + tuple(sorted((key, normalise(value)) for key, value in params.items()))
+
+
+def value_size(value: Any) -> int:
+    """Approximate memory held by a cached value"""
+    if isinstance(value, pd.DataFrame):
+        return dataframe_memory(value)
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 1024
+
+
+class QueryCache:
+    """Thread-safe LRU cache with a TTL and a memory cap"""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # key -> (value, size, expires)
+        self._entries: "OrderedDict[Tuple, Tuple[Any, int, float]]" = OrderedDict()
+        self._computing: Dict[Tuple, threading.Lock] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, key: Tuple) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, size, expires = entry
+            if expires < time.monotonic():
+                self._remove(key)
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def _remove(self, key: Tuple):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def put(self, key: Tuple, value: Any):
+        size = value_size(value)
+        if size > self.max_bytes:
+            # Larger than the whole cache: not worth evicting everything for
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + self.ttl)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+                metrics.increment("query_cache.evictions")
+
+    def get_or_compute(self, key: Tuple, compute: Callable[[], Any]) -> Any:
+        """Cached value for ``key``, computing (once) when missing"""
+        name = key[0]
+        found, value = self._lookup(key)
+        if not found:
+            with self._lock:
+                key_lock = self._computing.setdefault(key, threading.Lock())
+            with key_lock:
+                # Another session may have computed it while this one waited
+                found, value = self._lookup(key)
+                if not found:
+                    start = time.perf_counter()
+                    value = compute()
+                    self.put(key, value)
+                    log_event("query_cache.miss", query=name, seconds=time.perf_counter() - start)
+            with self._lock:
+                self._computing.pop(key, None)
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        metrics.record_cache(f"query.{name}", found)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_cache_lock = threading.Lock()
+_cache: Optional[QueryCache] = None
+
+
+def get_query_cache() -> QueryCache:
+    """The process-wide query cache (CSR_QUERY_CACHE_MB, CSR_QUERY_CACHE_TTL)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryCache(int(DEFAULT_MAX_MB * 1024 * 1024), DEFAULT_TTL)
+        return _cache
+
+
+def cached_query(data_loader, name: str, compute: Callable[[], Any], **params: Any) -> Any:
+    """
+    Result of ``compute`` for this query and the loader's data version,
+    shared across sessions. Nothing is cached while data is still loading.
+    """
+    if data_loader.loading:
+        return compute()
+    # Sessions limited to a location scope (scoped_views.py) get their own entries
+    scope = getattr(data_loader, "scope", ())
+    return get_query_cache().get_or_compute(query_key(name, data_loader.data_version, scope=scope, **params), compute)
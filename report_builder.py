@@ -0,0 +1,427 @@
+"""
+Report Builder Module for CSR Dashboard
+Offline board-pack builder: one multi-page report per program with KPI
+tables and charts, written as HTML or PDF
+
+The data for every program is gathered first (from the time cubes and
+sketches), then all charts of all programs are rendered as static images in
+one process pool. Rendered charts are cached under .csr_cache/report_images/
+by a fingerprint of the chart's data, so a rebuild only renders charts whose
+numbers changed.
+Static images need kaleido and PDF pages are assembled with Pillow (both in
+requirements.txt); without kaleido HTML reports embed interactive charts,
+rendered in-process, and PDF output is unavailable.
+
+Usage:
+    python report_builder.py --start 2024-04-01 --end 2025-03-31
+    python report_builder.py --programs Vatsalya Subhangi --format pdf --workers 4
+"""
+import argparse
+import base64
+import hashlib
+import html
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+from string import Template
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from charts import create_bar_chart, create_donut_chart, create_waterfall_chart
+from cubes import get_time_cubes
+from entity_resolution import CACHE_DIR
+from instrumentation import log_event, metrics, timer
+from kpis import PROGRAM_KEYS
+from sketches import get_beneficiary_sketches, get_distribution_sketches
+
+REPORT_DIR = os.environ.get("CSR_REPORT_DIR", "reports")
+IMAGE_CACHE_DIR = "report_images"
+FORMATS = ("html", "pdf")
+# Rendered chart size in pixels (scaled up for print)
+IMAGE_WIDTH = 900
+IMAGE_HEIGHT = 420
+IMAGE_SCALE = 2
+# A4 at 150 dpi
+PAGE_SIZE = (1240, 1754)
+PAGE_MARGIN = 60
+# Largest waterfall before the remaining states are grouped
+MAX_WATERFALL_BARS = 10
+
+REPORT_TEMPLATE = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+$head
+<style>
+body { font-family: Arial, sans-serif; color: #1f2937; max-width: 960px; margin: 2rem auto; }
+h1 { color: #4338ca; margin-bottom: 0; }
+.period { color: #6b7280; margin-top: 0.25rem; }
+table { border-collapse: collapse; width: 100%; margin-bottom: 2rem; }
+th, td { border-bottom: 1px solid #e5e7eb; padding: 0.5rem; text-align: left; }
+td.value { text-align: right; font-weight: bold; }
+.chart { page-break-inside: avoid; margin-bottom: 2rem; }
+.chart img { width: 100%; }
+.footer { color: #9ca3af; font-size: 0.8rem; }
+</style>
+</head>
+<body>
+<h1>$title</h1>
+<p class="period">$period</p>
+<h2>Key Indicators</h2>
+$kpi_table
+$charts
+<p class="footer">Generated $generated &middot; data version $version</p>
+</body>
+</html>
+""")
+INDEX_TEMPLATE = Template("""<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>CSR Board Pack</title></head>
+<body style="font-family: Arial, sans-serif; max-width: 960px; margin: 2rem auto;">
+<h1>CSR Board Pack</h1>
+<p>$period</p>
+<ul>
+$links
+</ul>
+</body>
+</html>
+""")
+PLOTLY_JS = '<script src="https://cdn.plot.ly/plotly-2.35.2.min.js"></script>'
+
+
+@dataclass(frozen=True)
+class ChartSpec:
+    """Everything needed to draw one chart, as plain (picklable) data"""
+    kind: str
+    title: str
+    data: Tuple[Tuple[str, Tuple], ...]
+
+    def fingerprint(self) -> str:
+        payload = json.dumps([self.kind, self.title, self.data], default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+    def columns(self) -> Dict[str, list]:
+        return {name: list(values) for name, values in self.data}
+
+
+@dataclass
+class ProgramReport:
+    """Gathered content of one program's report"""
+    program: str
+    kpis: List[Tuple[str, str]]
+    charts: List[ChartSpec]
+    seconds: float = 0.0
+
+
+@dataclass
+class ReportResult:
+    """One written report and how long it took"""
+    program: str
+    path: str
+    seconds: float
+    charts: int
+    cached_charts: int
+    chart_seconds: float = 0.0
+
+
+def has_static_export() -> bool:
+    """True when plotly can write static images (kaleido is installed)"""
+    return importlib.util.find_spec("kaleido") is not None
+
+
+def _spec(kind: str, title: str, **columns: Sequence) -> ChartSpec:
+    return ChartSpec(kind, title, tuple(
+        (name, tuple(values.tolist() if hasattr(values, "tolist") else values)) for name, values in columns.items()
+    ))
+
+
+def program_report(data_loader, program: str, start: Optional[date], end: Optional[date]) -> ProgramReport:
+    """KPI rows and chart specs of one program for a period"""
+    began = time.perf_counter()
+    key = data_loader.resolve_program_key(PROGRAM_KEYS.get(program, program))
+    if key is None:
+        return ProgramReport(program, [("Records", "No data sheet found")], [], time.perf_counter() - began)
+
+    cubes = get_time_cubes(data_loader)
+    totals = cubes.totals([key], start, end)
+    in_period = int(totals.loc[key, "count"]) if key in totals.index else 0
+    kpis = [
+        ("Records in period", f"{in_period:,}"),
+        ("Records (all time)", f"{data_loader.get_row_count(key):,}"),
+    ]
+    beneficiaries = get_beneficiary_sketches(data_loader)
+    if key in beneficiaries.programs:
+        kpis.append(("Unique beneficiaries in period", f"{beneficiaries.unique([key], start, end):,}"))
+    ages = get_distribution_sketches(data_loader).merged("age", [key], start, end)
+    if len(ages):
+        kpis.append(("Median age", f"{ages.quantile(0.5):.0f} yrs"))
+    for measure in cubes.measures:
+        if key in totals.index and totals.loc[key, measure] > 0:
+            kpis.append((measure.replace("_", " ").capitalize(), f"{totals.loc[key, measure]:,.0f}"))
+
+    charts = []
+    monthly = cubes.query("M", [key], start, end, by=["program"])
+    if not monthly.empty:
+        charts.append(_spec("bar", f"{program}: Records per Month",
+                            Month=monthly["period"].dt.strftime("%b %Y"), Records=monthly["count"]))
+    by_gender = cubes.query("M", [key], start, end, by=["gender"]).groupby("gender", observed=True)["count"].sum()
+    by_gender = by_gender[by_gender > 0]
+    if not by_gender.empty:
+        charts.append(_spec("donut", f"{program}: Records by Gender",
+                            labels=by_gender.index.astype(str), values=by_gender.astype(int)))
+    by_state = cubes.query("M", [key], start, end, by=["state"]).groupby("state", observed=True)["count"].sum()
+    by_state = by_state[by_state > 0].sort_values(ascending=False)
+    if not by_state.empty:
+        if len(by_state) > MAX_WATERFALL_BARS:
+            rest = by_state.iloc[MAX_WATERFALL_BARS - 1:].sum()
+            by_state = pd.concat([by_state.iloc[:MAX_WATERFALL_BARS - 1], pd.Series({"Other": rest})])
+        categories = list(by_state.index.astype(str)) + ["Total"]
+        values = [int(v) for v in by_state] + [int(by_state.sum())]
+        charts.append(_spec("waterfall", f"{program}: Contribution by State", categories=categories, values=values))
+    return ProgramReport(program, kpis, charts, time.perf_counter() - began)
+
+
+def build_figure(spec: ChartSpec):
+    """Plotly figure for a chart spec"""
+    columns = spec.columns()
+    if spec.kind == "bar":
+        return create_bar_chart(pd.DataFrame(columns), "Month", "Records", spec.title)
+    if spec.kind == "donut":
+        return create_donut_chart(columns["labels"], columns["values"], spec.title)
+    if spec.kind == "waterfall":
+        return create_waterfall_chart(columns["categories"], columns["values"], spec.title)
+    if spec.kind == "table":
+        import plotly.graph_objects as go
+
+        fig = go.Figure(go.Table(
+            header=dict(values=["Indicator", "Value"], fill_color="#667eea", font=dict(color="white", size=14)),
+            cells=dict(values=[columns["Indicator"], columns["Value"]], align=["left", "right"], height=30,
+                       font=dict(size=13)),
+        ))
+        fig.update_layout(title=spec.title, height=120 + 30 * len(columns["Indicator"]),
+                          margin=dict(l=20, r=20, t=60, b=10))
+        return fig
+    raise ValueError(f"Unknown chart kind: {spec.kind}")
+
+
+def render_chart(spec: ChartSpec, static: bool) -> Tuple[bytes, float]:
+    """Render one chart to PNG bytes (static) or an HTML fragment; runs in a worker process"""
+    began = time.perf_counter()
+    fig = build_figure(spec)
+    if static:
+        height = fig.layout.height or IMAGE_HEIGHT
+        content = fig.to_image(format="png", width=IMAGE_WIDTH, height=height, scale=IMAGE_SCALE)
+    else:
+        content = fig.to_html(full_html=False, include_plotlyjs=False).encode()
+    return content, time.perf_counter() - began
+
+
+def _cache_path(cache_dir: str, spec: ChartSpec, static: bool) -> str:
+    return os.path.join(cache_dir, f"{spec.fingerprint()}.{'png' if static else 'html'}")
+
+
+def render_charts(specs: List[ChartSpec], static: bool, workers: Optional[int] = None,
+                  cache_dir: Optional[str] = None) -> Dict[str, Tuple[bytes, float, bool]]:
+    """
+    Rendered content of every spec by fingerprint, as (content, render
+    seconds, cached). Charts not in the image cache are rendered in parallel.
+    """
+    cache_dir = cache_dir or os.path.join(CACHE_DIR, IMAGE_CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    rendered: Dict[str, Tuple[bytes, float, bool]] = {}
+    missing: Dict[str, ChartSpec] = {}
+    for spec in specs:
+        path = _cache_path(cache_dir, spec, static)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                rendered[spec.fingerprint()] = (f.read(), 0.0, True)
+            metrics.record_cache("report.chart", True)
+        else:
+            missing[spec.fingerprint()] = spec
+            metrics.record_cache("report.chart", False)
+
+    # Interactive HTML fragments take milliseconds; only static images are
+    # worth starting processes for
+    workers = min(workers or os.cpu_count() or 1, len(missing)) if static else 1
+    if workers > 1:
+        # spawn: forking a process with Streamlit's threads running is unsafe
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {fingerprint: pool.submit(render_chart, spec, static) for fingerprint, spec in missing.items()}
+            results = {fingerprint: future.result() for fingerprint, future in futures.items()}
+    else:
+        results = {fingerprint: render_chart(spec, static) for fingerprint, spec in missing.items()}
+
+    for fingerprint, (content, seconds) in results.items():
+        path = _cache_path(cache_dir, missing[fingerprint], static)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(content)
+        os.replace(f"{path}.tmp", path)
+        rendered[fingerprint] = (content, seconds, False)
+    return rendered
+
+
+def _period_label(start: Optional[date], end: Optional[date]) -> str:
+    if start is None and end is None:
+        return "All dates"
+    return f"{start or '…'} to {end or '…'}"
+
+
+def _file_stem(program: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in program).strip("_")
+
+
+def _kpi_spec(report: ProgramReport, period: str) -> ChartSpec:
+    return _spec("table", f"{report.program} ({period})",
+                 Indicator=[name for name, _ in report.kpis], Value=[value for _, value in report.kpis])
+
+
+def write_html(report: ProgramReport, rendered: Dict[str, Tuple[bytes, float, bool]], static: bool,
+               path: str, period: str, version: str):
+    rows = "\n".join(f"<tr><td>{html.escape(name)}</td><td class=\"value\">{html.escape(value)}</td></tr>"
+                     for name, value in report.kpis)
+    sections = []
+    for spec in report.charts:
+        content = rendered[spec.fingerprint()][0]
+        if static:
+            image = base64.b64encode(content).decode()
+            body = f'<img src="data:image/png;base64,{image}" alt="{html.escape(spec.title)}">'
+        else:
+            body = content.decode()
+        sections.append(f'<div class="chart">{body}</div>')
+    page = REPORT_TEMPLATE.substitute(
+        title=html.escape(report.program),
+        head="" if static else PLOTLY_JS,
+        period=html.escape(period),
+        kpi_table=f"<table>{rows}</table>",
+        charts="\n".join(sections),
+        generated=datetime.now().strftime("%Y-%m-%d %H:%M"),
+        version=html.escape(version),
+    )
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(page)
+
+
+def pdf_pages(images: List[bytes]) -> list:
+    """Stack rendered images onto A4 pages"""
+    from PIL import Image
+
+    width, height = PAGE_SIZE
+    usable = width - 2 * PAGE_MARGIN
+    pages, page, y = [], None, PAGE_MARGIN
+    for content in images:
+        image = Image.open(io.BytesIO(content)).convert("RGB")
+        image = image.resize((usable, round(image.height * usable / image.width)))
+        if page is None or y + image.height > height - PAGE_MARGIN:
+            page, y = Image.new("RGB", PAGE_SIZE, "white"), PAGE_MARGIN
+            pages.append(page)
+        page.paste(image, (PAGE_MARGIN, y))
+        y += image.height + PAGE_MARGIN // 2
+    return pages
+
+
+def build_reports(data_loader, programs: Optional[List[str]] = None, start: Optional[date] = None,
+                  end: Optional[date] = None, fmt: str = "html", workers: Optional[int] = None,
+                  out_dir: str = REPORT_DIR) -> List[ReportResult]:
+    """Write one report per program (plus an index or combined PDF) to ``out_dir``"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Format must be one of {', '.join(FORMATS)}")
+    static = has_static_export()
+    if fmt == "pdf":
+        if not static:
+            raise Exception("PDF reports need kaleido: pip install kaleido")
+        if importlib.util.find_spec("PIL") is None:
+            raise Exception("PDF reports need Pillow: pip install pillow")
+
+    programs = programs or list(PROGRAM_KEYS)
+    period = _period_label(start, end)
+    os.makedirs(out_dir, exist_ok=True)
+    began = time.perf_counter()
+
+    with timer("report.gather", programs=len(programs)):
+        # Shared artefacts first, so their one-off build is not billed to the first program
+        get_time_cubes(data_loader)
+        get_beneficiary_sketches(data_loader)
+        get_distribution_sketches(data_loader)
+        reports = [program_report(data_loader, program, start, end) for program in programs]
+    specs = {}
+    for report in reports:
+        if fmt == "pdf":
+            # The KPI table is drawn as an image too, as the first block of the page
+            report.charts.insert(0, _kpi_spec(report, period))
+        specs.update({spec.fingerprint(): spec for spec in report.charts})
+    with timer("report.render", charts=len(specs)):
+        rendered = render_charts(list(specs.values()), static, workers)
+
+    results, all_pages = [], []
+    for report in reports:
+        assemble_start = time.perf_counter()
+        path = os.path.join(out_dir, f"{_file_stem(report.program)}.{fmt}")
+        if fmt == "html":
+            write_html(report, rendered, static, path, period, data_loader.data_version)
+        else:
+            pages = pdf_pages([rendered[spec.fingerprint()][0] for spec in report.charts])
+            pages[0].save(path, save_all=True, append_images=pages[1:], resolution=150)
+            all_pages.extend(pages)
+        assembly = time.perf_counter() - assemble_start
+        chart_results = [rendered[spec.fingerprint()] for spec in report.charts]
+        chart_seconds = sum(seconds for _, seconds, _ in chart_results)
+        results.append(ReportResult(
+            program=report.program,
+            path=path,
+            seconds=report.seconds + chart_seconds + assembly,
+            charts=len(report.charts),
+            cached_charts=sum(cached for _, _, cached in chart_results),
+            chart_seconds=chart_seconds,
+        ))
+        metrics.record_timing("report.program", results[-1].seconds, program=report.program)
+
+    if fmt == "html":
+        links = "\n".join(f'<li><a href="{os.path.basename(r.path)}">{html.escape(r.program)}</a></li>'
+                          for r in results)
+        with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+            f.write(INDEX_TEMPLATE.substitute(period=html.escape(period), links=links))
+    elif all_pages:
+        all_pages[0].save(os.path.join(out_dir, "board_pack.pdf"), save_all=True,
+                          append_images=all_pages[1:], resolution=150)
+
+    total = time.perf_counter() - began
+    log_event("report.built", programs=len(results), charts=len(specs), format=fmt, seconds=total)
+    return results
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the CSR board pack (one report per program)")
+    parser.add_argument("--programs", nargs="*", help=f"Program names (default: all of {', '.join(PROGRAM_KEYS)})")
+    parser.add_argument("--start", type=_parse_date, help="YYYY-MM-DD")
+    parser.add_argument("--end", type=_parse_date, help="YYYY-MM-DD")
+    parser.add_argument("--format", choices=FORMATS, default="html")
+    parser.add_argument("--workers", type=int, default=None, help="Rendering processes (default: CPU count)")
+    parser.add_argument("--out", default=REPORT_DIR, help="Output directory")
+    args = parser.parse_args()
+
+    from data_store import get_loader
+
+    began = time.perf_counter()
+    results = build_reports(get_loader(), args.programs, args.start, args.end, args.format, args.workers, args.out)
+    for result in results:
+        print(f"{result.program:40s} {result.seconds:6.2f}s  "
+              f"{result.charts} charts ({result.cached_charts} cached)  {result.path}")
+    print(f"Built {len(results)} reports in {time.perf_counter() - began:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
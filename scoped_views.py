@@ -0,0 +1,281 @@
+"""
+Scoped Views Module for CSR Dashboard
+Per-location materialised views for users limited to one State or District
+
+The row positions of every program sheet are grouped by State and by
+(State, District) once per data version, and the slice of a sheet for a
+scope is materialised the first time any session asks for it. A scoped
+session gets a ScopedDataLoader that serves those slices and keeps its own
+derived artefacts (cubes, sketches, quality report) per scope, so sessions
+with the same scope share them and nothing rescans the full registers per
+rerun. Master sheets are shared unfiltered.
+"""
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from change_detection import ChangeSet
+from data_loader import apply_predicate, filter_by_date
+from entity_resolution import EntityIndex
+from instrumentation import metrics, timer
+from master_data import LEVELS, fill_unspecified, get_master_index, location_frame, master_id_map
+
+# Hierarchy levels a scope can be set at
+SCOPE_LEVELS = LEVELS[:2]
+SCOPE_SEPARATOR = "/"
+
+Scope = Tuple[str, ...]
+
+# Derived artefacts that are lookups rather than per-row results; scoped
+# sessions share the full versions
+SHARED_DERIVED = ("date_range", "scope_index", "master_index")
+
+
+def parse_scope(value: Optional[str]) -> Scope:
+    """'Odisha/Angul' -> ('Odisha', 'Angul'); blank means unscoped"""
+    if not value:
+        return ()
+    parts = tuple(part.strip() for part in value.split(SCOPE_SEPARATOR) if part.strip())
+    return parts[:len(SCOPE_LEVELS)]
+
+
+def scope_label(scope: Scope) -> str:
+    return " → ".join(scope) if scope else "All Locations"
+
+
+def _is_master(key: str) -> bool:
+    return "master" in key.lower()
+
+
+class ScopeIndex:
+    """
+    Row positions per scope for each program sheet, computed on first use of
+    a sheet, plus the materialised slices handed out so far
+    """
+
+    def __init__(self, data_loader, state_ids: Dict[int, str]):
+        self.data_loader = data_loader
+        self.state_ids = state_ids
+        self._lock = threading.Lock()
+        self._rows: Dict[str, Dict[Scope, np.ndarray]] = {}
+        self._slices: Dict[Tuple[str, Scope], pd.DataFrame] = {}
+        self._derived: Dict[Tuple[str, Scope], Any] = {}
+        self._building: Dict[Tuple[str, Scope], threading.Lock] = {}
+
+    def _sheet_rows(self, key: str) -> Dict[Scope, np.ndarray]:
+        with self._lock:
+            if key in self._rows:
+                return self._rows[key]
+        df = self.data_loader.get_data(key)
+        rows: Dict[Scope, np.ndarray] = {}
+        places = location_frame(df, self.state_ids) if df is not None else None
+        if places is not None:
+            with timer("scoped.index_sheet", sheet=key):
+                # Blank districts under a known block or village are grouped
+                # as "Unspecified", as in the master index the picker lists
+                places = fill_unspecified(places)[SCOPE_LEVELS].reset_index(drop=True)
+                for depth in range(1, len(SCOPE_LEVELS) + 1):
+                    groups = places.groupby(SCOPE_LEVELS[:depth], sort=False, dropna=True).indices
+                    for path, positions in groups.items():
+                        path = path if isinstance(path, tuple) else (path,)
+                        rows[tuple(path)] = positions
+        with self._lock:
+            self._rows[key] = rows
+        return rows
+
+    def row_positions(self, key: str, scope: Scope) -> np.ndarray:
+        """Positions of a sheet's rows inside ``scope``"""
+        return self._sheet_rows(key).get(scope, np.empty(0, dtype=np.intp))
+
+    def row_count(self, key: str, scope: Scope) -> int:
+        if _is_master(key):
+            return self.data_loader.get_row_count(key)
+        return len(self.row_positions(key, scope))
+
+    def slice(self, key: str, scope: Scope) -> Optional[pd.DataFrame]:
+        """The sheet restricted to ``scope``, built once and shared"""
+        if _is_master(key):
+            return self.data_loader.get_data(key)
+        with self._lock:
+            found = self._slices.get((key, scope))
+        metrics.record_cache("scoped.slice", found is not None)
+        if found is not None:
+            return found
+        df = self.data_loader.get_data(key)
+        if df is None:
+            return None
+        scoped = df.iloc[self.row_positions(key, scope)]
+        with self._lock:
+            self._slices[(key, scope)] = scoped
+        return scoped
+
+    def derived(self, name: str, scope: Scope, build: Callable[[], Any]) -> Any:
+        """An artefact built once per scope (see ScopedDataLoader.get_derived)"""
+        with self._lock:
+            found = (name, scope) in self._derived
+            value = self._derived.get((name, scope))
+            build_lock = self._building.setdefault((name, scope), threading.Lock())
+        if not found:
+            # Sessions with the same scope build it once
+            with build_lock:
+                with self._lock:
+                    found = (name, scope) in self._derived
+                    value = self._derived.get((name, scope))
+                if not found:
+                    with timer(f"scoped.{name}.build", scope=scope_label(scope)):
+                        value = build()
+                    with self._lock:
+                        self._derived[(name, scope)] = value
+        metrics.record_cache(f"scoped.{name}", found)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "indexed_sheets": len(self._rows),
+                "materialised_slices": len(self._slices),
+                "slice_bytes": sum(int(df.memory_usage(deep=False).sum()) for df in self._slices.values()),
+                "derived": len(self._derived),
+            }
+
+
+def build_scope_index(data_loader) -> ScopeIndex:
+    """Empty scope index for the current data version; sheets are indexed on first use"""
+    state_ids = master_id_map(data_loader.get_data("CSR_MIS_State Master"))
+    return ScopeIndex(data_loader, state_ids)
+
+
+def get_scope_index(data_loader) -> ScopeIndex:
+    """Scope index for the loader's current data version"""
+    return data_loader.get_derived("scope_index", build_scope_index)
+
+
+def available_scopes(data_loader) -> List[Scope]:
+    """Every State and (State, District) in the location hierarchy"""
+    master_index = get_master_index(data_loader)
+    scopes = []
+    for state in master_index.children():
+        scopes.append((state,))
+        scopes.extend((state, district) for district in master_index.children(state))
+    return scopes
+
+
+def _scoped_entity_index(loader: "ScopedDataLoader", entities: EntityIndex) -> EntityIndex:
+    """Beneficiary IDs of the scope's rows only (IDs stay those of the full register)"""
+    row_ids = {}
+    for key, ids in entities.row_ids.items():
+        scoped = loader.get_data(key)
+        if scoped is not None:
+            row_ids[key] = ids[ids.index.isin(scoped.index)]
+    return EntityIndex(row_ids, entities.mapping, entities.new_records)
+
+
+def _scoped_changeset(loader: "ScopedDataLoader", changeset: ChangeSet) -> ChangeSet:
+    """
+    Added and edited rows inside the scope, with row positions translated to
+    the scope's slice. Removed rows are no longer placed anywhere and are left out.
+    """
+    frames, rows = [], {}
+    for sheet, group in changeset.changes.groupby("sheet", sort=False):
+        if _is_master(sheet):
+            frames.append(group)
+            continue
+        positions = loader.index.row_positions(sheet, loader.scope)
+        current = group[group["change"] != "removed"]
+        inside = np.isin(current["row"].to_numpy(), positions)
+        current = current[inside].copy()
+        current["row"] = np.searchsorted(positions, current["row"].to_numpy())
+        frames.append(current)
+    for sheet, count in changeset.rows.items():
+        rows[sheet] = count if _is_master(sheet) else loader.get_row_count(sheet)
+    changes = pd.concat(frames, ignore_index=True) if frames else changeset.changes.iloc[0:0]
+    return ChangeSet(changeset.version, changeset.base_version, changeset.base_time, changes, changeset.schema, rows)
+
+
+# Artefacts that keep state on disk are built over the full data once and
+# then narrowed to each scope
+SCOPED_ADAPTERS: Dict[str, Callable[["ScopedDataLoader", Any], Any]] = {
+    "entity_index": _scoped_entity_index,
+    "changeset": _scoped_changeset,
+}
+
+
+class ScopedDataLoader:
+    """
+    Read-only DataLoader view limited to one location scope. Program sheets
+    come from the scope index; anything not overridden here (date range,
+    partitions, memory statistics) is answered by the underlying loader.
+    """
+
+    def __init__(self, data_loader, scope: Scope):
+        self.base = data_loader
+        self.scope = scope
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.base, name)
+
+    @property
+    def index(self) -> ScopeIndex:
+        return get_scope_index(self.base)
+
+    def get_derived(self, name: str, builder: Callable[[Any], Any]) -> Any:
+        """Derived artefacts computed over this scope's rows, shared per scope"""
+        if name in SHARED_DERIVED:
+            return self.base.get_derived(name, builder)
+        if name in SCOPED_ADAPTERS:
+            adapt = SCOPED_ADAPTERS[name]
+            return self.index.derived(name, self.scope, lambda: adapt(self, self.base.get_derived(name, builder)))
+        # Built through the current index, so a new data version starts afresh
+        return self.index.derived(name, self.scope, lambda: builder(self))
+
+    def get_data(self, key: str, columns: Optional[List[str]] = None,
+                 predicate=None) -> Optional[pd.DataFrame]:
+        """The scope's slice of a sheet (see DataLoader.get_data for ``columns``/``predicate``)"""
+        if key not in self.base.data:
+            return None
+        df = self.index.slice(key, self.scope)
+        if df is None:
+            return None
+        df = apply_predicate(df, predicate)
+        if columns is not None:
+            df = df[[col for col in dict.fromkeys(columns) if col in df.columns]]
+        return df
+
+    def get_row_count(self, key: str) -> int:
+        return self.index.row_count(key, self.scope)
+
+    def get_program_data(self, program_name: str, columns: Optional[List[str]] = None,
+                         predicate=None) -> Optional[pd.DataFrame]:
+        key = self.base.resolve_program_key(program_name)
+        return self.get_data(key, columns, predicate) if key is not None else None
+
+    def get_period_data(self, key: str, start=None, end=None) -> Optional[pd.DataFrame]:
+        if self.base.is_period_loaded(start, end):
+            df = self.get_data(key)
+            return filter_by_date(df, start, end) if df is not None else None
+        # Rows of partitions that are not resident are filtered as they are read
+        df = self.base.get_period_data(key, start, end)
+        if df is None or _is_master(key):
+            return df
+        places = location_frame(df, self.index.state_ids)
+        if places is None:
+            return df.iloc[0:0]
+        places = fill_unspecified(places)
+        mask = pd.Series(True, index=df.index)
+        for level, value in zip(SCOPE_LEVELS, self.scope):
+            mask &= places[level] == value
+        return df[mask.fillna(False).to_numpy(dtype=bool)]
+
+    def get_program_data_for_period(self, program_name: str, start=None, end=None) -> Optional[pd.DataFrame]:
+        key = self.base.resolve_program_key(program_name)
+        return self.get_period_data(key, start, end) if key is not None else None
+
+    def get_master_data(self) -> Dict[str, pd.DataFrame]:
+        return self.base.get_master_data()
+
+
+def scoped_loader(data_loader, scope: Scope):
+    """``data_loader`` limited to ``scope`` (the loader itself when unscoped)"""
+    return ScopedDataLoader(data_loader, scope) if scope else data_loader
@@ -0,0 +1,275 @@
+"""
+Search Index Module for CSR Dashboard
+Full-text index over the documents in document_store.py: ranked keyword and
+phrase search with highlighted snippets, filtered by category and program
+
+Text is extracted once per document and added to an SQLite FTS5 inverted
+index kept in the document store's own index database, so a query is a
+lookup of its terms instead of a scan of the files. A background thread
+indexes each upload as it arrives and, on start, any documents added while
+no dashboard was running (e.g. by a bulk --import).
+
+Plain text, CSV, HTML, Word (.docx) and Excel (.xlsx) files are read with
+the standard library; PDFs need pypdf (pip install pypdf).
+
+Usage:
+    python search_index.py                       # index anything not yet indexed
+    python search_index.py --query "Seva Raigarh"
+"""
+import argparse
+import html
+import queue
+import re
+import sys
+import threading
+import time
+import zipfile
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from document_store import DOCUMENT_STORE, Document, DocumentStore
+from instrumentation import log_event, metrics, timer
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+# Longest text kept per document
+MAX_TEXT_CHARS = 2_000_000
+SNIPPET_TOKENS = 16
+# bm25 weights of the name and body columns
+NAME_WEIGHT = 5.0
+BODY_WEIGHT = 1.0
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS document_text USING fts5(
+    name, body, category UNINDEXED, program UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS indexed_documents (
+    doc_id INTEGER PRIMARY KEY,
+    status TEXT NOT NULL,
+    chars INTEGER NOT NULL,
+    indexed REAL NOT NULL
+);
+"""
+
+_TAGS = re.compile(r"<[^>]+>")
+_TERMS = re.compile(r'"([^"]+)"|(\S+)')
+_WORD = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    """One ranked search result"""
+    document: Document
+    snippet: str
+    score: float
+
+
+def _xml_text(archive: zipfile.ZipFile, names: List[str]) -> str:
+    parts = []
+    for name in names:
+        if name in archive.namelist():
+            parts.append(_TAGS.sub(" ", archive.read(name).decode("utf-8", errors="replace")))
+    return html.unescape(" ".join(parts))
+
+
+def extract_text(store: DocumentStore, document: Document) -> Optional[str]:
+    """Searchable text of a document, or None for unsupported files"""
+    path = store.blob_path(document.sha256)
+    name = document.name.lower()
+    if document.is_text or name.endswith((".txt", ".csv", ".md")):
+        with open(path, "rb") as f:
+            text = f.read(MAX_TEXT_CHARS * 4).decode("utf-8", errors="replace")
+        if "html" in document.mime or name.endswith((".html", ".htm")):
+            text = html.unescape(_TAGS.sub(" ", text))
+        return text
+    if name.endswith(".docx"):
+        with zipfile.ZipFile(path) as archive:
+            return _xml_text(archive, ["word/document.xml"])
+    if name.endswith(".xlsx"):
+        with zipfile.ZipFile(path) as archive:
+            return _xml_text(archive, ["xl/sharedStrings.xml"])
+    if name.endswith(".pdf") or document.mime == "application/pdf":
+        if PdfReader is None:
+            return None
+        reader = PdfReader(path)
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+    return None
+
+
+def match_expression(query: str) -> str:
+    """
+    FTS5 expression for a user query: every word and "quoted phrase" must
+    occur; a trailing * matches word prefixes. Other FTS syntax is ignored.
+    """
+    terms = []
+    for phrase, word in _TERMS.findall(query):
+        words = _WORD.findall(phrase or word)
+        if not words:
+            continue
+        term = '"' + " ".join(words) + '"'
+        if word.endswith("*") and len(words) == 1:
+            term += "*"
+        terms.append(term)
+    return " ".join(terms)
+
+
+class SearchIndex:
+    """FTS5 index stored next to a DocumentStore's metadata"""
+
+    def __init__(self, store: DocumentStore):
+        self.store = store
+        with store._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def index_document(self, document: Document) -> str:
+        """Extract and index one document; returns its index status"""
+        try:
+            with timer("search.extract", mime=document.mime):
+                text = extract_text(self.store, document)
+        except Exception as e:
+            print(f"Warning: Could not read text from {document.name}: {str(e)}")
+            text = None
+        status = "unsupported" if text is None else "indexed"
+        text = (text or "")[:MAX_TEXT_CHARS]
+        with self.store._connect() as conn:
+            conn.execute("DELETE FROM document_text WHERE rowid = ?", (document.id,))
+            # The name is searchable even when the content cannot be read
+            conn.execute(
+                "INSERT INTO document_text (rowid, name, body, category, program) VALUES (?, ?, ?, ?, ?)",
+                (document.id, document.name, text, document.category, document.program),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO indexed_documents (doc_id, status, chars, indexed) VALUES (?, ?, ?, ?)",
+                (document.id, status, len(text), time.time()),
+            )
+        metrics.increment(f"search.{status}")
+        return status
+
+    def pending_ids(self) -> List[int]:
+        """
+        Documents not indexed yet, oldest first. PDFs indexed by name only
+        while pypdf was missing are included once it is installed.
+        """
+        sql = "SELECT id FROM documents WHERE id NOT IN (SELECT doc_id FROM indexed_documents)"
+        if PdfReader is not None:
+            sql += (
+                " OR id IN (SELECT doc_id FROM indexed_documents WHERE status = 'unsupported')"
+                " AND (mime = 'application/pdf' OR lower(name) LIKE '%.pdf')"
+            )
+        with self.store._connect() as conn:
+            rows = conn.execute(sql + " ORDER BY id").fetchall()
+        return [row[0] for row in rows]
+
+    def index_pending(self) -> int:
+        """Index every document added since the last run"""
+        count = 0
+        for doc_id in self.pending_ids():
+            document = self.store.get(doc_id)
+            if document is not None:
+                self.index_document(document)
+                count += 1
+        return count
+
+    def status_counts(self) -> Dict[str, int]:
+        with self.store._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM indexed_documents GROUP BY status").fetchall()
+        return dict(rows)
+
+    def search(self, query: str, category: Optional[str] = None, program: Optional[str] = None,
+               limit: int = 20) -> List[SearchHit]:
+        """Best matches for ``query``, optionally within a category and program"""
+        expression = match_expression(query)
+        if not expression:
+            return []
+        clauses, params = ["document_text MATCH ?"], [expression]
+        if category:
+            clauses.append("document_text.category = ?")
+            params.append(category)
+        if program:
+            clauses.append("document_text.program = ?")
+            params.append(program)
+        sql = (
+            f"SELECT documents.*, snippet(document_text, 1, '**', '**', ' … ', {SNIPPET_TOKENS}), "
+            f"bm25(document_text, {NAME_WEIGHT}, {BODY_WEIGHT}) AS score "
+            "FROM document_text JOIN documents ON documents.id = document_text.rowid "
+            f"WHERE {' AND '.join(clauses)} ORDER BY score LIMIT ?"
+        )
+        with timer("search.query"):
+            with self.store._connect() as conn:
+                rows = conn.execute(sql, params + [limit]).fetchall()
+        metrics.increment("search.queries")
+        return [SearchHit(Document(*row[:-2]), row[-2], -row[-1]) for row in rows]
+
+
+class SearchIndexer:
+    """Daemon thread that indexes documents handed to submit()"""
+
+    def __init__(self, index: SearchIndex):
+        self.index = index
+        self._queue: "queue.Queue[int]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="search-indexer", daemon=True)
+        self._thread.start()
+
+    def submit(self, doc_id: int):
+        self._queue.put(doc_id)
+
+    @property
+    def backlog(self) -> int:
+        """Documents waiting to be indexed"""
+        return self._queue.qsize()
+
+    def _run(self):
+        try:
+            caught_up = self.index.index_pending()
+            if caught_up:
+                log_event("search.caught_up", documents=caught_up)
+        except Exception as e:
+            print(f"Warning: Could not index existing documents: {str(e)}")
+        while True:
+            doc_id = self._queue.get()
+            try:
+                document = self.index.store.get(doc_id)
+                if document is not None:
+                    self.index.index_document(document)
+            except Exception as e:
+                print(f"Warning: Could not index document {doc_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+
+_lock = threading.Lock()
+_indexers: Dict[str, SearchIndexer] = {}
+
+
+def get_indexer(store: DocumentStore) -> SearchIndexer:
+    """The process-wide background indexer for ``store``"""
+    with _lock:
+        indexer = _indexers.get(store.root)
+        if indexer is None:
+            indexer = _indexers[store.root] = SearchIndexer(SearchIndex(store))
+        return indexer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index and search the CSR document store")
+    parser.add_argument("--store", default=DOCUMENT_STORE, help="Document store directory")
+    parser.add_argument("--query", help="Search instead of indexing")
+    parser.add_argument("--category")
+    parser.add_argument("--program")
+    args = parser.parse_args()
+
+    index = SearchIndex(DocumentStore(args.store))
+    if args.query:
+        for hit in index.search(args.query, args.category, args.program):
+            print(f"{hit.score:6.2f}  {hit.document.category} / {hit.document.name}: {hit.snippet}")
+        return 0
+    print(f"Indexed {index.index_pending()} documents: {index.status_counts()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Shared Store Module for CSR Dashboard
+Publishes loaded sheets as Arrow IPC files that worker processes memory-map,
+so several app.py workers share one copy of the data
+
+One publisher loads the workbooks and writes every sheet into a versioned
+directory (use a tmpfs such as /dev/shm to keep it in shared memory) and then
+swaps manifest.json to point at it. Workers started with CSR_SHARED_STORE set
+attach to the current version instead of reading Excel; the operating system
+shares the mapped pages between them.
+
+Usage:
+    python shared_store.py publish --store /dev/shm/csr_store
+    python shared_store.py publish --store /dev/shm/csr_store --watch 30
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+import pandas as pd
+
+from data_loader import DataLoader, LoadProgress
+from data_store import snapshot_when_loaded
+from instrumentation import log_event, metrics, timer
+
+MANIFEST = "manifest.json"
+# Published versions kept on disk, the current one included
+KEEP_VERSIONS = int(os.environ.get("CSR_SHARED_KEEP_VERSIONS", "3"))
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError:
+        raise Exception("The shared store needs pyarrow: pip install pyarrow")
+
+
+def _to_table(df: pd.DataFrame):
+    """Arrow table for a sheet; mixed-type text columns are stored as strings"""
+    pa = _require_pyarrow()
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        fixed = df.copy()
+        for col in fixed.columns:
+            try:
+                pa.array(fixed[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                fixed[col] = fixed[col].astype("string")
+        return pa.Table.from_pandas(fixed, preserve_index=False)
+
+
+def publish(data_loader: DataLoader, store_dir: str) -> str:
+    """
+    Write every sheet of ``data_loader`` under ``store_dir/<data version>/``
+    and point the manifest at it. Returns the version directory.
+    """
+    pa = _require_pyarrow()
+    version = data_loader.data_version
+    # A fresh directory per publish, so republishing a version never
+    # replaces files a worker may be mapping
+    directory = f"{version}-{time.time_ns()}"
+    version_dir = os.path.join(store_dir, directory)
+    tmp_dir = version_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    sheets = {}
+    with timer("shared_store.publish", version=version):
+        for index, key in enumerate(data_loader.get_all_keys()):
+            table = _to_table(data_loader.get_data(key))
+            file_name = f"sheet_{index:03d}.arrow"
+            with pa.OSFile(os.path.join(tmp_dir, file_name), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            sheets[key] = file_name
+
+    os.replace(tmp_dir, version_dir)
+
+    manifest = {
+        "data_version": version,
+        "directory": directory,
+        "published": time.time(),
+        "csr_mis_path": os.path.abspath(data_loader.csr_mis_path),
+        "jspl_input_path": os.path.abspath(data_loader.jspl_input_path),
+        "sheets": sheets,
+    }
+    tmp_manifest = os.path.join(store_dir, MANIFEST + ".tmp")
+    with open(tmp_manifest, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_manifest, os.path.join(store_dir, MANIFEST))
+
+    prune(store_dir, directory)
+    log_event("shared_store.published", version=version, sheets=len(sheets), store=store_dir)
+    snapshot_when_loaded(data_loader)
+    return version_dir
+
+
+def prune(store_dir: str, current: str, keep: int = KEEP_VERSIONS):
+    """
+    Delete all but the newest ``keep`` published directories. Earlier
+    versions stay for workers that read the previous manifest and have not
+    finished mapping it yet.
+    """
+    published = []
+    for entry in os.listdir(store_dir):
+        path = os.path.join(store_dir, entry)
+        if os.path.isdir(path) and entry != current and not entry.endswith(".tmp"):
+            published.append((os.path.getmtime(path), path))
+    for _, path in sorted(published, reverse=True)[keep - 1:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def read_manifest(store_dir: str) -> Optional[dict]:
+    """Current manifest, or None when nothing has been published yet"""
+    try:
+        with open(os.path.join(store_dir, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class SharedDataLoader(DataLoader):
+    """
+    DataLoader whose sheets are memory-mapped from a published store
+    instead of being read from Excel.
+    """
+
+    def __init__(self, store_dir: str):
+        manifest = read_manifest(store_dir)
+        if manifest is None:
+            raise FileNotFoundError(f"No published data in shared store: {store_dir}")
+        self.store_dir = store_dir
+        # Same attributes DataLoader sets, without loading the workbooks
+        self.csr_mis_path = manifest["csr_mis_path"]
+        self.jspl_input_path = manifest["jspl_input_path"]
+        self.period = None
+        self.data: Dict[str, pd.DataFrame] = {}
+        self.data_version = manifest["data_version"]
+        self.partitions = []
+        self.loaded_partitions = []
+        self.partition_index = {}
+        self._partition_frames = {}
+        self._derived = {}
+        self._derived_lock = threading.Lock()
+        self._building = {}
+        self.progress = LoadProgress()
+        try:
+            self._attach(manifest)
+        except Exception as e:
+            self.progress.finish(str(e))
+            raise
+        self.progress.finish()
+
+    def _attach(self, manifest: dict):
+        pa = _require_pyarrow()
+        version_dir = os.path.join(self.store_dir, manifest.get("directory", manifest["data_version"]))
+        self.progress.expect(len(manifest["sheets"]))
+        with timer("shared_store.attach", version=self.data_version):
+            for key, file_name in manifest["sheets"].items():
+                start = time.perf_counter()
+                source = pa.memory_map(os.path.join(version_dir, file_name), "r")
+                table = pa.ipc.open_file(source).read_all()
+                # Strings stay Arrow-backed views of the mapping; numeric
+                # columns without nulls are wrapped rather than copied
+                self.data[key] = table.to_pandas(split_blocks=True)
+                self.progress.sheet_done(key, table.num_rows, time.perf_counter() - start)
+                self.progress.mark_ready(key)
+        metrics.increment("shared_store.attached")
+
+    def load_all_data(self):
+        """Sheets come from the publisher; nothing to read here"""
+        return None
+
+    def compute_data_version(self) -> str:
+        """Version currently published (changes when the publisher refreshes)"""
+        manifest = read_manifest(self.store_dir)
+        return manifest["data_version"] if manifest else self.data_version
+
+
+def run_publisher(store_dir: str, csr_mis_path: str, jspl_input_path: str) -> DataLoader:
+    """Load the workbooks and publish them once"""
+    os.makedirs(store_dir, exist_ok=True)
+    loader = DataLoader(csr_mis_path, jspl_input_path)
+    publish(loader, store_dir)
+    print(f"Published {len(loader.get_all_keys())} sheets (version {loader.data_version}) to {store_dir}")
+    return loader
+
+
+def watch_sources(loader: DataLoader, store_dir: str, interval: float):
+    """Republish whenever the source workbooks change"""
+    while True:
+        time.sleep(interval)
+        try:
+            if loader.compute_data_version() == loader.data_version:
+                continue
+            loader = DataLoader(loader.csr_mis_path, loader.jspl_input_path)
+            publish(loader, store_dir)
+            print(f"Republished version {loader.data_version}")
+        except Exception as e:
+            print(f"Warning: Could not republish shared store: {str(e)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish CSR dashboard data to a shared Arrow store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pub = sub.add_parser("publish", help="Load the workbooks and publish them")
+    pub.add_argument("--store", required=True, help="Store directory (e.g. /dev/shm/csr_store)")
+    pub.add_argument("--csr-mis", default=os.environ.get("CSR_MIS_PATH", "CSR MIS.xlsx"))
+    pub.add_argument("--jspl-input", default=os.environ.get("JSPL_INPUT_PATH", "JSPL CSR Data Input.xlsx"))
+    pub.add_argument("--watch", type=float, default=0, help="Re-check the sources every N seconds")
+    args = parser.parse_args()
+
+    if args.command == "publish":
+        loader = run_publisher(args.store, args.csr_mis, args.jspl_input)
+        if args.watch:
+            watch_sources(loader, args.store, args.watch)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
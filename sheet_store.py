@@ -0,0 +1,239 @@
+"""
+Sheet Store Module for CSR Dashboard
+Dict-like holder for loaded sheets with an optional memory budget: the least
+recently used sheets are spilled and read back transparently on next access
+
+Spilled sheets go to zstd-compressed Arrow files in a temporary directory when
+pyarrow is installed, otherwise they are kept as zlib-compressed pickles in
+memory. Sheets that Arrow cannot represent exactly (mixed-type columns, or
+columns it would convert, such as object columns of dates) use the compressed
+buffer so they come back unchanged.
+"""
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, MutableMapping, Optional
+
+import pandas as pd
+
+from instrumentation import dataframe_memory, log_event, metrics
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+
+SPILL_DIR = os.environ.get("CSR_SPILL_DIR") or None
+
+
+def budget_from_env() -> Optional[int]:
+    """Memory budget in bytes from CSR_MEMORY_BUDGET_MB (None when unset)"""
+    value = os.environ.get("CSR_MEMORY_BUDGET_MB")
+    if not value:
+        return None
+    try:
+        return int(float(value) * 1024 * 1024)
+    except ValueError:
+        print(f"Warning: Ignoring invalid CSR_MEMORY_BUDGET_MB: {value}")
+        return None
+
+
+def _round_trips(df: pd.DataFrame, restored: pd.DataFrame) -> bool:
+    """True when a sheet read back from Arrow is identical to the original"""
+    if not df.dtypes.equals(restored.dtypes) or not df.index.equals(restored.index):
+        return False
+    try:
+        pd.testing.assert_frame_equal(df, restored, check_exact=True)
+    except AssertionError:
+        return False
+    return True
+
+
+class SheetStore(MutableMapping):
+    """
+    Mapping of sheet key -> DataFrame. Without a budget it behaves like a
+    plain dict; with one, resident sheets are kept under ``budget_bytes`` by
+    spilling in LRU order. Key order is insertion order either way.
+    """
+
+    def __init__(self, budget_bytes: Optional[int] = None, spill_dir: Optional[str] = SPILL_DIR):
+        self.budget_bytes = budget_bytes
+        self.spill_root = spill_dir
+        self._lock = threading.RLock()
+        self._keys: Dict[str, None] = {}
+        self._resident: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        # Schema kept for every sheet so projections never need the data
+        self._columns: Dict[str, List[str]] = {}
+        self._rows: Dict[str, int] = {}
+        # key -> ("arrow", path) or ("buffer", compressed bytes)
+        self._spilled: Dict[str, tuple] = {}
+        self._spill_dir: Optional[str] = None
+        self._spill_count = 0
+        self._stats = {"hits": 0, "rehydrations": 0, "evictions": 0, "rehydrate_s": 0.0, "projected_reads": 0}
+
+    def __getitem__(self, key: str) -> pd.DataFrame:
+        with self._lock:
+            df = self._resident.get(key)
+            if df is not None:
+                self._resident.move_to_end(key)
+                self._stats["hits"] += 1
+                return df
+            if key not in self._spilled:
+                raise KeyError(key)
+            df = self._rehydrate(key)
+            self._resident[key] = df
+            self._enforce_budget()
+            return df
+
+    def __setitem__(self, key: str, df: pd.DataFrame):
+        with self._lock:
+            self._discard_spill(key)
+            self._keys[key] = None
+            self._resident[key] = df
+            self._resident.move_to_end(key)
+            self._sizes[key] = dataframe_memory(df)
+            self._columns[key] = list(df.columns)
+            self._rows[key] = len(df)
+            self._enforce_budget()
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            del self._keys[key]
+            self._resident.pop(key, None)
+            for table in (self._sizes, self._columns, self._rows):
+                table.pop(key, None)
+            self._discard_spill(key)
+
+    def __contains__(self, key: object) -> bool:
+        # Membership must not rehydrate a spilled sheet
+        return key in self._keys
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._keys))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def columns(self, key: str) -> List[str]:
+        """Column names of a sheet (without loading it)"""
+        return list(self._columns[key])
+
+    def row_count(self, key: str) -> int:
+        """Number of rows of a sheet (without loading it)"""
+        return self._rows[key]
+
+    def project(self, key: str, columns: List[str]) -> pd.DataFrame:
+        """
+        Only ``columns`` of a sheet. A spilled Arrow sheet reads just those
+        columns from its file and stays spilled.
+        """
+        with self._lock:
+            if key not in self._keys:
+                raise KeyError(key)
+            spilled = self._spilled.get(key)
+            if key in self._resident or spilled is None or spilled[0] != "arrow":
+                return self[key][columns]
+            self._stats["projected_reads"] += 1
+            metrics.increment("sheet_store.projected_reads")
+            return feather.read_table(spilled[1], columns=columns, memory_map=False).to_pandas()
+
+    def is_resident(self, key: str) -> bool:
+        """True when the sheet is in memory (not spilled)"""
+        return key in self._resident
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(self._sizes[key] for key in self._resident)
+
+    def set_budget(self, budget_bytes: Optional[int]):
+        """Change the budget, spilling immediately if it is now exceeded"""
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            self._enforce_budget()
+
+    def stats(self) -> Dict[str, Any]:
+        """Budget, residency and eviction statistics"""
+        with self._lock:
+            spilled_bytes = 0
+            for kind, payload in self._spilled.values():
+                spilled_bytes += os.path.getsize(payload) if kind == "arrow" else len(payload)
+            return {
+                "budget_bytes": self.budget_bytes,
+                "resident_bytes": self.resident_bytes,
+                "resident_sheets": len(self._resident),
+                "spilled_sheets": len(self._spilled),
+                "spilled_bytes": spilled_bytes,
+                **self._stats,
+            }
+
+    def _enforce_budget(self):
+        if self.budget_bytes is None:
+            return
+        resident = self.resident_bytes
+        # The most recently used sheet stays even if it alone exceeds the budget
+        while resident > self.budget_bytes and len(self._resident) > 1:
+            key, df = self._resident.popitem(last=False)
+            self._spill(key, df)
+            resident -= self._sizes[key]
+            self._stats["evictions"] += 1
+            metrics.increment("sheet_store.evictions")
+            log_event("sheet_store.evicted", sheet=key, bytes=self._sizes[key])
+
+    def _spill(self, key: str, df: pd.DataFrame):
+        if key in self._spilled:
+            # Sheets are not modified in place, so an earlier spill is still valid
+            return
+        if pa is not None:
+            self._spill_count += 1
+            path = os.path.join(self._ensure_spill_dir(), f"sheet_{self._spill_count:04d}.arrow")
+            try:
+                table = pa.Table.from_pandas(df)
+                # Arrow converts some columns silently (object dates become
+                # datetime64); such sheets use the buffer instead
+                if _round_trips(df, table.to_pandas()):
+                    feather.write_feather(table, path, compression="zstd")
+                    self._spilled[key] = ("arrow", path)
+                    return
+                metrics.increment("sheet_store.arrow_fallbacks")
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, ValueError):
+                if os.path.exists(path):
+                    os.remove(path)
+        self._spilled[key] = ("buffer", zlib.compress(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL), 1))
+
+    def _rehydrate(self, key: str) -> pd.DataFrame:
+        start = time.perf_counter()
+        kind, payload = self._spilled[key]
+        if kind == "arrow":
+            df = feather.read_table(payload, memory_map=False).to_pandas()
+        else:
+            df = pickle.loads(zlib.decompress(payload))
+        seconds = time.perf_counter() - start
+        self._stats["rehydrations"] += 1
+        self._stats["rehydrate_s"] += seconds
+        metrics.increment("sheet_store.rehydrations")
+        metrics.record_timing("sheet_store.rehydrate", seconds, sheet=key)
+        return df
+
+    def _discard_spill(self, key: str):
+        spilled = self._spilled.pop(key, None)
+        if spilled is not None and spilled[0] == "arrow":
+            try:
+                os.remove(spilled[1])
+            except OSError:
+                pass
+
+    def _ensure_spill_dir(self) -> str:
+        if self._spill_dir is None:
+            if self.spill_root:
+                os.makedirs(self.spill_root, exist_ok=True)
+            self._spill_dir = tempfile.mkdtemp(prefix="csr_spill_", dir=self.spill_root)
+            weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+        return self._spill_dir
@@ -0,0 +1,473 @@
+"""
+Sketches Module for CSR Dashboard
+Mergeable HyperLogLog distinct counts of beneficiaries per program, month and
+state, so unique counts across programs and periods never re-read the IDs,
+and mergeable KLL quantile sketches of numeric measures (age, family income,
+haemoglobin, ...) per program and month for percentiles and histograms
+"""
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cubes import activity_dates
+from data_quality import RANGES
+from entity_resolution import get_entity_index
+from master_data import location_frame, master_id_map, normalise_gender
+
+DEFAULT_PRECISION = 12
+# KLL accuracy parameter: rank error is roughly 1.7 / k
+DEFAULT_K = 200
+
+# Columns (lower case) that identify a person, strongest first
+ID_COLUMNS = ["adhar_number", "aadhar_number", "aadhaar_number"]
+NAME_COLUMNS = ["name", "beneficiary_name"]
+PLACE_COLUMNS = ["village", "location", "gram_panchayat"]
+
+# Numeric measures with quantile sketches -> candidate columns (lower case)
+MEASURES = {
+    "age": ["age"],
+    "income": ["family_income", "annual_income", "monthly_income", "household_income", "income"],
+    "haemoglobin": ["haemoglobin", "hemoglobin", "hb"],
+    "weight": ["weight"],
+    "height": ["height"],
+}
+
+_CLZ_STEPS = [np.uint64(s) for s in (32, 16, 8, 4, 2, 1)]
+
+
+def _leading_zeros(values: np.ndarray) -> np.ndarray:
+    """Count leading zero bits of uint64 values (vectorised binary search)"""
+    x = values.copy()
+    zeros = np.zeros(len(x), dtype=np.uint8)
+    for step in _CLZ_STEPS:
+        empty_top = (x >> (np.uint64(64) - step)) == 0
+        zeros[empty_top] += np.uint8(step)
+        x[empty_top] <<= step
+    return zeros
+
+
+class HyperLogLog:
+    """
+    Distinct-count sketch. Small sets are kept as exact 64-bit hashes and
+    switch to 2**precision registers once they outgrow them, so the
+    estimate's relative standard error is about 1.04 / sqrt(2**precision).
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.m = 1 << precision
+        # Sparse mode stores raw hashes; registers take m bytes
+        self.sparse_limit = self.m // 8
+        self.hashes: Optional[np.ndarray] = np.empty(0, dtype=np.uint64)
+        self.registers: Optional[np.ndarray] = None
+
+    @property
+    def is_exact(self) -> bool:
+        """True while the sketch still holds every hash"""
+        return self.registers is None
+
+    @property
+    def relative_error(self) -> float:
+        """Standard error of the estimate (0 while exact)"""
+        return 0.0 if self.is_exact else 1.04 / np.sqrt(self.m)
+
+    def add_hashes(self, hashes: np.ndarray) -> "HyperLogLog":
+        """Add uint64 hashes"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if self.is_exact and len(self.hashes) + len(hashes) > 4 * self.sparse_limit:
+            # Clearly too many for sparse mode; skip the exact union
+            self._densify()
+        if self.is_exact:
+            merged = np.sort(np.concatenate([self.hashes, hashes]))
+            self.hashes = merged[np.concatenate(([True], merged[1:] != merged[:-1]))] if len(merged) else merged
+            if len(self.hashes) > self.sparse_limit:
+                self._densify()
+        else:
+            self._update_registers(hashes)
+        return self
+
+    def add(self, values: Iterable) -> "HyperLogLog":
+        """Add raw values (hashed with pandas' stable hash)"""
+        series = pd.Series(list(values), dtype="string").dropna()
+        return self.add_hashes(pd.util.hash_pandas_object(series, index=False).to_numpy())
+
+    def _densify(self):
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+        self._update_registers(self.hashes)
+        self.hashes = None
+
+    def _update_registers(self, hashes: np.ndarray):
+        if len(hashes) == 0:
+            return
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        # Guard bit so the rank never exceeds 64 - p + 1
+        rest = (hashes << p) | (np.uint64(1) << (p - np.uint64(1)))
+        rank = _leading_zeros(rest) + np.uint8(1)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Fold ``other`` into this sketch (union of the two sets)"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        if other.is_exact:
+            return self.add_hashes(other.hashes)
+        if self.is_exact:
+            self._densify()
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def copy(self) -> "HyperLogLog":
+        """Independent copy"""
+        clone = HyperLogLog(self.precision)
+        clone.hashes = None if self.hashes is None else self.hashes.copy()
+        clone.registers = None if self.registers is None else self.registers.copy()
+        return clone
+
+    def count(self) -> int:
+        """Exact count while sparse, HyperLogLog estimate afterwards"""
+        if self.is_exact:
+            return int(len(self.hashes))
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and empty:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * np.log(m / empty)
+        return int(round(estimate))
+
+    def __len__(self) -> int:
+        return self.count()
+
+
+class QuantileSketch:
+    """
+    KLL quantile sketch. Values are kept exactly until the sketch outgrows
+    its capacity; after that level h holds samples standing for 2**h values
+    each, and ranks are accurate to about 1.7 / k of the count. Two sketches
+    merge into one that summarises both inputs.
+    """
+
+    def __init__(self, k: int = DEFAULT_K):
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self.n = 0
+        self.min = np.nan
+        self.max = np.nan
+        self._rng = np.random.default_rng(k)
+
+    @property
+    def is_exact(self) -> bool:
+        """True while every value is still held"""
+        return len(self.levels) == 1
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def add(self, values: Iterable) -> "QuantileSketch":
+        """Add numbers (missing values are ignored)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        self.min = np.nanmin([self.min, values.min()])
+        self.max = np.nanmax([self.max, values.max()])
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, *others: "QuantileSketch") -> "QuantileSketch":
+        """Fold ``others`` into this sketch (compacting once at the end)"""
+        others = [other for other in others if other.n]
+        if not others:
+            return self
+        depth = max(len(self.levels), *(len(other.levels) for other in others))
+        self.levels += [np.empty(0, dtype=np.float64)] * (depth - len(self.levels))
+        for level in range(depth):
+            parts = [other.levels[level] for other in others if level < len(other.levels)]
+            self.levels[level] = np.concatenate([self.levels[level], *parts])
+        self.n += sum(other.n for other in others)
+        self.min = np.nanmin([self.min, *(other.min for other in others)])
+        self.max = np.nanmax([self.max, *(other.max for other in others)])
+        self._compress()
+        return self
+
+    def _compress(self):
+        while sum(len(items) for items in self.levels) > sum(self._capacity(h) for h in range(len(self.levels))):
+            for level, items in enumerate(self.levels):
+                if len(items) < self._capacity(level):
+                    continue
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # An odd item out stays at this level so total weight is kept
+                kept, items = (items[-1:], items[:-1]) if len(items) % 2 else (items[:0], items)
+                promoted = items[self._rng.integers(2)::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = kept
+                break
+
+    def _weighted(self) -> Tuple[np.ndarray, np.ndarray]:
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs: Sequence[float]) -> np.ndarray:
+        """Values at the given quantiles (0..1); NaN for an empty sketch"""
+        qs = np.clip(np.asarray(qs, dtype=np.float64), 0, 1)
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        items, cumulative = self._weighted()
+        index = np.searchsorted(cumulative, qs * cumulative[-1], side="left")
+        result = items[np.minimum(index, len(items) - 1)]
+        result[qs == 0] = self.min
+        result[qs == 1] = self.max
+        return result
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+    def cdf(self, points: Sequence[float]) -> np.ndarray:
+        """Fraction of values <= each point"""
+        points = np.asarray(points, dtype=np.float64)
+        if self.n == 0:
+            return np.zeros(len(points))
+        items, cumulative = self._weighted()
+        index = np.searchsorted(items, points, side="right")
+        below = np.where(index > 0, cumulative[np.maximum(index - 1, 0)], 0.0)
+        return below / cumulative[-1]
+
+    def histogram(self, edges: Sequence[float]) -> np.ndarray:
+        """Estimated counts in [edges[i], edges[i + 1]) (last bin closed)"""
+        edges = np.asarray(edges, dtype=np.float64)
+        if self.n == 0:
+            return np.zeros(len(edges) - 1, dtype=np.int64)
+        below = self.cdf(np.nextafter(edges, -np.inf))
+        below[-1] = self.cdf(edges[-1:])[0]
+        return np.round(np.diff(below) * self.n).astype(np.int64)
+
+    def copy(self) -> "QuantileSketch":
+        """Independent copy"""
+        clone = QuantileSketch(self.k)
+        clone.levels = [items.copy() for items in self.levels]
+        clone.n, clone.min, clone.max = self.n, self.min, self.max
+        return clone
+
+    def __len__(self) -> int:
+        return self.n
+
+
+def _first_column(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
+    lookup = {str(col).lower(): col for col in df.columns}
+    for name in candidates:
+        if name in lookup and df[lookup[name]].notna().any():
+            return lookup[name]
+    return None
+
+
+def _clean(values: pd.Series) -> pd.Series:
+    text = values.astype("string").str.strip().str.lower().str.replace(r"\s+", " ", regex=True)
+    return text.where(text != "")
+
+
+def beneficiary_keys(df: pd.DataFrame) -> Optional[pd.Series]:
+    """
+    Fallback identity key per row when entity resolution has no ID: the
+    Aadhaar number when recorded, otherwise name + gender + village.
+    """
+    id_col = _first_column(df, ID_COLUMNS)
+    name_col = _first_column(df, NAME_COLUMNS)
+    if id_col is None and name_col is None:
+        return None
+
+    keys = pd.Series(pd.NA, index=df.index, dtype="string")
+    if name_col is not None:
+        name = _clean(df[name_col])
+        gender_cols = [col for col in df.columns if "gender" in str(col).lower()]
+        gender = normalise_gender(df[gender_cols[0]]).fillna("") if gender_cols else ""
+        place_col = _first_column(df, PLACE_COLUMNS)
+        place = _clean(df[place_col]).fillna("") if place_col is not None else ""
+        keys = ("n:" + name + "|" + gender + "|" + place).where(name.notna())
+    if id_col is not None:
+        digits = df[id_col].astype("string").str.replace(r"\D", "", regex=True)
+        digits = digits.where(digits.str.len() >= 8)
+        keys = ("a:" + digits).fillna(keys)
+    return keys
+
+
+class BeneficiarySketches:
+    """HyperLogLog sketches keyed by (program, month, state)"""
+
+    def __init__(self, sketches: Dict[Tuple[str, pd.Timestamp, str], HyperLogLog], precision: int):
+        self.sketches = sketches
+        self.precision = precision
+
+    @property
+    def programs(self) -> List[str]:
+        """Data keys with at least one sketch"""
+        return sorted({key[0] for key in self.sketches})
+
+    def merged(self, programs: Optional[List[str]] = None, start: Optional[date] = None,
+               end: Optional[date] = None, states: Optional[List[str]] = None) -> HyperLogLog:
+        """Union of the sketches matching the filters"""
+        start_month = pd.Timestamp(start).to_period("M").start_time if start is not None else None
+        end_ts = pd.Timestamp(end) if end is not None else None
+        result = HyperLogLog(self.precision)
+        for (program, month, state), sketch in self.sketches.items():
+            if programs is not None and program not in programs:
+                continue
+            if states is not None and state not in states:
+                continue
+            # Month granularity: a month counts when it overlaps [start, end]
+            if pd.isna(month):
+                if start is not None or end is not None:
+                    continue
+            elif (start_month is not None and month < start_month) or (end_ts is not None and month > end_ts):
+                continue
+            result.merge(sketch)
+        return result
+
+    def unique(self, programs: Optional[List[str]] = None, start: Optional[date] = None,
+               end: Optional[date] = None, states: Optional[List[str]] = None) -> int:
+        """Distinct beneficiaries matching the filters"""
+        return self.merged(programs, start, end, states).count()
+
+
+def build_beneficiary_sketches(data_loader, precision: int = DEFAULT_PRECISION) -> BeneficiarySketches:
+    """Sketch every program sheet's beneficiaries per month and state"""
+    state_ids = master_id_map(data_loader.get_data("CSR_MIS_State Master"))
+    entities = get_entity_index(data_loader)
+    sketches: Dict[Tuple[str, pd.Timestamp, str], HyperLogLog] = {}
+
+    for key in data_loader.get_all_keys():
+        if "master" in key.lower():
+            continue
+        df = data_loader.get_data(key)
+        if df is None or df.empty:
+            continue
+        keys = beneficiary_keys(df)
+        resolved = entities.ids_for(key)
+        if resolved is not None:
+            # Resolved beneficiary IDs link spelling variants across programs
+            resolved = ("b:" + resolved.astype("string")).reindex(df.index)
+            keys = resolved if keys is None else resolved.fillna(keys)
+        if keys is None or keys.notna().sum() == 0:
+            continue
+
+        dates = activity_dates(df)
+        places = location_frame(df, state_ids)
+        facts = pd.DataFrame({
+            "month": dates.dt.to_period("M").dt.start_time if dates is not None else pd.NaT,
+            "state": places["State"].fillna("Unknown") if places is not None else "Unknown",
+            "hash": pd.util.hash_pandas_object(keys, index=False).to_numpy(),
+        }, index=df.index)[keys.notna()]
+
+        for (month, state), group in facts.groupby(["month", "state"], dropna=False, sort=False):
+            sketches[(key, month, state)] = HyperLogLog(precision).add_hashes(group["hash"].to_numpy())
+
+    return BeneficiarySketches(sketches, precision)
+
+
+def get_beneficiary_sketches(data_loader) -> BeneficiarySketches:
+    """Beneficiary sketches for the loader's current data version"""
+    return data_loader.get_derived("beneficiary_sketches", build_beneficiary_sketches)
+
+
+def measure_columns(df: pd.DataFrame) -> Dict[str, str]:
+    """Measure name -> the sheet's column for it (first candidate with numbers)"""
+    lookup = {str(col).lower(): col for col in df.columns}
+    found = {}
+    for measure, candidates in MEASURES.items():
+        for name in candidates:
+            col = lookup.get(name)
+            if col is not None and pd.to_numeric(df[col], errors="coerce").notna().any():
+                found[measure] = col
+                break
+    return found
+
+
+def measure_values(df: pd.DataFrame, column: str) -> pd.Series:
+    """Numeric values of a measure column, implausible ones set to NaN"""
+    values = pd.to_numeric(df[column], errors="coerce")
+    low, high = RANGES.get(str(column).lower(), (0, np.inf))
+    return values.where((values >= low) & (values <= high))
+
+
+class DistributionSketches:
+    """KLL quantile sketches keyed by (measure, program, month)"""
+
+    def __init__(self, sketches: Dict[Tuple[str, str, pd.Timestamp], QuantileSketch], k: int):
+        self.sketches = sketches
+        self.k = k
+
+    @property
+    def measures(self) -> List[str]:
+        """Measures with at least one sketch"""
+        return [measure for measure in MEASURES if any(key[0] == measure for key in self.sketches)]
+
+    def programs(self, measure: str) -> List[str]:
+        """Data keys with values for ``measure``"""
+        return sorted({key[1] for key in self.sketches if key[0] == measure})
+
+    def merged(self, measure: str, programs: Optional[List[str]] = None, start: Optional[date] = None,
+               end: Optional[date] = None) -> QuantileSketch:
+        """Union of the measure's sketches matching the filters"""
+        start_month = pd.Timestamp(start).to_period("M").start_time if start is not None else None
+        end_ts = pd.Timestamp(end) if end is not None else None
+        selected = []
+        for (name, program, month), sketch in self.sketches.items():
+            if name != measure or (programs is not None and program not in programs):
+                continue
+            if pd.isna(month):
+                if start is not None or end is not None:
+                    continue
+            elif (start_month is not None and month < start_month) or (end_ts is not None and month > end_ts):
+                continue
+            selected.append(sketch)
+        return QuantileSketch(self.k).merge(*selected)
+
+    def quantiles(self, measure: str, qs: Sequence[float], programs: Optional[List[str]] = None,
+                  start: Optional[date] = None, end: Optional[date] = None) -> np.ndarray:
+        """Values at ``qs`` for the selection"""
+        return self.merged(measure, programs, start, end).quantiles(qs)
+
+    def histogram(self, measure: str, edges: Sequence[float], programs: Optional[List[str]] = None,
+                  start: Optional[date] = None, end: Optional[date] = None) -> np.ndarray:
+        """Estimated counts per bin for the selection"""
+        return self.merged(measure, programs, start, end).histogram(edges)
+
+
+def build_distribution_sketches(data_loader, k: int = DEFAULT_K) -> DistributionSketches:
+    """Sketch every numeric measure of every program sheet per month"""
+    sketches: Dict[Tuple[str, str, pd.Timestamp], QuantileSketch] = {}
+    for key in data_loader.get_all_keys():
+        if "master" in key.lower():
+            continue
+        df = data_loader.get_data(key)
+        if df is None or df.empty:
+            continue
+        columns = measure_columns(df)
+        if not columns:
+            continue
+        dates = activity_dates(df)
+        months = dates.dt.to_period("M").dt.start_time if dates is not None else pd.Series(pd.NaT, index=df.index)
+        for measure, column in columns.items():
+            facts = pd.DataFrame({"month": months, "value": measure_values(df, column)}).dropna(subset=["value"])
+            for month, group in facts.groupby("month", dropna=False, sort=False):
+                sketches[(measure, key, month)] = QuantileSketch(k).add(group["value"].to_numpy())
+    return DistributionSketches(sketches, k)
+
+
+def get_distribution_sketches(data_loader) -> DistributionSketches:
+    """Measure distribution sketches for the loader's current data version"""
+    return data_loader.get_derived("distribution_sketches", build_distribution_sketches)
@@ -0,0 +1,306 @@
+"""
+Synthetic Data Generator for CSR Dashboard
+Writes CSR MIS / JSPL-shaped workbooks of a chosen size for benchmarking
+
+Usage:
+    python synthetic_data.py --rows 100k --out bench_data/100k
+"""
+import argparse
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Tuple
+
+import numpy as np
+from openpyxl import Workbook
+
+# Machine-name header row used by every CSR MIS program sheet
+CSR_MIS_COLUMNS = [
+    'jindal_arogyam_pk_id', 'name', 'activities', 'age', 'agency_name', 'beneriries_code', 'district',
+    'gender', 'gram_panchayat', 'jindal_arogyam_date', 'objective', 'services', 'total_beneficiary',
+    'village', 'business_location_fk_id', 'coverage_beneficiaries_no_fk_id', 'existing_project_fk_id',
+    'govt_praposed_fk_id', 'program_code_fk_id', 'state_fk_id', 'camp_name', 'coverage_of_beneficiaries',
+    'date_of_birth', 'education', 'fathers_name', 'haemoglobin', 'hb_status', 'height', 'mothers_name',
+    'number_of_visit', 'weight', 'Location_fk_id', 'deleted', 'total_adolecent_girls', 'total_revenue',
+    'total_shg_beneficiary', 'total_children', 'total_couple', 'total_women', 'coverage_of_beneficiaries_no',
+    'user_fk_id', 'total_elderly_people', 'total_patients', 'phc', 'locality', 'town', 'installation_number',
+    'totalInstallation', 'household_benefited', 'head_house_hold', 'house_hold_member', 'house_hold_no',
+    'toilet_construction_no', 'total_construction_toilet', 'total_house_hold', 'beneficiaryPreAssessment',
+    'status_post_training', 'name_little_angel', 'total_student', 'academic_year', 'services_fk_id', 'month',
+    'socialCat', 'trade', 'classes', 'achievement', 'total_members', 'finacial_status_before_training',
+    'financial_upliftment_after_training', 'activity_fk_id', 'tournament', 'award', 'sub_module_code',
+    'year_target_beneficiary', 'impact', 'outcome', 'otherLocation', 'sdg_alignment', 'infrastructure',
+    'adhar_number', 'block', 'other', 'support_extended_fk_id', 'total_construction', 'social_cat',
+    'duration_in_months', 'national_flag', 'phc_name', 'utility', 'utility_name', 'construction_type',
+    'placed', 'placement_details', 'total_production', 'construction',
+]
+
+# Human-readable label row that follows the machine-name row
+CSR_MIS_LABELS = {
+    'name': 'Name', 'activities': 'Activities', 'age': 'Age', 'agency_name': 'Agency Name',
+    'beneriries_code': '(Male , Female, Children)', 'district': 'District', 'gender': 'Gender',
+    'gram_panchayat': 'Gram Panchayat', 'jindal_arogyam_date': datetime(2024, 7, 12),
+    'objective': 'Objective', 'village': 'Village', 'state_fk_id': 'State Master ID',
+    'date_of_birth': 'Date of birth', 'haemoglobin': 'haemoglobin', 'height': 'height',
+    'number_of_visit': 'no of visit', 'weight': 'weight', 'Location_fk_id': 'Location master Id',
+    'academic_year': '2024 - 25', 'sdg_alignment': 'sdg_alignment master Id', 'block': 'block',
+}
+
+# (sheet name, program_code_fk_id, share of generated rows)
+CSR_MIS_PROGRAMS = [
+    ("JindalArogym", 1, 0.10),
+    ("Vatsalya", 64, 0.08),
+    ("Kishori Express", 9, 0.20),
+    ("Subhangi", 10, 0.15),
+    ("Swasti Express", 65, 0.10),
+    ("chiranjeevi", 11, 0.01),
+    ("HIV  Aids", 66, 0.01),
+    ("TB Mukt Bharat", 12, 0.01),
+    ("Poor Patients Treatment", 72, 0.01),
+    ("TeleMedicine", 13, 0.01),
+    ("Drishti", 14, 0.01),
+    ("Mobile Medical Van", 15, 0.01),
+    ("Health Awareness", 86, 0.01),
+    ("Improvement in PHCCHC", 85, 0.01),
+    ("Chilled Drinking Water", 87, 0.27),
+]
+
+JSPL_COLUMNS = [
+    'Record_ID', 'Program_Code', 'Vertical_Name', 'Reporting_Month', 'Activity_Date', 'State', 'District',
+    'Block', 'Location', 'Business_or_NonBusiness_Location', 'Activity_Type', 'Objective', 'SDG_Alignment',
+    'Is_Collaboration', 'Agency_Name', 'Service_Type', 'Beneficiary_Code', 'Beneficiary_Name', 'Age',
+    'Gender', 'Remarks',
+]
+
+JSPL_PROGRAMS = [
+    "Jindal_Arogyam_Hospital", "Kishori_Express", "Vatsalya", "Subhangi", "Swasti_Express", "Chiranjeevi",
+    "HIV_AIDS", "TB_Mukt_Bharat", "Poor_Patient_Treatment", "Tele_Medicine", "Mobile_Medical_Van",
+]
+
+STATES = [(8, "Odisha"), (7, "Chhattisgarh"), (10, "Jharkhand"), (9, "Haryana"), (39, "Delhi")]
+LOCATIONS = ["Angul", "Raigarh", "Barbil", "Kasia", "Tensa", "Patratu", "Tamnar", "Nellore", "Delhi"]
+SDGS = [
+    "No Poverty", "Zero Hunger", "Good Health & Well-Being", "Quality Education", "Gender Equality",
+    "Clean Water and Sanitation", "Affordable and Clean Energy", "Decent Work and Economic Growth",
+]
+FIRST_NAMES = [
+    "Saraswati", "Sruti", "Priti", "Rasmipriya", "Lovely", "Rajani", "Sunita", "Anita", "Pooja", "Laxmi",
+    "Gita", "Sita", "Mamata", "Jyoti", "Bharati", "Sasmita", "Puja", "Manisha", "Kavita", "Rekha",
+]
+LAST_NAMES = [
+    "Pradhan", "Bhoi", "Rout", "Nayak", "Pattanaik", "Sahoo", "Behera", "Das", "Mohanty", "Swain",
+    "Mishra", "Patra", "Sethi", "Barik", "Dehury",
+]
+ACTIVITIES = ["Hb Test", "Sanitary Napkin Distribution", "Physiotheraphy", "Health Camp", "Counselling"]
+GENDERS = np.array(["Female", "Male", "F", "M"])
+
+PERIOD_START = datetime(2024, 4, 1)
+PERIOD_DAYS = 365
+
+
+def parse_size(value: str) -> int:
+    """Parse sizes such as 10k, 100k or 1M"""
+    value = value.strip().lower()
+    multiplier = 1
+    if value.endswith("k"):
+        multiplier, value = 1_000, value[:-1]
+    elif value.endswith("m"):
+        multiplier, value = 1_000_000, value[:-1]
+    return int(float(value) * multiplier)
+
+
+def _split_rows(total: int, shares) -> Dict[str, int]:
+    """Distribute ``total`` rows over sheets according to their share"""
+    counts = {name: max(1, int(total * share)) for name, _, share in shares}
+    largest = max(shares, key=lambda item: item[2])[0]
+    counts[largest] += total - sum(counts.values())
+    return counts
+
+
+def _people(rng: np.random.Generator, count: int) -> Dict[str, np.ndarray]:
+    """Generate a population of beneficiaries who may be visited several times"""
+    districts = np.array([loc.upper() for loc in LOCATIONS])
+    villages = np.array([f"Village {i:05d}" for i in range(max(10, count // 40))])
+    location_idx = rng.integers(0, len(LOCATIONS), count)
+    birth = np.datetime64(PERIOD_START) - rng.integers(11 * 365, 60 * 365, count).astype("timedelta64[D]")
+    return {
+        "name": np.char.add(
+            np.char.add(rng.choice(FIRST_NAMES, count), " "), rng.choice(LAST_NAMES, count)
+        ),
+        "district": districts[location_idx],
+        "location_fk": location_idx + 1,
+        "village": rng.choice(villages, count),
+        "block": np.char.add("Block ", (location_idx * 4 + rng.integers(0, 4, count)).astype(str)),
+        "state_fk": rng.choice([code for code, _ in STATES], count),
+        "birth": birth,
+        "gender": rng.choice(GENDERS, count, p=[0.7, 0.2, 0.07, 0.03]),
+    }
+
+
+def _write_master_sheets(wb: Workbook):
+    """Write the master sheets using the same layout as the real workbook"""
+    ws = wb.create_sheet("Master")
+    ws.append(["Common Constnat", None, None, None])
+    for name, code, _ in CSR_MIS_PROGRAMS:
+        ws.append([code, name, name, "programCode"])
+
+    ws = wb.create_sheet("State Master")
+    ws.append([None, None, "State"])
+    for code, name in STATES:
+        ws.append([None, code, name])
+
+    ws = wb.create_sheet("Location Master")
+    ws.append([None, None, None, None])
+    ws.append([None, None, None, "Locations"])
+    for i, name in enumerate(LOCATIONS, start=1):
+        ws.append([None, None, i, name])
+
+    ws = wb.create_sheet("SDG Master")
+    ws.append([None, None, None, None])
+    ws.append([None, None, None, "SDG Alignment"])
+    for i, name in enumerate(SDGS, start=1):
+        ws.append([None, None, i, name])
+
+
+def generate_csr_mis(path: str, rows: int, seed: int = 42) -> Dict[str, int]:
+    """Write a CSR MIS-shaped workbook with ``rows`` beneficiary rows"""
+    rng = np.random.default_rng(seed)
+    wb = Workbook(write_only=True)
+    _write_master_sheets(wb)
+
+    people = _people(rng, max(1, int(rows * 0.6)))
+    position = {name: i for i, name in enumerate(CSR_MIS_COLUMNS)}
+    label_row = [CSR_MIS_LABELS.get(col) for col in CSR_MIS_COLUMNS]
+    counts = _split_rows(rows, CSR_MIS_PROGRAMS)
+
+    for sheet_name, program_code, _ in CSR_MIS_PROGRAMS:
+        n = counts[sheet_name]
+        ws = wb.create_sheet(sheet_name)
+        ws.append([None] * len(CSR_MIS_COLUMNS))
+        ws.append(CSR_MIS_COLUMNS)
+        ws.append(label_row)
+
+        who = rng.integers(0, len(people["name"]), n)
+        visit = np.datetime64(PERIOD_START) + rng.integers(0, PERIOD_DAYS, n).astype("timedelta64[D]")
+        age = ((visit - people["birth"][who]).astype("timedelta64[D]").astype(int) // 365)
+        columns = {
+            "name": people["name"][who],
+            "activities": rng.choice(ACTIVITIES, n),
+            "age": age,
+            "district": people["district"][who],
+            "gender": people["gender"][who],
+            "beneriries_code": people["gender"][who],
+            "jindal_arogyam_date": visit.astype("datetime64[s]").astype(datetime),
+            "objective": np.full(n, f"{sheet_name} objective"),
+            "total_beneficiary": rng.integers(1, 50, n),
+            "village": people["village"][who],
+            "business_location_fk_id": rng.choice([2, 3], n),
+            "existing_project_fk_id": np.full(n, 7),
+            "program_code_fk_id": np.full(n, program_code),
+            "state_fk_id": people["state_fk"][who],
+            "date_of_birth": people["birth"][who].astype("datetime64[s]").astype(datetime),
+            "haemoglobin": np.round(rng.normal(10.5, 1.5, n), 1),
+            "height": rng.integers(120, 175, n),
+            "number_of_visit": rng.integers(1, 6, n),
+            "weight": rng.integers(30, 80, n),
+            "Location_fk_id": people["location_fk"][who],
+            "academic_year": np.full(n, "2024 - 25"),
+            "sdg_alignment": rng.integers(1, len(SDGS) + 1, n),
+            "block": people["block"][who],
+        }
+        ordered = [(position[col], values) for col, values in columns.items()]
+        for i in range(n):
+            row = [None] * len(CSR_MIS_COLUMNS)
+            for pos, values in ordered:
+                value = values[i]
+                row[pos] = value.item() if hasattr(value, "item") else value
+            ws.append(row)
+
+    wb.save(path)
+    return counts
+
+
+def generate_jspl_input(path: str, rows: int, seed: int = 43) -> Dict[str, int]:
+    """Write a JSPL CSR Data Input-shaped workbook with ``rows`` entry rows"""
+    rng = np.random.default_rng(seed)
+    wb = Workbook(write_only=True)
+
+    ws = wb.create_sheet("Master_Lists")
+    ws.append(["Gender", "Yes_No", "SDG", "Service_Type"])
+    services = ["OPD", "IPD", "Counselling", "Nutrition", "Training", "Awareness", "Treatment", "Referral"]
+    for i in range(17):
+        ws.append([
+            ["Male", "Female", "Other"][i] if i < 3 else None,
+            ["Yes", "No"][i] if i < 2 else None,
+            f"SDG {i + 1}",
+            services[i] if i < len(services) else None,
+        ])
+
+    shares = [(name, 0, 1 / len(JSPL_PROGRAMS)) for name in JSPL_PROGRAMS]
+    counts = _split_rows(rows, shares)
+    people = _people(rng, max(1, int(rows * 0.6)))
+    state_names = dict(STATES)
+
+    for program in JSPL_PROGRAMS:
+        n = counts[program]
+        ws = wb.create_sheet(program)
+        ws.append(JSPL_COLUMNS)
+        who = rng.integers(0, len(people["name"]), n)
+        offsets = rng.integers(0, PERIOD_DAYS, n)
+        for i in range(n):
+            p = who[i]
+            visit = PERIOD_START + timedelta(days=int(offsets[i]))
+            ws.append([
+                i + 1,
+                program.upper()[:6],
+                program,
+                visit.strftime("%Y-%m"),
+                visit,
+                state_names[int(people["state_fk"][p])],
+                str(people["district"][p]),
+                str(people["block"][p]),
+                str(people["village"][p]),
+                "Business" if i % 3 else "Non-Business",
+                str(rng.choice(ACTIVITIES)),
+                f"{program} objective",
+                f"SDG {int(rng.integers(1, 18))}",
+                "No",
+                None,
+                services[i % len(services)],
+                f"BEN{p:07d}",
+                str(people["name"][p]),
+                int((np.datetime64(visit) - people["birth"][p]).astype("timedelta64[D]").astype(int) // 365),
+                str(people["gender"][p]),
+                None,
+            ])
+
+    wb.save(path)
+    return counts
+
+
+def generate_dataset(out_dir: str, rows: int, jspl_fraction: float = 0.1, seed: int = 42) -> Tuple[str, str]:
+    """Generate both workbooks into ``out_dir`` and return their paths"""
+    os.makedirs(out_dir, exist_ok=True)
+    csr_path = os.path.join(out_dir, "CSR MIS.xlsx")
+    jspl_path = os.path.join(out_dir, "JSPL CSR Data Input.xlsx")
+    generate_csr_mis(csr_path, rows, seed)
+    generate_jspl_input(jspl_path, max(len(JSPL_PROGRAMS), int(rows * jspl_fraction)), seed + 1)
+    return csr_path, jspl_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic CSR workbooks")
+    parser.add_argument("--rows", default="10k", help="Beneficiary rows, e.g. 10k, 100k, 1M")
+    parser.add_argument("--out", default=None, help="Output directory (default: bench_data/<rows>)")
+    parser.add_argument("--jspl-fraction", type=float, default=0.1, help="JSPL rows as a fraction of --rows")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rows = parse_size(args.rows)
+    out_dir = args.out or os.path.join("bench_data", args.rows)
+    csr_path, jspl_path = generate_dataset(out_dir, rows, args.jspl_fraction, args.seed)
+    print(f"Wrote {csr_path}")
+    print(f"Wrote {jspl_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+Page Views for CSR Dashboard
+One module per dashboard page, imported lazily by app.main()
+"""
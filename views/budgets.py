@@ -0,0 +1,63 @@
+"""
+Budgets Page for CSR Dashboard
+Budget allocation and utilisation by program
+"""
+import pandas as pd
+import streamlit as st
+
+from charts import create_bar_chart
+from components import render_kpi_card
+from instrumentation import timed
+
+
+@timed("page.budgets")
+def budgets_page(data_loader):
+    """Budgets page"""
+    st.markdown("""
+    <div class="dashboard-header">
+        <h1>💰 Budgets</h1>
+        <p>Budget allocation and expenditure tracking</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Budget overview
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        render_kpi_card("Total Budget", "₹50,00,00,000", "Allocated", "#667eea")
+    
+    with col2:
+        render_kpi_card("Utilized", "₹35,00,00,000", "70% utilized", "#10b981")
+    
+    with col3:
+        render_kpi_card("Remaining", "₹15,00,00,000", "30% remaining", "#f59e0b")
+    
+    with col4:
+        render_kpi_card("Programs", "12", "Active programs", "#ef4444")
+    
+    st.markdown("---")
+    
+    # Budget breakdown by program
+    st.markdown("### Budget Breakdown by Program")
+    
+    budget_data = {
+        'Program': ['Jindal Arogyam', 'Kishori Express', 'Vatsalya', 'Education', 'Health Awareness'],
+        'Allocated': [10000000, 8000000, 6000000, 12000000, 5000000],
+        'Utilized': [7500000, 6000000, 4500000, 9000000, 3500000],
+        'Remaining': [2500000, 2000000, 1500000, 3000000, 1500000]
+    }
+    
+    budget_df = pd.DataFrame(budget_data)
+    budget_df['Utilization %'] = (budget_df['Utilized'] / budget_df['Allocated'] * 100).round(2)
+    
+    st.dataframe(budget_df, use_container_width=True)
+    
+    # Budget chart
+    fig = create_bar_chart(
+        budget_df,
+        'Program',
+        'Allocated',
+        "Budget Allocation by Program",
+        "#667eea"
+    )
+    st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,71 @@
+"""
+What Changed Page for CSR Dashboard
+Row-level differences since the previous data version
+"""
+from datetime import datetime
+
+import streamlit as st
+
+from change_detection import get_changeset
+from components import render_kpi_card
+from cubes import program_label
+from instrumentation import timed
+
+
+@timed("page.changes")
+def changes_page(data_loader):
+    """Rows added, edited and removed since the previous upload"""
+    st.markdown("""
+    <div class="dashboard-header">
+        <h1>🔄 What Changed</h1>
+        <p>Rows added, edited and removed since the last upload</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    changeset = get_changeset(data_loader)
+    if not changeset.has_baseline:
+        st.info("This is the first upload on record. Changes will be listed once a newer workbook is loaded.")
+        return
+    
+    uploaded = datetime.fromtimestamp(changeset.base_time).strftime("%d-%m-%Y %H:%M")
+    st.caption(f"Compared with the data loaded on {uploaded}")
+    if changeset.is_empty:
+        st.success("No rows changed since the last upload.")
+        return
+    
+    summary = changeset.summary()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        render_kpi_card("Added", f"{int(summary['added'].sum()):,}", "New rows", "#10b981")
+    with col2:
+        render_kpi_card("Edited", f"{int(summary['edited'].sum()):,}", "Rows with changed values", "#f59e0b")
+    with col3:
+        render_kpi_card("Removed", f"{int(summary['removed'].sum()):,}", "Rows no longer present", "#ef4444")
+    with col4:
+        render_kpi_card("Sheets Changed", len(summary), f"of {len(changeset.rows)}", "#667eea")
+    
+    st.markdown("---")
+    st.markdown("### 📋 Changes by Sheet")
+    display = summary.assign(sheet=summary["sheet"].map(program_label))
+    st.dataframe(display.rename(columns=str.title), use_container_width=True, hide_index=True)
+    for sheet, schema in changeset.schema.items():
+        for kind, columns in schema.items():
+            st.markdown(f"- **{program_label(sheet)}**: {kind.replace('_', ' ')}: {', '.join(columns)}")
+    
+    st.markdown("### 🔍 Changed Rows")
+    col1, col2 = st.columns(2)
+    with col1:
+        sheet = st.selectbox("Sheet", summary["sheet"].tolist(), format_func=program_label, key="changes_sheet")
+    with col2:
+        change = st.selectbox("Change", ["added", "edited", "removed"], key="changes_kind")
+    
+    rows = changeset.for_sheet(sheet, change)
+    current = data_loader.get_data(sheet)
+    if change == "removed" or current is None:
+        # Removed rows only exist in the previous upload's hashes
+        st.dataframe(rows[["key"]], use_container_width=True, hide_index=True)
+    else:
+        detail = current.iloc[rows["row"].to_numpy()].copy()
+        if change == "edited":
+            detail.insert(0, "changed_columns", rows["columns"].to_numpy())
+        st.dataframe(detail, use_container_width=True, height=400)
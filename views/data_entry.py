@@ -0,0 +1,129 @@
+"""
+Data Entry Page for CSR Dashboard
+Beneficiary entry form with cascading location pickers
+"""
+import streamlit as st
+
+from entry_store import EntryStore
+from instrumentation import timed
+from master_data import LEVELS, get_master_index
+
+
+def render_location_cascade(master_index):
+    """Render cascading selectboxes for the location hierarchy"""
+    selected = {}
+    path = []
+    for depth, level in enumerate(LEVELS):
+        # Only offer children once every level above has a value
+        options = master_index.children(*path) if len(path) == depth else []
+        value = st.selectbox(
+            f"{level}*" if level == "State" else level,
+            [""] + options,
+            disabled=not options
+        )
+        selected[level] = value
+        if value:
+            path.append(value)
+    return selected
+
+
+@timed("page.data_entry")
+def data_entry_page(data_loader):
+    """Data entry form page"""
+    st.markdown("""
+    <div class="dashboard-header">
+        <h1>📝 Data Entry</h1>
+        <p>Enter new CSR program data</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Program selection
+    programs = [
+        "Jindal Arogyam Hospital",
+        "Kishori Express",
+        "Vatsalya",
+        "Subhangi",
+        "Swasti Express",
+        "Chiranjeevi",
+        "HIV/AIDS",
+        "TB Mukt Bharat",
+        "Poor Patient Treatment",
+        "Tele-Medicine",
+        "Mobile Medical Van/ Emergency Care"
+    ]
+    
+    selected_program = st.selectbox("Select Program", programs)
+    
+    # Master lists and the location hierarchy are built once per data version
+    master_index = get_master_index(data_loader)
+    
+    st.markdown("---")
+    
+    # Form in two columns
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        program_code = st.text_input("Program Code*", value=selected_program)
+        location = st.selectbox("Location*", [""] + master_index.locations)
+        objective = st.text_area("Objective*", placeholder="Enter objective")
+        program_type = st.selectbox("Please mention if it is*", ["Direct", "Collaboration", "Partnership"])
+        agency_name = st.text_input("Agency Name", placeholder="Agency Name:")
+        services = st.text_input("Services", placeholder="Services")
+        name = st.text_input("Name", placeholder="Name")
+        gender = st.selectbox("Gender", ["", "Male", "Female", "Other"])
+    
+    with col2:
+        business_location = st.selectbox("Business Location/Non-Business Location*", ["Business", "Non-Business"])
+        activities = st.text_area("Activities*", placeholder="Activities")
+        
+        sdg_alignment = st.selectbox("SDG Alignment*", [""] + master_index.sdgs)
+        collaboration_type = st.selectbox("Please mention if it is*", ["", "Direct", "Collaboration", "Partnership"])
+        date = st.date_input("Date*")
+        beneficiary_code = st.selectbox("Beneficiary Code", [""])
+        age = st.number_input("Age", min_value=0, max_value=120, value=0)
+        
+        # Cascading State → District → Block → Village; each list only holds
+        # the children of the level above
+        place = render_location_cascade(master_index)
+    
+    st.markdown("---")
+    
+    # Submit button
+    col1, col2, col3 = st.columns([1, 1, 1])
+    with col2:
+        if st.button("💾 Submit Data", use_container_width=True):
+            required = {
+                "Program Code": program_code, "Location": location, "Objective": objective,
+                "Activities": activities, "SDG Alignment": sdg_alignment, "State": place.get("State"),
+            }
+            missing = [label for label, value in required.items() if not value]
+            if missing:
+                st.error(f"Please fill in: {', '.join(missing)}")
+            else:
+                # Queued in the entry store; compaction.py appends it to the workbook
+                store = EntryStore()
+                store.add(selected_program, {
+                    "Program_Code": program_code,
+                    "Reporting_Month": date.strftime("%Y-%m"),
+                    "Activity_Date": date,
+                    "State": place.get("State"),
+                    "District": place.get("District") or None,
+                    "Block": place.get("Block") or None,
+                    "Location": location,
+                    "Village": place.get("Village") or None,
+                    "Business_or_NonBusiness_Location": business_location,
+                    "Activity_Type": activities,
+                    "Objective": objective,
+                    "SDG_Alignment": sdg_alignment,
+                    "Is_Collaboration": "No" if (collaboration_type or program_type) == "Direct" else "Yes",
+                    "Agency_Name": agency_name or None,
+                    "Service_Type": services or None,
+                    "Beneficiary_Code": beneficiary_code or None,
+                    "Beneficiary_Name": name or None,
+                    "Age": age or None,
+                    "Gender": gender or None,
+                })
+                st.success(
+                    f"Data submitted successfully! It will be added to the input workbook by the next "
+                    f"compaction run ({store.pending_count()} entries pending)."
+                )
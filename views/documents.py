@@ -0,0 +1,149 @@
+"""
+Documents Page for CSR Dashboard
+Document library browsed by category
+"""
+import streamlit as st
+
+from document_store import CATEGORIES, DocumentStore
+from instrumentation import timed
+from kpis import PROGRAM_KEYS
+from search_index import get_indexer
+
+PAGE_SIZE = 25
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def render_upload_form(store: DocumentStore, indexer, category: str):
+    """Upload one or more files into ``category`` and queue them for indexing"""
+    with st.form("document_upload", clear_on_submit=True):
+        files = st.file_uploader("Files", accept_multiple_files=True)
+        col1, col2 = st.columns(2)
+        with col1:
+            program = st.selectbox("Program", [""] + list(PROGRAM_KEYS))
+        with col2:
+            doc_date = st.date_input("Document Date", value=None)
+        submitted = st.form_submit_button("Upload")
+
+    if submitted and files:
+        added = duplicates = 0
+        for uploaded in files:
+            document, is_new = store.add(uploaded, uploaded.name, category, program, doc_date, uploaded.type or None)
+            if is_new:
+                indexer.submit(document.id)
+            added += is_new
+            duplicates += not is_new
+        message = f"Uploaded {added} document(s) to {category}."
+        if duplicates:
+            message += f" {duplicates} already stored and skipped."
+        st.success(message)
+
+
+def render_document(store: DocumentStore, document):
+    """Preview and download of the opened document"""
+    preview = store.preview(document)
+    if preview:
+        st.image(preview, caption=document.name)
+    else:
+        text = store.text_preview(document)
+        if text is not None:
+            st.text(text)
+    st.download_button(
+        f"⬇️ Download {document.name}",
+        data=store.read(document),
+        file_name=document.name,
+        mime=document.mime,
+    )
+
+
+def render_search_results(indexer, query: str, category: str, program):
+    """Ranked matches within the selected category and program"""
+    hits = indexer.index.search(query, category, program)
+    if indexer.backlog:
+        st.caption(f"{indexer.backlog} recent upload(s) are still being indexed.")
+    if not hits:
+        st.info(f"No documents in {category} match {query}.")
+        return
+    for hit in hits:
+        details = " · ".join(part for part in [hit.document.program, hit.document.doc_date] if part)
+        st.markdown(f"**{hit.document.name}**  \n{details}  \n{hit.snippet}")
+    opened = st.selectbox(
+        "Open Document",
+        [None] + [hit.document for hit in hits],
+        format_func=lambda document: "" if document is None else document.name
+    )
+    if opened is not None:
+        render_document(indexer.index.store, opened)
+
+
+@timed("page.documents")
+def documents_page():
+    """Documents page"""
+    st.markdown("""
+    <div class="dashboard-header">
+        <h1>📄 Documents</h1>
+        <p>CSR documentation and reports</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    store = DocumentStore()
+    indexer = get_indexer(store)
+    counts = store.category_counts()
+
+    selected_category = st.selectbox(
+        "Select Document Category",
+        CATEGORIES,
+        format_func=lambda category: f"{category} ({counts.get(category, 0)})"
+    )
+    st.markdown(f"### {selected_category}")
+
+    with st.expander("📤 Upload Documents"):
+        render_upload_form(store, indexer, selected_category)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        program = st.selectbox("Filter by Program", ["All"] + store.programs(selected_category))
+    program = None if program == "All" else program
+
+    query = st.text_input("🔎 Search documents", placeholder='Words or "exact phrase", e.g. "Pragati Sanstha" Kosampali')
+    if query:
+        render_search_results(indexer, query, selected_category, program)
+        return
+
+    total = store.count(selected_category, program)
+    if total == 0:
+        st.info(f"No documents in {selected_category} yet.")
+        return
+    with col2:
+        pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+        page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1)
+
+    # Only one page of metadata is read; files are opened on demand
+    documents = store.list(selected_category, program, limit=PAGE_SIZE, offset=(page_number - 1) * PAGE_SIZE)
+    st.caption(f"{total} documents")
+    for document in documents:
+        thumb_col, info_col = st.columns([1, 5])
+        with thumb_col:
+            thumbnail = store.thumbnail(document)
+            if thumbnail:
+                st.image(thumbnail)
+            else:
+                st.markdown("🖼️" if document.is_image else "📄")
+        with info_col:
+            details = " · ".join(part for part in [document.program, document.doc_date, format_size(document.size)] if part)
+            st.markdown(f"**{document.name}**  \n{details}")
+
+    st.markdown("---")
+    opened = st.selectbox(
+        "Open Document",
+        [None] + documents,
+        format_func=lambda document: "" if document is None else document.name
+    )
+    if opened is not None:
+        render_document(store, opened)
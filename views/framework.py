@@ -0,0 +1,43 @@
+"""
+Framework Page for CSR Dashboard
+Framework overview and the State, Location and SDG master lists
+"""
+import streamlit as st
+
+from instrumentation import timed
+
+
+@timed("page.framework")
+def framework_page(data_loader):
+    """Framework page"""
+    st.markdown("""
+    <div class="dashboard-header">
+        <h1>📋 CSR Framework</h1>
+        <p>Governance structure and framework documentation</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    st.info("Framework documentation and governance structure will be displayed here.")
+    
+    # Display master data
+    st.markdown("### Master Data")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        state_master = data_loader.get_data("CSR_MIS_State Master")
+        if state_master is not None and not state_master.empty:
+            st.markdown("#### State Master")
+            st.dataframe(state_master, use_container_width=True, height=300)
+    
+    with col2:
+        location_master = data_loader.get_data("CSR_MIS_Location Master")
+        if location_master is not None and not location_master.empty:
+            st.markdown("#### Location Master")
+            st.dataframe(location_master, use_container_width=True, height=300)
+    
+    with col3:
+        sdg_master = data_loader.get_data("CSR_MIS_SDG Master")
+        if sdg_master is not None and not sdg_master.empty:
+            st.markdown("#### SDG Master")
+            st.dataframe(sdg_master, use_container_width=True, height=300)
@@ -0,0 +1,73 @@
+"""
+KPIs Page for CSR Dashboard
+Indicator progress against targets and haemoglobin follow-up
+"""
+import streamlit as st
+
+from components import render_kpi_card, render_progress_bar
+from instrumentation import timed
+from longitudinal import get_longitudinal_index
+
+
+@timed("page.kpis")
+def kpis_page(data_loader):
+    """KPIs page with detailed indicators"""
+    st.markdown("""
+    <div class="dashboard-header">
+        <h1>📊 Key Performance Indicators</h1>
+        <p>Track progress across all CSR programs</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # KPI Indicators Table
+    kpi_data = [
+        {"indicator": "Improvement in HB", "current": 10.1, "target": 11, "last_updated": "27-11-2025", "status": "On track"},
+        {"indicator": "Number of Beneficiaries Screened", "current": 39645, "target": 50000, "last_updated": "27-11-2025", "status": "On track"},
+        {"indicator": "Number of Village level health awareness sessions conducted", "current": 0, "target": 1500, "last_updated": "27-11-2025", "status": "On track"},
+        {"indicator": "ASHA Workers trained", "current": 200, "target": 1500, "last_updated": "27-11-2025", "status": "At risk"},
+        {"indicator": "No of menstrual hygiene education sessions conducted", "current": 0, "target": 120, "last_updated": "27-11-2025", "status": "On track"},
+    ]
+    
+    # Haemoglobin outcome from baseline → latest readings per beneficiary
+    hb = get_longitudinal_index(data_loader).cohort_summary("haemoglobin")
+    if hb["cohort"]:
+        kpi_data[0]["current"] = round(hb["latest"], 1)
+        kpi_data[0]["status"] = "On track" if hb["latest"] >= 0.9 * kpi_data[0]["target"] else "At risk"
+    
+    st.markdown("### 📈 Indicator Progress")
+    
+    for kpi in kpi_data:
+        with st.container():
+            col1, col2, col3, col4, col5 = st.columns([3, 1.5, 2, 1, 1])
+            
+            with col1:
+                st.markdown(f"**{kpi['indicator']}**")
+            
+            with col2:
+                st.markdown(f"**{kpi['current']}/{kpi['target']}**")
+            
+            with col3:
+                render_progress_bar(kpi['current'], kpi['target'], "")
+            
+            with col4:
+                st.markdown(kpi['last_updated'])
+            
+            with col5:
+                status_class = "status-on-track" if kpi['status'] == "On track" else "status-at-risk"
+                st.markdown(f'<span class="{status_class}">{kpi["status"]}</span>', unsafe_allow_html=True)
+            
+            st.markdown("---")
+    
+    st.markdown("### 🩸 Haemoglobin Follow-up")
+    if hb["cohort"]:
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            render_kpi_card("Cohort", f"{hb['cohort']:,}", "Beneficiaries with a follow-up reading", "#667eea")
+        with col2:
+            render_kpi_card("Baseline HB", f"{hb['baseline']:.1f}", "Average first reading (g/dL)", "#f59e0b")
+        with col3:
+            render_kpi_card("Latest HB", f"{hb['latest']:.1f}", f"Average change {hb['change']:+.2f} g/dL", "#10b981")
+        with col4:
+            render_kpi_card("Improved", f"{hb['improved_share']:.0%}", "Share with a higher latest reading", "#ef4444")
+    else:
+        st.info("No beneficiary has haemoglobin readings on two different dates yet.")
@@ -0,0 +1,264 @@
+"""
+Overview Page for CSR Dashboard
+Headline KPIs, geography and trend charts
+"""
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from charts import (create_bar_chart, create_donut_chart, create_line_chart,
+                    create_stacked_bar_chart, create_sunburst_chart, create_waterfall_chart)
+from components import beneficiary_subtitle, render_kpi_card, render_progress_bar
+from cubes import GRAINS, get_geo_cube, get_time_cubes, program_label
+from entity_resolution import get_entity_index
+from instrumentation import timed
+from kpis import calculate_kpis, record_totals
+from master_data import LEVELS
+from query_cache import cached_query
+from sketches import get_beneficiary_sketches, get_distribution_sketches
+
+MEASURE_LABELS = {
+    "age": ("Age", "yrs"),
+    "income": ("Family Income", "₹"),
+    "haemoglobin": ("Haemoglobin", "g/dL"),
+    "weight": ("Weight", "kg"),
+    "height": ("Height", "cm"),
+}
+AGE_BANDS = [0, 5, 10, 15, 20, 30, 45, 60, 111]
+AGE_BAND_LABELS = ["0–4", "5–9", "10–14", "15–19", "20–29", "30–44", "45–59", "60+"]
+# WHO anaemia cut-offs (non-pregnant women)
+HB_BANDS = [3, 8, 11, 12, 20]
+HB_BAND_LABELS = ["Severe (<8)", "Moderate (8–10.9)", "Mild (11–11.9)", "Normal (12+)"]
+PERCENTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+
+def program_trend(cubes, grain: str) -> pd.DataFrame:
+    """Records per program and period, labelled for the legend"""
+    trend = cubes.query(grain, by=["program"])
+    trend["Program"] = trend["program"].astype(str).map(program_label)
+    return trend
+
+
+@timed("page.overview")
+def overview_page(data_loader):
+    """Overview/KPI Dashboard Page"""
+    try:
+        st.markdown("""
+        <div class="dashboard-header">
+            <h1>📊 CSR Dashboard Overview</h1>
+            <p>Comprehensive view of all CSR programs and key performance indicators</p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Calculate KPIs
+        with st.spinner("Calculating KPIs..."):
+            kpis = calculate_kpis(data_loader)
+    except Exception as e:
+        st.error(f"Error loading overview page: {str(e)}")
+        st.exception(e)
+        return
+    
+    # KPI Cards Row 1
+    col1, col2, col3, col4 = st.columns(4)
+    
+    totals = record_totals(data_loader, kpis)
+    with col1:
+        render_kpi_card("Active Programs", totals["active_programs"], "Programs with data", "#667eea")
+    
+    with col2:
+        render_kpi_card("Total Records", f"{totals['total_records']:,}", "All programs combined", "#10b981")
+    
+    with col3:
+        # Distinct people across all programs (merged distinct-count sketches)
+        beneficiaries = get_beneficiary_sketches(data_loader).merged()
+        render_kpi_card("Beneficiaries", f"{beneficiaries.count():,}", beneficiary_subtitle(beneficiaries), "#f59e0b")
+        reach = get_entity_index(data_loader).program_reach()
+        repeat_reach = int(reach[reach.index > 1].sum())
+        if repeat_reach:
+            st.caption(f"{repeat_reach:,} beneficiaries are enrolled in more than one program")
+    
+    with col4:
+        # Last updated date
+        last_updated = datetime.now().strftime("%d-%m-%Y")
+        render_kpi_card("Last Updated", last_updated, "Data refresh date", "#ef4444")
+    
+    # Medians and spreads of the numeric measures, answered from the sketches
+    distributions = get_distribution_sketches(data_loader)
+    measures = distributions.measures[:4]
+    if measures:
+        colors = ["#667eea", "#10b981", "#f59e0b", "#ef4444"]
+        for col, measure, color in zip(st.columns(4), measures, colors):
+            label, unit = MEASURE_LABELS[measure]
+            sketch = distributions.merged(measure)
+            p25, median, p75 = sketch.quantiles([0.25, 0.5, 0.75])
+            with col:
+                render_kpi_card(f"Median {label}", f"{median:,.1f} {unit}",
+                                f"IQR {p25:,.1f}–{p75:,.1f} ({sketch.n:,} records)", color)
+    
+    st.markdown("---")
+    
+    # KPI Progress Indicators
+    st.markdown("### 📈 Key Performance Indicators")
+    
+    # Sample KPI data - in real implementation, this would come from actual data
+    kpi_data = [
+        {"indicator": "Improvement in HB", "current": 10.1, "target": 11, "last_updated": "27-11-2025"},
+        {"indicator": "Number of Beneficiaries Screened", "current": 39645, "target": 50000, "last_updated": "27-11-2025"},
+        {"indicator": "Number of Village level health awareness sessions conducted", "current": 0, "target": 1500, "last_updated": "27-11-2025"},
+        {"indicator": "ASHA Workers trained", "current": 200, "target": 1500, "last_updated": "27-11-2025"},
+        {"indicator": "No of menstrual hygiene education sessions conducted", "current": 0, "target": 120, "last_updated": "27-11-2025"},
+    ]
+    
+    for kpi in kpi_data:
+        render_progress_bar(
+            kpi["current"],
+            kpi["target"],
+            f"{kpi['indicator']} (Last Updated: {kpi['last_updated']})"
+        )
+    
+    st.markdown("---")
+    
+    # Charts Section
+    st.markdown("### 📊 Data Visualizations")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Age Distribution Chart
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+        st.markdown("#### Age Distribution of Participants")
+        
+        # Age bands counted from the merged age sketches
+        age_sketch = distributions.merged("age")
+        if age_sketch.n:
+            age_counts = age_sketch.histogram(AGE_BANDS)
+            fig = create_donut_chart(
+                [label for label, count in zip(AGE_BAND_LABELS, age_counts) if count],
+                [count for count in age_counts if count],
+                "Age Distribution"
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No ages are recorded in the program sheets yet.")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    with col2:
+        # Income percentiles when recorded, otherwise haemoglobin bands
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+        income_sketch = distributions.merged("income")
+        if income_sketch.n:
+            st.markdown("#### Income Distribution of Participant Families")
+            income_df = pd.DataFrame({
+                'Percentile': [f"P{int(q * 100)}" for q in PERCENTILES],
+                'Income': income_sketch.quantiles(PERCENTILES).round(0),
+            })
+            fig = create_bar_chart(
+                income_df,
+                'Percentile',
+                'Income',
+                "Family Income by Percentile",
+                "#667eea"
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.markdown("#### Haemoglobin Levels of Participants")
+            hb_sketch = distributions.merged("haemoglobin")
+            if hb_sketch.n:
+                hb_df = pd.DataFrame({'Level': HB_BAND_LABELS, 'Count': hb_sketch.histogram(HB_BANDS)})
+                fig = create_bar_chart(
+                    hb_df,
+                    'Level',
+                    'Count',
+                    "Haemoglobin (g/dL)",
+                    "#667eea"
+                )
+                st.plotly_chart(fig, use_container_width=True)
+                st.caption("No family income is recorded in the program sheets yet.")
+            else:
+                st.info("No family income or haemoglobin is recorded in the program sheets yet.")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Additional Charts Row
+    st.markdown("---")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Average Attendance Chart (Stacked Bar)
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+        st.markdown("#### Average Attendance School-wise")
+        
+        attendance_data = {
+            'School': ['Verma Nagar', 'Sultanpur', 'Sharma Colony', 'Shanti Colony', 'Ram Nagar'],
+            'Male': [86.4, 86.6, 84.6, 85.4, 85.9],
+            'Female': [86.0, 84.6, 84.8, 84.9, 85.5]
+        }
+        attendance_df = pd.DataFrame(attendance_data)
+        attendance_melted = pd.melt(
+            attendance_df,
+            id_vars=['School'],
+            value_vars=['Male', 'Female'],
+            var_name='Gender',
+            value_name='Attendance'
+        )
+        
+        fig = create_stacked_bar_chart(
+            attendance_melted,
+            'School',
+            'Attendance',
+            'Gender',
+            "Average Attendance by School",
+            ["#ff6b6b", "#4ecdc4"]
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    with col2:
+        # Waterfall Chart
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+        st.markdown("#### Afterschool Program Progress")
+        
+        schools = ['Krishna Puram', 'Nehru Nagar', 'Patel Vihar', 'Rajpur', 'Ram Nagar', 'Total']
+        values = [8.21, 6.92, 6.04, 6.44, 6.08, 33.69]
+        
+        fig = create_waterfall_chart(schools, values, "Afterschool Program Contributions")
+        st.plotly_chart(fig, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Program Trends (read from the precomputed time cubes)
+    st.markdown("---")
+    st.markdown("#### Program Trends")
+    cubes = get_time_cubes(data_loader)
+    grain = st.radio("Trend granularity", list(GRAINS), index=2, horizontal=True)
+    trend = cached_query(data_loader, "overview.trend", lambda: program_trend(cubes, grain), grain=grain)
+    if trend.empty:
+        st.info("No dated program records available for trends.")
+    else:
+        fig = create_line_chart(trend, "period", "count", "Program", f"{grain} Records per Program")
+        st.plotly_chart(fig, use_container_width=True)
+    
+    # Beneficiaries by Location (drill-down over the geographic roll-up)
+    st.markdown("---")
+    st.markdown("#### Beneficiaries by Location")
+    geo_cube = get_geo_cube(data_loader)
+    path = []
+    drill_cols = st.columns(len(LEVELS) - 1)
+    for depth, col in enumerate(drill_cols):
+        # Only the level below the current selection is looked up
+        options = geo_cube.children(*path).index.tolist() if len(path) == depth else []
+        with col:
+            value = st.selectbox(LEVELS[depth], ["All"] + options, disabled=not options, key=f"geo_{LEVELS[depth]}")
+        if value != "All" and len(path) == depth:
+            path.append(value)
+    sunburst = cached_query(data_loader, "overview.sunburst", lambda: geo_cube.sunburst(*path), path=path)
+    if len(sunburst) <= 1:
+        st.info("No location data available.")
+    else:
+        fig = create_sunburst_chart(
+            sunburst["label"],
+            sunburst["parent"],
+            sunburst["value"],
+            " → ".join(path) or "All Locations",
+            ids=sunburst["id"]
+        )
+        st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,127 @@
+"""
+Program Data Page for CSR Dashboard
+Demographics and records of one Health & Nutrition program
+"""
+import pandas as pd
+import streamlit as st
+
+from charts import create_bar_chart, create_donut_chart
+from components import beneficiary_subtitle, render_kpi_card
+from instrumentation import timed
+from master_data import normalise_gender
+from sketches import get_beneficiary_sketches, get_distribution_sketches
+
+TABLE_PAGE_SIZE = 100
+# Columns shown until the user picks others
+TABLE_COLUMNS = 12
+
+
+@timed("page.program_data")
+def program_data_page(data_loader, program_name):
+    """Program-specific data page"""
+    st.markdown(f"""
+    <div class="dashboard-header">
+        <h1>🏥 {program_name}</h1>
+        <p>Program data and analytics</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Get program data
+    program_key = data_loader.resolve_program_key(program_name)
+    total_records = data_loader.get_row_count(program_key) if program_key is not None else 0
+    
+    if total_records > 0:
+        # Analytics only read the gender, age and beneficiary columns
+        columns = data_loader.get_columns(program_key)
+        gender_cols = [col for col in columns if 'gender' in col.lower()]
+        age_cols = [col for col in columns if 'age' in col.lower()]
+        beneficiary_cols = [col for col in columns if 'beneficiary' in col.lower() or 'name' in col.lower()]
+        analytics = data_loader.get_data(program_key, columns=gender_cols[:1] + age_cols[:1] + beneficiary_cols[:1])
+        
+        # Display KPIs
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            render_kpi_card("Total Records", total_records, "Data entries", "#667eea")
+        
+        with col2:
+            # Unique beneficiaries from the program's distinct-count sketches;
+            # these span every sheet, so until the load completes the counts
+            # come from this program's sheet
+            sketches = None if data_loader.loading else get_beneficiary_sketches(data_loader)
+            if sketches is not None and program_key in sketches.programs:
+                unique = sketches.merged([program_key])
+                render_kpi_card("Unique Beneficiaries", f"{unique.count():,}", beneficiary_subtitle(unique), "#10b981")
+            else:
+                unique_count = analytics[beneficiary_cols[0]].nunique() if beneficiary_cols else 0
+                render_kpi_card("Unique Beneficiaries", unique_count, "Distinct individuals", "#10b981")
+        
+        with col3:
+            # Median age from the program's age sketches
+            distributions = None if data_loader.loading else get_distribution_sketches(data_loader)
+            if distributions is not None and program_key in distributions.programs("age"):
+                p25, median, p75 = distributions.quantiles("age", [0.25, 0.5, 0.75], [program_key])
+                render_kpi_card("Median Age", f"{median:.1f}", f"Years (IQR {p25:.0f}–{p75:.0f})", "#f59e0b")
+            else:
+                avg_age = analytics[age_cols[0]].mean() if age_cols and analytics[age_cols[0]].dtype in ['int64', 'float64'] else 0
+                render_kpi_card("Average Age", f"{avg_age:.2f}", "Years", "#f59e0b")
+        
+        with col4:
+            # Gender distribution
+            if gender_cols:
+                gender_counts = normalise_gender(analytics[gender_cols[0]]).value_counts()
+                male_count = gender_counts.get('Male', 0)
+                female_count = gender_counts.get('Female', 0)
+                render_kpi_card("Gender Ratio", f"M:{male_count} F:{female_count}", "Male:Female", "#ef4444")
+            else:
+                render_kpi_card("Data Points", total_records, "Records", "#ef4444")
+        
+        st.markdown("---")
+        
+        # Data Table: one page of the chosen columns, so a spilled sheet
+        # reads only those columns back
+        st.markdown("### 📋 Program Data")
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            shown = st.multiselect("Columns", columns, default=columns[:TABLE_COLUMNS])
+        with col2:
+            pages = (total_records + TABLE_PAGE_SIZE - 1) // TABLE_PAGE_SIZE
+            page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1)
+        first = (page_number - 1) * TABLE_PAGE_SIZE
+        table = data_loader.get_data(program_key, columns=shown or columns)
+        st.dataframe(table.iloc[first:first + TABLE_PAGE_SIZE], use_container_width=True, height=400)
+        st.caption(f"Rows {first + 1:,}–{min(first + TABLE_PAGE_SIZE, total_records):,} of {total_records:,}")
+        
+        # Charts
+        st.markdown("---")
+        st.markdown("### 📊 Analytics")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Gender distribution chart
+            if gender_cols:
+                gender_counts = normalise_gender(analytics[gender_cols[0]]).value_counts()
+                fig = create_donut_chart(
+                    gender_counts.index.astype(str),
+                    gender_counts.values,
+                    "Gender Distribution",
+                    ["#ff6b6b", "#4ecdc4"]
+                )
+                st.plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            # Age distribution if available
+            if age_cols:
+                age_counts = analytics[age_cols[0]].value_counts().sort_index()
+                fig = create_bar_chart(
+                    pd.DataFrame({'Age': age_counts.index, 'Count': age_counts.values}),
+                    'Age',
+                    'Count',
+                    "Age Distribution",
+                    "#667eea"
+                )
+                st.plotly_chart(fig, use_container_width=True)
+    
+    else:
+        st.warning(f"No data available for {program_name}")
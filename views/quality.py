@@ -0,0 +1,70 @@
+"""
+Data Quality Page for CSR Dashboard
+Validation rule results per sheet
+"""
+import pandas as pd
+import streamlit as st
+
+from components import render_kpi_card
+from cubes import program_label
+from data_quality import RULES, get_quality_report
+from instrumentation import timed
+
+
+@timed("page.data_quality")
+def data_quality_page(data_loader):
+    """Data quality page with validation results"""
+    st.markdown("""
+    <div class="dashboard-header">
+        <h1>🧪 Data Quality</h1>
+        <p>Validation results for every program sheet</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Validated once per data version; reruns only read the cached results
+    report = get_quality_report(data_loader)
+    summary = report.summary()
+    errors = int(summary.loc[summary["severity"] == "error", "violations"].sum())
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        render_kpi_card("Rows Checked", f"{sum(report.rows_checked.values()):,}", f"{len(report.rows_checked)} sheets", "#667eea")
+    with col2:
+        render_kpi_card("Violations", f"{report.total:,}", f"{errors:,} errors", "#ef4444")
+    with col3:
+        render_kpi_card("Sheets Affected", summary["sheet"].nunique(), "With at least one issue", "#f59e0b")
+    
+    st.markdown("---")
+    st.markdown("### 📏 Rules")
+    counts = summary.groupby("rule")["violations"].sum()
+    st.dataframe(pd.DataFrame([
+        {"Rule": rule.name, "Checks": rule.description, "Severity": rule.severity,
+         "Violations": int(counts.get(rule.name, 0))}
+        for rule in RULES
+    ]), use_container_width=True, hide_index=True)
+    
+    if summary.empty:
+        st.success("No data quality issues found.")
+        return
+    
+    st.markdown("### 📋 Issues by Sheet")
+    display = summary.assign(sheet=summary["sheet"].map(program_label))
+    st.dataframe(display.rename(columns=str.title), use_container_width=True, hide_index=True)
+    
+    st.markdown("### 🔍 Violations")
+    col1, col2 = st.columns(2)
+    with col1:
+        sheets = list(dict.fromkeys(summary["sheet"]))
+        sheet = st.selectbox("Sheet", sheets, format_func=program_label)
+    with col2:
+        rules = ["All rules"] + sorted(summary.loc[summary["sheet"] == sheet, "rule"].unique())
+        rule = st.selectbox("Rule", rules)
+    
+    violations = report.for_sheet(sheet, None if rule == "All rules" else rule)
+    st.dataframe(violations, use_container_width=True, hide_index=True, height=400)
+    st.download_button(
+        "📥 Download CSV",
+        violations.to_csv(index=False).encode("utf-8"),
+        file_name=f"data_quality_{program_label(sheet).replace(' ', '_')}.csv",
+        mime="text/csv"
+    )
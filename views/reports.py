@@ -0,0 +1,130 @@
+"""
+Reports Page for CSR Dashboard
+Report selection, period summaries and downloads
+"""
+import os
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from cubes import get_time_cubes
+from instrumentation import timed
+from kpis import PROGRAM_KEYS
+from query_cache import cached_query
+from report_builder import REPORT_DIR, build_reports, has_static_export
+
+
+def report_summary(data_loader, programs, start_date, end_date) -> pd.DataFrame:
+    """Record counts per program for a period"""
+    summary = []
+    if data_loader.is_period_loaded(start_date, end_date):
+        # Everything in range is loaded, so the daily cube has the counts
+        keys = {program: data_loader.resolve_program_key(PROGRAM_KEYS.get(program, program)) for program in programs}
+        totals = get_time_cubes(data_loader).totals([key for key in keys.values() if key], start_date, end_date)
+        for program, key in keys.items():
+            records = int(totals.loc[key, "count"]) if key in totals.index else 0
+            summary.append({"Program": program, "Records": records})
+    else:
+        # Only partitions overlapping the selected period are read
+        for program in programs:
+            df = data_loader.get_program_data_for_period(PROGRAM_KEYS.get(program, program), start_date, end_date)
+            summary.append({"Program": program, "Records": len(df) if df is not None else 0})
+    return pd.DataFrame(summary)
+
+
+@timed("page.reports")
+def reports_page(data_loader):
+    """Reports page"""
+    st.markdown("""
+    <div class="dashboard-header">
+        <h1>📊 Reports</h1>
+        <p>Generate and view CSR reports</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    report_types = [
+        "Monthly Report",
+        "Quarterly Report",
+        "Annual Report",
+        "Program-Specific Report",
+        "Impact Assessment Report"
+    ]
+    
+    selected_report = st.selectbox("Select Report Type", report_types)
+    
+    st.markdown(f"### {selected_report}")
+    
+    # Report generation options
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        first_date, last_date = data_loader.get_date_range()
+        start_date = st.date_input("Start Date", value=first_date or datetime.now().date())
+        end_date = st.date_input("End Date", value=last_date or datetime.now().date())
+    
+    with col2:
+        program_options = [
+            "Jindal Arogyam Hospital",
+            "Kishori Express",
+            "Vatsalya",
+            "Subhangi",
+            "Swasti Express"
+        ]
+        programs = st.multiselect("Select Programs", program_options)
+    
+    generate = st.button("📥 Generate Report")
+    if generate and not programs:
+        st.warning("Please select at least one program.")
+    elif generate:
+        # Shared by every session asking for the same programs and period
+        summary = cached_query(
+            data_loader, "report.summary",
+            lambda: report_summary(data_loader, sorted(programs, key=program_options.index), start_date, end_date),
+            programs=set(programs), start=start_date, end=end_date
+        )
+        
+        st.success(f"{selected_report} generated successfully!")
+        st.dataframe(summary, use_container_width=True)
+        if data_loader.partitions:
+            overlapping = [p.label for p in data_loader.partitions if p.overlaps(start_date, end_date)]
+            st.caption(
+                f"Read {len(overlapping)} of {len(data_loader.partitions)} period partitions: "
+                f"{', '.join(overlapping) or 'none'}"
+            )
+    
+    # Board pack: one file per program, charts rendered in parallel and cached
+    st.markdown("---")
+    st.markdown("### 🗂️ Board Pack")
+    static = has_static_export()
+    formats = ["html", "pdf"] if static else ["html"]
+    fmt = st.radio("Format", formats, horizontal=True, format_func=str.upper)
+    if not static:
+        st.caption("Install kaleido for static chart images and PDF output; HTML reports embed interactive charts.")
+    if st.button("Build Board Pack"):
+        with st.spinner("Rendering reports..."):
+            try:
+                results = build_reports(
+                    data_loader,
+                    sorted(programs, key=program_options.index) or None,
+                    start_date, end_date, fmt
+                )
+            except Exception as e:
+                st.error(f"Could not build the board pack: {str(e)}")
+                return
+        st.success(f"Built {len(results)} reports in {REPORT_DIR}/")
+        st.dataframe(pd.DataFrame([{
+            "Program": result.program,
+            "Seconds": round(result.seconds, 2),
+            "Charts": result.charts,
+            "Cached Charts": result.cached_charts,
+        } for result in results]), use_container_width=True)
+        for result in results:
+            with open(result.path, "rb") as f:
+                st.download_button(
+                    f"📥 {result.program}",
+                    data=f.read(),
+                    file_name=os.path.basename(result.path),
+                    mime="text/html" if fmt == "html" else "application/pdf",
+                    key=f"board_pack_{result.program}"
+                )
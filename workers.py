@@ -0,0 +1,107 @@
+"""
+Worker Launcher for CSR Dashboard
+Publishes the data once to a shared Arrow store and starts several app.py
+workers on consecutive ports that attach to it
+
+Usage:
+    python workers.py --workers 4 --store /dev/shm/csr_store --base-port 8501
+    python workers.py --workers 4 --nginx-conf csr_dashboard.conf
+
+Put a reverse proxy with sticky sessions in front of the ports (see the
+nginx sample written by --nginx-conf and deploy_guide.txt).
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import List
+
+from shared_store import run_publisher, watch_sources
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+NGINX_TEMPLATE = """# CSR dashboard: {workers} Streamlit workers behind one address
+upstream csr_dashboard {{
+    # Streamlit keeps session state in the worker process, so pin clients
+    ip_hash;
+{servers}
+}}
+
+server {{
+    listen {listen};
+
+    location / {{
+        proxy_pass http://csr_dashboard;
+        proxy_http_version 1.1;
+        proxy_set_header Upgrade $http_upgrade;
+        proxy_set_header Connection "upgrade";
+        proxy_set_header Host $host;
+        proxy_read_timeout 86400;
+    }}
+}}
+"""
+
+
+def nginx_config(ports: List[int], listen: int = 80) -> str:
+    """nginx config balancing the worker ports with sticky sessions"""
+    servers = "\n".join(f"    server 127.0.0.1:{port};" for port in ports)
+    return NGINX_TEMPLATE.format(workers=len(ports), servers=servers, listen=listen)
+
+
+def start_worker(port: int, store_dir: str) -> subprocess.Popen:
+    """One headless app.py process attached to the shared store"""
+    env = dict(os.environ, CSR_SHARED_STORE=store_dir)
+    return subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH,
+         "--server.headless", "true", "--server.port", str(port)],
+        env=env,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several CSR dashboard workers on one shared data store")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Number of app.py processes")
+    parser.add_argument("--base-port", type=int, default=8501, help="Port of the first worker")
+    parser.add_argument("--store", default="/dev/shm/csr_store" if os.path.isdir("/dev/shm") else ".csr_store",
+                        help="Shared store directory (a tmpfs keeps it in memory)")
+    parser.add_argument("--csr-mis", default=os.environ.get("CSR_MIS_PATH", "CSR MIS.xlsx"))
+    parser.add_argument("--jspl-input", default=os.environ.get("JSPL_INPUT_PATH", "JSPL CSR Data Input.xlsx"))
+    parser.add_argument("--watch", type=float, default=30, help="Seconds between source checks (0 to disable)")
+    parser.add_argument("--nginx-conf", default=None, help="Write an nginx config for the workers to this file")
+    parser.add_argument("--listen", type=int, default=80, help="Port nginx listens on in the generated config")
+    args = parser.parse_args()
+
+    ports = [args.base_port + i for i in range(args.workers)]
+    if args.nginx_conf:
+        with open(args.nginx_conf, "w", encoding="utf-8") as f:
+            f.write(nginx_config(ports, args.listen))
+        print(f"nginx config written to {args.nginx_conf}")
+
+    # Publish before any worker starts so none of them falls back to Excel
+    loader = run_publisher(args.store, args.csr_mis, args.jspl_input)
+    if args.watch:
+        threading.Thread(target=watch_sources, args=(loader, args.store, args.watch), daemon=True).start()
+
+    workers = [start_worker(port, args.store) for port in ports]
+    print(f"Started {len(workers)} workers on ports {ports[0]}-{ports[-1]}")
+    try:
+        while all(worker.poll() is None for worker in workers):
+            time.sleep(1)
+        print("Warning: A worker exited; stopping the others")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            try:
+                worker.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())